@@ -1,13 +1,164 @@
-from .core import (
-    UrlHandler,
-    UrlInfoFetcherContext,
-    UrlInfo,
-    UrlInfoStore,
-    UrlInfoFetcher,
-    NoUrlInfoFetcherException,
-    TextInfo,
-)
-from .fetchers import DefaultUrlInfoFetcher, TgUrlInfoFetcher, YTUrlInfoFetcher
-from .gpt import GptTextAnalyzer
-from .yandex_gpt import YandexGptTextAnalyzer
-from .notion import NotionUrlInfoStore
+import importlib
+from typing import TYPE_CHECKING
+
+# Public name -> submodule. Submodules are imported on first access, so ``import analysis`` is cheap and a process
+# only loads the providers (openai, trafilatura, numpy, ...) it actually uses.
+_EXPORTS = {
+    "UrlHandler": "core",
+    "UrlInfoFetcherContext": "core",
+    "UrlInfo": "core",
+    "UrlInfoStore": "core",
+    "UrlInfoFetcher": "core",
+    "NoUrlInfoFetcherException": "core",
+    "FetcherRouter": "core",
+    "HedgedUrlInfoFetcher": "core",
+    "TextInfo": "core",
+    "AsyncUrlHandler": "core",
+    "AsyncUrlInfoFetcherContext": "core",
+    "AsyncUrlInfoStore": "core",
+    "AsyncUrlInfoFetcher": "core",
+    "AsyncTextAnalyzer": "core",
+    "SyncUrlInfoFetcherAdapter": "core",
+    "SyncTextAnalyzerAdapter": "core",
+    "SyncUrlInfoStoreAdapter": "core",
+    "DefaultUrlInfoFetcher": "fetchers",
+    "TgUrlInfoFetcher": "fetchers",
+    "YTUrlInfoFetcher": "fetchers",
+    "AsyncDefaultUrlInfoFetcher": "fetchers",
+    "AsyncTgUrlInfoFetcher": "fetchers",
+    "AsyncYTUrlInfoFetcher": "fetchers",
+    "ExtractionExecutor": "fetchers",
+    "InlineExtractionExecutor": "fetchers",
+    "ThreadExtractionExecutor": "fetchers",
+    "ProcessExtractionExecutor": "fetchers",
+    "create_extraction_executor": "fetchers",
+    "GptTextAnalyzer": "gpt",
+    "AsyncGptTextAnalyzer": "gpt",
+    "YandexGptTextAnalyzer": "yandex_gpt",
+    "AsyncYandexGptTextAnalyzer": "yandex_gpt",
+    "NotionUrlInfoStore": "notion",
+    "AsyncNotionUrlInfoStore": "notion",
+    "CachedTextAnalyzer": "cache",
+    "SqliteAnalysisCache": "cache",
+    "DedupMode": "dedup",
+    "UrlIndex": "dedup",
+    "canonicalize_url": "dedup",
+    "Transport": "transport",
+    "RetryPolicy": "transport",
+    "RetryBudget": "transport",
+    "Outbox": "throttle",
+    "OutboxFullException": "throttle",
+    "ThrottledUrlInfoStore": "throttle",
+    "TokenBucket": "throttle",
+    "YTVideoBatcher": "youtube",
+    "MapReduceTextAnalyzer": "chunking",
+    "chunk_text": "chunking",
+    "estimate_tokens": "chunking",
+    "IncrementalJsonParser": "streaming",
+    "MalformedResponseException": "streaming",
+    "Tracer": "tracing",
+    "Span": "tracing",
+    "JsonlSpanSink": "tracing",
+    "MetricsServer": "tracing",
+    "get_tracer": "tracing",
+    "set_tracer": "tracing",
+    "AnalyzerPool": "providers",
+    "Provider": "providers",
+    "NoProviderAvailableException": "providers",
+    "CircuitBreaker": "breaker",
+    "HostCircuitBreakers": "breaker",
+    "NegativeCache": "breaker",
+    "GuardedUrlInfoFetcher": "breaker",
+    "HostUnavailableException": "breaker",
+    "RetryQueue": "retry",
+    "RetryWorker": "retry",
+    "TgChannelFeed": "telegram",
+    "TgChannelUrlInfoFetcher": "telegram",
+    "parse_channel_feed": "telegram",
+    "parse_post_url": "telegram",
+    "SearchIndex": "search",
+    "FanOutUrlInfoStore": "search",
+    "match_query": "search",
+    "NearDuplicateIndex": "neardup",
+    "MinHasher": "neardup",
+    "shingle_hashes": "neardup",
+    "similarity": "neardup",
+    "TagSuggester": "tagging",
+    "TaggingTextAnalyzer": "tagging",
+    "TaggingMode": "tagging",
+    "tag_key": "tagging",
+    "Journal": "journal",
+    "JournalEntry": "journal",
+    "Stage": "journal",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
+
+if TYPE_CHECKING:
+    from .core import (
+        UrlHandler,
+        UrlInfoFetcherContext,
+        UrlInfo,
+        UrlInfoStore,
+        UrlInfoFetcher,
+        NoUrlInfoFetcherException,
+        FetcherRouter,
+        HedgedUrlInfoFetcher,
+        TextInfo,
+        AsyncUrlHandler,
+        AsyncUrlInfoFetcherContext,
+        AsyncUrlInfoStore,
+        AsyncUrlInfoFetcher,
+        AsyncTextAnalyzer,
+        SyncUrlInfoFetcherAdapter,
+        SyncTextAnalyzerAdapter,
+        SyncUrlInfoStoreAdapter,
+    )
+    from .fetchers import DefaultUrlInfoFetcher, TgUrlInfoFetcher, YTUrlInfoFetcher
+    from .fetchers import AsyncDefaultUrlInfoFetcher, AsyncTgUrlInfoFetcher, AsyncYTUrlInfoFetcher
+    from .fetchers import (
+        ExtractionExecutor,
+        InlineExtractionExecutor,
+        ThreadExtractionExecutor,
+        ProcessExtractionExecutor,
+        create_extraction_executor,
+    )
+    from .gpt import GptTextAnalyzer, AsyncGptTextAnalyzer
+    from .yandex_gpt import YandexGptTextAnalyzer, AsyncYandexGptTextAnalyzer
+    from .notion import NotionUrlInfoStore, AsyncNotionUrlInfoStore
+    from .cache import CachedTextAnalyzer, SqliteAnalysisCache
+    from .dedup import DedupMode, UrlIndex, canonicalize_url
+    from .transport import Transport, RetryPolicy, RetryBudget
+    from .throttle import Outbox, OutboxFullException, ThrottledUrlInfoStore, TokenBucket
+    from .youtube import YTVideoBatcher
+    from .chunking import MapReduceTextAnalyzer, chunk_text, estimate_tokens
+    from .streaming import IncrementalJsonParser, MalformedResponseException
+    from .tracing import Tracer, Span, JsonlSpanSink, MetricsServer, get_tracer, set_tracer
+    from .providers import AnalyzerPool, Provider, NoProviderAvailableException
+    from .breaker import (
+        CircuitBreaker,
+        HostCircuitBreakers,
+        NegativeCache,
+        GuardedUrlInfoFetcher,
+        HostUnavailableException,
+    )
+    from .retry import RetryQueue, RetryWorker
+    from .telegram import TgChannelFeed, TgChannelUrlInfoFetcher, parse_channel_feed, parse_post_url
+    from .search import SearchIndex, FanOutUrlInfoStore, match_query
+    from .neardup import NearDuplicateIndex, MinHasher, shingle_hashes, similarity
+    from .tagging import TagSuggester, TaggingTextAnalyzer, TaggingMode, tag_key
+    from .journal import Journal, JournalEntry, Stage
@@ -0,0 +1,162 @@
+import sqlite3
+import threading
+import time
+from enum import Enum
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+from .core import UrlInfo, UrlInfoFetcher, _declared_hosts, _is_good
+from .dedup import canonicalize_url
+
+
+class HostUnavailableException(Exception):
+    pass
+
+
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures; after ``reset_timeout`` one probe is let through
+    (half-open) and its outcome closes or re-opens the breaker."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0, clock=time.monotonic):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == BreakerState.CLOSED:
+                return True
+            if self.state == BreakerState.OPEN and self._clock() - self._opened_at >= self._reset_timeout:
+                self.state = BreakerState.HALF_OPEN
+                return True
+            return False
+
+    def release(self):
+        """Ends a call that says nothing about the host's health; a half-open probe slot is handed to the next call."""
+        with self._lock:
+            if self.state == BreakerState.HALF_OPEN:
+                # ``_opened_at`` is already ``reset_timeout`` old, so the next ``allow`` probes again
+                self.state = BreakerState.OPEN
+
+    def record(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.state = BreakerState.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == BreakerState.HALF_OPEN or self.failures >= self._failure_threshold:
+                self.state = BreakerState.OPEN
+                self._opened_at = self._clock()
+
+
+class HostCircuitBreakers:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0, clock=time.monotonic):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, url: str) -> CircuitBreaker:
+        host = (urlsplit(url).hostname or "").lower()
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(self._failure_threshold, self._reset_timeout, self._clock)
+            return self._breakers[host]
+
+    def stats(self) -> Dict[str, str]:
+        with self._lock:
+            return {host: b.state.value for host, b in self._breakers.items() if b.state != BreakerState.CLOSED}
+
+
+class NegativeCache:
+    """Recently failed URLs, remembered for ``ttl`` seconds; persisted to SQLite so restarts keep them."""
+
+    def __init__(self, path: str, ttl: float = 3600.0, clock=time.time):
+        self._ttl = ttl
+        self._clock = clock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS failures (url TEXT PRIMARY KEY, failed_at REAL NOT NULL, error TEXT)"
+            )
+            self._conn.execute("DELETE FROM failures WHERE failed_at < ?", (clock() - ttl,))
+        self._failures: Dict[str, Tuple[float, str]] = {
+            url: (failed_at, error) for url, failed_at, error in self._conn.execute("SELECT * FROM failures")
+        }
+
+    def __len__(self) -> int:
+        return len(self._failures)
+
+    def get(self, url: str) -> str | None:
+        """The recorded error if ``url`` failed within ``ttl``."""
+        entry = self._failures.get(canonicalize_url(url))
+        if entry is None or self._clock() - entry[0] >= self._ttl:
+            return None
+        return entry[1]
+
+    def add(self, url: str, error: str):
+        key, now = canonicalize_url(url), self._clock()
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO failures VALUES (?, ?, ?)", (key, now, error))
+            self._failures[key] = (now, error)
+
+    def remove(self, url: str):
+        key = canonicalize_url(url)
+        with self._lock, self._conn:
+            if self._failures.pop(key, None) is not None:
+                self._conn.execute("DELETE FROM failures WHERE url = ?", (key,))
+
+
+class GuardedUrlInfoFetcher:
+    """Fails fast with ``HostUnavailableException`` for URLs that failed recently or whose host's breaker is open.
+
+    Results of the wrapped fetcher feed the host's breaker; an "N/A" result (the fetchers' way of reporting a
+    failed download) counts as a failure and goes to the negative cache.
+    """
+
+    def __init__(self, fetcher: UrlInfoFetcher, breakers: HostCircuitBreakers, negative: NegativeCache | None = None):
+        self._fetcher = fetcher
+        self._breakers = breakers
+        self._negative = negative
+        self.hosts = _declared_hosts(fetcher)
+        self.rejected = 0
+
+    def get_info(self, url: str) -> UrlInfo | None:
+        error = self._negative.get(url) if self._negative is not None else None
+        breaker = self._breakers.get(url)
+        if error is not None or not breaker.allow():
+            self.rejected += 1
+            raise HostUnavailableException(f"{url}: {error or 'circuit open'}")
+
+        try:
+            info = self._fetcher.get_info(url)
+        except Exception as e:
+            self._failed(url, breaker, repr(e))
+            raise
+
+        if info is None:
+            breaker.release()
+            return None
+        if not _is_good(info):
+            self._failed(url, breaker, "download failed")
+        else:
+            breaker.record(ok=True)
+        return info
+
+    def _failed(self, url: str, breaker: CircuitBreaker, error: str):
+        breaker.record(ok=False)
+        if self._negative is not None:
+            self._negative.add(url, error)
@@ -0,0 +1,183 @@
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import IO, Iterable, Iterator, Set, Tuple
+
+from .core import TextAnalyzer, TextInfo, UrlHandler, UrlInfo, UrlInfoStore
+
+logger = logging.getLogger(__name__)
+
+_URL = re.compile(r"https?://[^\s\"'<>]+")
+_HREF = re.compile(r"""href\s*=\s*["'](https?://[^"']+)["']""", re.IGNORECASE)
+_JSON_URL_FIELDS = ("url", "href", "link", "uri")
+
+
+def _urls_from_json(line: str) -> list:
+    try:
+        data = json.loads(line)
+    except json.JSONDecodeError:
+        return _URL.findall(line)
+    if isinstance(data, str):
+        return _URL.findall(data)
+    if isinstance(data, dict):
+        for key in _JSON_URL_FIELDS:
+            if isinstance(data.get(key), str):
+                return [data[key]]
+        return [url for value in data.values() if isinstance(value, str) for url in _URL.findall(value)]
+    return []
+
+
+def read_urls(path: str) -> Iterator[Tuple[int, str]]:
+    """Streams ``(position, url)`` from a plain-text list, a JSONL file or a browser HTML bookmark export.
+
+    ``position`` is stable between runs of the same file, so it is what the checkpoint records.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    position = 0
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if ext in (".html", ".htm"):
+                urls = _HREF.findall(line)
+            elif ext in (".jsonl", ".json"):
+                urls = _urls_from_json(line) if line.strip() else []
+            else:
+                urls = _URL.findall(line)
+            for url in urls:
+                yield position, url.rstrip(".,;)")
+                position += 1
+
+
+class Checkpoint:
+    """Append-only log of finished positions, so an interrupted import resumes where it stopped."""
+
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self.done: Set[int] = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.done = {int(line) for line in f if line.strip()}
+        self._file: IO = open(path, "a")
+
+    def __contains__(self, position: int) -> bool:
+        return position in self.done
+
+    def mark(self, position: int):
+        with self._lock:
+            self.done.add(position)
+            self._file.write(f"{position}\n")
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class BoundedTextAnalyzer:
+    def __init__(self, analyzer: TextAnalyzer, limit: int):
+        self._analyzer = analyzer
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def get_info(self, text: str) -> TextInfo:
+        with self._semaphore:
+            return self._analyzer.get_info(text)
+
+
+class BoundedUrlInfoStore:
+    def __init__(self, store: UrlInfoStore, limit: int):
+        self._store = store
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def create_page(self, info: UrlInfo) -> str | None:
+        with self._semaphore:
+            return self._store.create_page(info)
+
+    def update_page(self, page_id: str, info: UrlInfo):
+        with self._semaphore:
+            return self._store.update_page(page_id, info)
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+
+@dataclass
+class ImportStats:
+    total: int
+    skipped: int = 0
+    done: int = 0
+    failed: int = 0
+
+
+class BulkImporter:
+    """Runs URLs through ``UrlHandler`` on a thread pool.
+
+    ``workers`` bounds the fetch stage; analyze and store stages are bounded by wrapping the analyzer and the
+    store in ``BoundedTextAnalyzer`` / ``BoundedUrlInfoStore``.
+    """
+
+    def __init__(
+        self,
+        handler: UrlHandler,
+        checkpoint: Checkpoint,
+        workers: int = 8,
+        report_every: float = 5.0,
+        out: IO = sys.stderr,
+    ):
+        self._handler = handler
+        self._checkpoint = checkpoint
+        self._workers = workers
+        self._report_every = report_every
+        self._out = out
+        self._lock = threading.Lock()
+
+    def run(self, items: Iterable[Tuple[int, str]], total: int) -> ImportStats:
+        stats = ImportStats(total=total)
+        slots = threading.BoundedSemaphore(self._workers * 2)
+        started = time.monotonic()
+        last_report = started
+
+        def process(position: int, url: str):
+            try:
+                self._handler.handle(url)
+            except Exception:
+                logger.exception("failed to import %s", url)
+                with self._lock:
+                    stats.failed += 1
+            else:
+                self._checkpoint.mark(position)
+                with self._lock:
+                    stats.done += 1
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            for position, url in items:
+                if position in self._checkpoint:
+                    stats.skipped += 1
+                    continue
+                slots.acquire()
+                executor.submit(process, position, url)
+
+                now = time.monotonic()
+                if now - last_report >= self._report_every:
+                    self._report(stats, now - started)
+                    last_report = now
+
+        self._report(stats, time.monotonic() - started)
+        return stats
+
+    def _report(self, stats: ImportStats, elapsed: float):
+        processed = stats.done + stats.failed
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        remaining = stats.total - stats.skipped - processed
+        eta = remaining / rate if rate > 0 else float("inf")
+        self._out.write(
+            f"{processed + stats.skipped}/{stats.total} done={stats.done} failed={stats.failed} "
+            f"skipped={stats.skipped} {rate:.2f} url/s eta={eta:.0f}s\n"
+        )
+        self._out.flush()
@@ -0,0 +1,144 @@
+import dataclasses
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Tuple
+
+from .core import TextAnalyzer, TextInfo
+
+DEFAULT_TTL = 30 * 24 * 3600
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def cache_key(text: str, model_id: str, prompt_version: str, max_chars: int | None = None) -> str:
+    """Content hash of what the model actually sees: the truncated, whitespace-normalized text."""
+    if max_chars is not None:
+        text = text[:max_chars]
+    normalized = _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+    payload = "\0".join([model_id, prompt_version, normalized])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _copy(info: TextInfo) -> TextInfo:
+    """A copy callers may mutate without touching the cached entry, lists included."""
+    return dataclasses.replace(info, tags=list(info.tags), keywords=list(info.keywords))
+
+
+class SqliteAnalysisCache:
+    """On-disk tier of ``CachedTextAnalyzer``."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> TextInfo | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM analysis WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at < time.time():
+            self.delete(key)
+            return None
+        return TextInfo(**json.loads(value))
+
+    def set(self, key: str, info: TextInfo, ttl: float):
+        value = json.dumps(dataclasses.asdict(info), ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl),
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analysis WHERE key = ?", (key,))
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM analysis WHERE expires_at < ?", (time.time(),)).rowcount
+
+
+class CachedTextAnalyzer:
+    """``TextAnalyzer`` wrapper that serves repeated texts from an LRU (and optionally on-disk) cache.
+
+    The key includes the wrapped analyzer's ``model_id`` and ``prompt_version``, so changing either
+    invalidates old entries.
+    """
+
+    def __init__(
+        self,
+        analyzer: TextAnalyzer,
+        max_size: int = 1024,
+        ttl: float = DEFAULT_TTL,
+        disk: SqliteAnalysisCache | None = None,
+    ):
+        self._analyzer = analyzer
+        self._max_size = max_size
+        self._ttl = ttl
+        self._disk = disk
+        self._memory: OrderedDict[str, Tuple[float, TextInfo]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.model_id = getattr(analyzer, "model_id", type(analyzer).__name__)
+        self.prompt_version = getattr(analyzer, "prompt_version", "")
+        self.max_chars = getattr(analyzer, "max_chars", None)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_info(self, text: str) -> TextInfo:
+        if not text:
+            return self._analyzer.get_info(text)
+
+        key = cache_key(text, self.model_id, self.prompt_version, self.max_chars)
+
+        info = self._get_memory(key)
+        if info is not None:
+            self.hits += 1
+            return _copy(info)
+
+        if self._disk is not None:
+            info = self._disk.get(key)
+            if info is not None:
+                self.disk_hits += 1
+                self._set_memory(key, info)
+                return _copy(info)
+
+        self.misses += 1
+        info = self._analyzer.get_info(text)
+        self._set_memory(key, info)
+        if self._disk is not None:
+            self._disk.set(key, info, self._ttl)
+        return _copy(info)
+
+    def stats(self) -> dict:
+        return {"size": len(self._memory), "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
+
+    def _get_memory(self, key: str) -> TextInfo | None:
+        with self._lock:
+            item = self._memory.get(key)
+            if item is None:
+                return None
+            expires_at, info = item
+            if expires_at < time.monotonic():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return info
+
+    def _set_memory(self, key: str, info: TextInfo):
+        with self._lock:
+            self._memory[key] = (time.monotonic() + self._ttl, info)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._max_size:
+                self._memory.popitem(last=False)
@@ -0,0 +1,125 @@
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List
+
+from .core import TextAnalyzer, TextInfo
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+# Tokenizers split Cyrillic words into more pieces than Latin ones; one regex "word" is ~1.3 tokens on average.
+TOKENS_PER_WORD = 1.3
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(_TOKEN.findall(text)) * TOKENS_PER_WORD) if text else 0
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def _split_long(sentence: str, max_tokens: int, max_chars: int | None) -> Iterable[str]:
+    words, piece = sentence.split(), []
+    for word in words:
+        candidate = " ".join(piece + [word])
+        if piece and (estimate_tokens(candidate) > max_tokens or (max_chars and len(candidate) > max_chars)):
+            yield " ".join(piece)
+            piece = []
+        piece.append(word)
+    if piece:
+        yield " ".join(piece)
+
+
+def chunk_text(text: str, max_tokens: int, max_chars: int | None = None) -> List[str]:
+    """Greedily packs whole sentences into chunks of at most ``max_tokens`` (and ``max_chars``)."""
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = current_chars = 0
+
+    for sentence in split_sentences(text):
+        tokens = estimate_tokens(sentence)
+        if tokens > max_tokens or (max_chars and len(sentence) > max_chars):
+            pieces = list(_split_long(sentence, max_tokens, max_chars))
+        else:
+            pieces = [sentence]
+
+        for piece in pieces:
+            tokens = estimate_tokens(piece)
+            too_many_chars = max_chars and current_chars + len(piece) + 1 > max_chars
+            if current and (current_tokens + tokens > max_tokens or too_many_chars):
+                chunks.append(" ".join(current))
+                current, current_tokens, current_chars = [], 0, 0
+            current.append(piece)
+            current_tokens += tokens
+            current_chars += len(piece) + 1
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _top(values: Iterable[str], limit: int) -> List[str]:
+    """Most frequent values first (case-insensitive), ties keep first-seen order and spelling."""
+    counts: Counter = Counter()
+    spelling = {}
+    for value in values:
+        key = value.strip().lower()
+        if not key:
+            continue
+        counts[key] += 1
+        spelling.setdefault(key, value.strip())
+    return [spelling[key] for key, _ in counts.most_common(limit)]
+
+
+class MapReduceTextAnalyzer:
+    """Analyzes long texts chunk by chunk instead of cutting them off.
+
+    Text is split into sentence-aligned chunks of ``token_budget`` tokens (at most ``max_chunks``), chunks
+    are analyzed in parallel, and the partial results are merged: tags and keywords by frequency, and title
+    and summary by one more call over the partial summaries (``reduce_with_llm``).
+    """
+
+    max_chars = None
+
+    def __init__(
+        self,
+        analyzer: TextAnalyzer,
+        token_budget: int = 600,
+        max_chunks: int = 8,
+        max_workers: int = 4,
+        max_tags: int = 3,
+        max_keywords: int = 10,
+        reduce_with_llm: bool = True,
+    ):
+        self._analyzer = analyzer
+        self._token_budget = token_budget
+        self._max_chunks = max_chunks
+        self._chunk_chars = getattr(analyzer, "max_chars", None)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chunk")
+        self._max_tags = max_tags
+        self._max_keywords = max_keywords
+        self._reduce_with_llm = reduce_with_llm
+        self.model_id = getattr(analyzer, "model_id", type(analyzer).__name__)
+        self.prompt_version = f"{getattr(analyzer, 'prompt_version', '')}-mr{token_budget}x{max_chunks}"
+
+    def get_info(self, text: str) -> TextInfo:
+        chunks = chunk_text(text or "", self._token_budget, self._chunk_chars)[: self._max_chunks]
+        if len(chunks) <= 1:
+            return self._analyzer.get_info(chunks[0] if chunks else text)
+
+        parts = list(self._pool.map(self._analyzer.get_info, chunks))
+        return self._reduce(parts)
+
+    def _reduce(self, parts: List[TextInfo]) -> TextInfo:
+        title, summary = parts[0].title, " ".join(part.summary for part in parts if part.summary)
+
+        if self._reduce_with_llm:
+            combined = self._analyzer.get_info("\n".join(part.summary for part in parts if part.summary))
+            title, summary = combined.title or title, combined.summary or summary
+            parts = parts + [combined]
+
+        tags = _top((tag for part in parts for tag in part.tags), self._max_tags)
+        keywords = _top((keyword for part in parts for keyword in part.keywords), self._max_keywords)
+        return TextInfo(title=title, tags=tags, summary=summary, keywords=keywords)
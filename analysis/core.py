@@ -1,6 +1,15 @@
-import traceback
+import asyncio
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import List, Protocol
+from typing import Dict, FrozenSet, Generic, List, Protocol, TypeVar
+from urllib.parse import urlsplit
+
+from . import tracing
+from .dedup import DedupMode, UrlIndex
+from .metrics import StageMetrics
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -33,36 +42,351 @@ class TextAnalyzer(Protocol):
 
 
 class UrlInfoStore(Protocol):
-    def create_page(self, info: UrlInfo): ...
+    def create_page(self, info: UrlInfo) -> str | None: ...
+
+    def update_page(self, page_id: str, info: UrlInfo): ...
+
+
+class AsyncUrlInfoFetcher(Protocol):
+    async def get_info(self, url: str) -> UrlInfo | None: ...
+
+
+class AsyncTextAnalyzer(Protocol):
+    async def get_info(self, text: str) -> TextInfo: ...
+
+
+class AsyncUrlInfoStore(Protocol):
+    async def create_page(self, info: UrlInfo) -> str | None: ...
+
+    async def update_page(self, page_id: str, info: UrlInfo): ...
 
 
 class NoUrlInfoFetcherException(Exception):
     pass
 
 
+F = TypeVar("F")
+
+
+def _declared_hosts(fetcher) -> FrozenSet[str]:
+    hosts = getattr(fetcher, "hosts", None)
+    return frozenset(hosts) if isinstance(hosts, (set, frozenset, list, tuple)) else frozenset()
+
+
+def _covers(pattern: str, host: str) -> bool:
+    """Whether a declared host matches ``host``, itself a host or a ``*.`` wildcard."""
+    return pattern == host or (pattern.startswith("*.") and host.endswith(pattern[1:]))
+
+
+class FetcherRouter(Generic[F]):
+    """Precomputed host -> strategies index.
+
+    Fetchers declare the hosts they handle in a ``hosts`` attribute (``"*.example.com"`` matches
+    subdomains); fetchers without it are generic and are tried for every URL. Candidates keep the order of
+    ``strategies``, so routing only skips fetchers that would have returned ``None`` anyway.
+    """
+
+    def __init__(self, strategies: List[F]):
+        self._generic = [s for s in strategies if not _declared_hosts(s)]
+        self._routes: Dict[str, List[F]] = {}
+        # a route also lists the fetchers whose wildcards cover its host, since lookup stops at the first match
+        for host in {host for s in strategies for host in _declared_hosts(s)}:
+            self._routes[host] = [
+                s for s in strategies if not _declared_hosts(s) or any(_covers(p, host) for p in _declared_hosts(s))
+            ]
+
+    def route(self, url: str) -> List[F]:
+        host = (urlsplit(url).hostname or "").lower()
+        if host in self._routes:
+            return self._routes[host]
+
+        labels = host.split(".")
+        for i in range(1, len(labels)):
+            wildcard = "*." + ".".join(labels[i:])
+            if wildcard in self._routes:
+                return self._routes[wildcard]
+
+        return self._generic
+
+
 class UrlInfoFetcherContext:
     def __init__(self, strategies: List[UrlInfoFetcher]):
         self.strategies = strategies
+        self._router = FetcherRouter(strategies)
 
     def get_info(self, url: str) -> UrlInfo:
-        for item in self.strategies:
-            inf = item.get_info(url)
-            if inf is not None:
-                return inf
+        with tracing.span("route") as span:
+            for item in self._router.route(url):
+                inf = item.get_info(url)
+                if inf is not None:
+                    span.set(fetcher=type(item).__name__)
+                    return inf
+
+            raise NoUrlInfoFetcherException(url)
+
+
+def _is_good(info: UrlInfo | None) -> bool:
+    return info is not None and info.title != "N/A"
+
+
+def _result(future: Future) -> UrlInfo | None:
+    try:
+        return future.result()
+    except Exception:
+        logger.exception("hedged fetch failed")
+        return None
 
-        raise NoUrlInfoFetcherException(url)
+
+class HedgedUrlInfoFetcher:
+    """Races two fetchers for the same URL.
+
+    ``secondary`` starts once ``delay`` seconds pass without a good answer from ``primary`` (``delay=0`` runs
+    both at once). The first good result wins and the loser is cancelled if it has not started; a running
+    loser finishes in the background and its result is dropped.
+    """
+
+    def __init__(self, primary: UrlInfoFetcher, secondary: UrlInfoFetcher, delay: float = 0.0, max_workers: int = 8):
+        self._primary = primary
+        self._secondary = secondary
+        self._delay = delay
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self.hosts = _declared_hosts(primary)
+        self.hedged = 0
+        self.secondary_wins = 0
+
+    def get_info(self, url: str) -> UrlInfo | None:
+        primary = self._pool.submit(self._primary.get_info, url)
+        results: Dict[Future, UrlInfo | None] = {}
+        done, _ = wait([primary], timeout=self._delay)
+        if done:
+            results[primary] = _result(primary)
+            if _is_good(results[primary]):
+                return results[primary]
+
+        self.hedged += 1
+        secondary = self._pool.submit(self._secondary.get_info, url)
+        pending = {secondary} if done else {primary, secondary}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[future] = _result(future)
+                if _is_good(results[future]):
+                    for loser in pending:
+                        loser.cancel()
+                    if future is secondary:
+                        self.secondary_wins += 1
+                    return results[future]
+
+        return results[primary] if results[primary] is not None else results[secondary]
 
 
 class UrlHandler:
-    def __init__(self, fetcher: UrlInfoFetcherContext, store: UrlInfoStore):
+    """Fetches a URL and saves it to the store.
+
+    With a ``retry_queue``, URLs whose fetch failed are still saved as an "N/A" placeholder (an existing page
+    is left alone) and queued; ``retry`` later replaces the placeholder once the URL can be fetched.
+
+    With a ``journal``, every URL is logged from ``accept`` until it is stored, and ``replay`` resumes the
+    unfinished ones after a restart without fetching and analyzing again those that got that far.
+    """
+
+    def __init__(
+        self,
+        fetcher: UrlInfoFetcherContext,
+        store: UrlInfoStore,
+        metrics: StageMetrics | None = None,
+        index: UrlIndex | None = None,
+        dedup_mode: DedupMode = DedupMode.SKIP,
+        retry_queue=None,
+        journal=None,
+    ):
         self._fetcher = fetcher
         self._store = store
+        self.metrics = metrics or StageMetrics()
+        self._index = index
+        self._dedup_mode = dedup_mode
+        self._retry_queue = retry_queue
+        self._journal = journal
+
+    def accept(self, url: str):
+        """Records ``url`` in the journal as soon as it is accepted, before it waits for a worker."""
+        if self._journal is not None:
+            self._journal.accept(url)
 
     def handle(self, url: str):
+        entry = self._journal.accept(url) if self._journal is not None else None
+        self._run(url, entry)
+
+    def replay(self) -> int:
+        """Finishes the journal's unfinished URLs; those analyzed before are only stored.
+
+        Runs alongside live handling: an entry a live update has claimed is left to it. Returns the number of
+        entries replayed.
+        """
+        entries = self._journal.unfinished() if self._journal is not None else []
+        replayed = 0
+        for entry in entries:
+            try:
+                replayed += self._run(entry.url, entry)
+            except Exception:
+                logger.exception("failed to replay %s", entry.url)
+        return replayed
+
+    def _run(self, url: str, entry) -> bool:
+        if entry is None:
+            self._handle(url, None)
+            return True
+        if not self._journal.claim(entry):
+            logger.info("%s is already being handled", url)
+            return False
         try:
+            try:
+                self._handle(url, entry)
+            except Exception as e:
+                self._journal.failed(entry, e)
+                raise
+            self._journal.stored(entry)
+        finally:
+            self._journal.release(entry)
+        return True
+
+    def _handle(self, url: str, entry):
+        with tracing.span("pipeline", url=url) as span:
+            page_id = self._index.get(url) if self._index is not None else None
+            if page_id is not None and self._dedup_mode == DedupMode.SKIP:
+                span.outcome = "skipped"
+                return
+
+            if entry is not None and entry.info is not None:
+                info = entry.info
+            else:
+                try:
+                    with self.metrics.time("fetch"):
+                        info = self._fetcher.get_info(url)
+                except Exception:
+                    logger.exception("failed to fetch %s", url)
+                    info = UrlInfo(title="N/A", url=url, tags=[], summary="", keywords=[])
+                if entry is not None and _is_good(info):
+                    self._journal.analyzed(entry, info)
+
+            if not _is_good(info):
+                span.outcome = "fetch_failed"
+                if self._retry_queue is not None:
+                    if page_id is None:
+                        with self.metrics.time("store"):
+                            page_id = self._save(url, info)
+                    self._retry_queue.put(url, page_id)
+                    return
+
+            with self.metrics.time("store"):
+                if page_id is not None and self._dedup_mode == DedupMode.UPDATE:
+                    self._store.update_page(page_id, info)
+                    return
+                self._save(url, info)
+
+    def retry(self, url: str, page_id: str | None) -> bool:
+        """Re-fetches ``url`` and replaces its placeholder page; returns ``False`` if the fetch failed again."""
+        with tracing.span("retry", url=url) as span:
             info = self._fetcher.get_info(url)
-        except Exception as e:
-            traceback.print_exc()
+            if not _is_good(info):
+                span.outcome = "fetch_failed"
+                return False
+
+            if page_id is None and self._index is not None:
+                page_id = self._index.get(url)
+            with self.metrics.time("store"):
+                if page_id is not None:
+                    self._store.update_page(page_id, info)
+                else:
+                    self._save(url, info)
+            return True
+
+    def _save(self, url: str, info: UrlInfo) -> str | None:
+        page_id = self._store.create_page(info)
+        if self._index is not None and page_id:
+            self._index.add(url, page_id)
+        return page_id
+
+
+class AsyncUrlInfoFetcherContext:
+    def __init__(self, strategies: List[AsyncUrlInfoFetcher]):
+        self.strategies = strategies
+        self._router = FetcherRouter(strategies)
+
+    async def get_info(self, url: str) -> UrlInfo:
+        for item in self._router.route(url):
+            inf = await item.get_info(url)
+            if inf is not None:
+                return inf
+
+        raise NoUrlInfoFetcherException(url)
+
+
+class AsyncUrlHandler:
+    def __init__(
+        self,
+        fetcher: AsyncUrlInfoFetcherContext,
+        store: AsyncUrlInfoStore,
+        metrics: StageMetrics | None = None,
+        index: UrlIndex | None = None,
+        dedup_mode: DedupMode = DedupMode.SKIP,
+    ):
+        self._fetcher = fetcher
+        self._store = store
+        self.metrics = metrics or StageMetrics()
+        self._index = index
+        self._dedup_mode = dedup_mode
+
+    async def handle(self, url: str):
+        page_id = self._index.get(url) if self._index is not None else None
+        if page_id is not None and self._dedup_mode == DedupMode.SKIP:
+            return
+
+        try:
+            with self.metrics.time("fetch"):
+                info = await self._fetcher.get_info(url)
+        except Exception:
+            logger.exception("failed to fetch %s", url)
             info = UrlInfo(title="N/A", url=url, tags=[], summary="", keywords=[])
 
-        self._store.create_page(info)
+        with self.metrics.time("store"):
+            if page_id is not None and self._dedup_mode == DedupMode.UPDATE:
+                await self._store.update_page(page_id, info)
+                return
+            page_id = await self._store.create_page(info)
+
+        if self._index is not None and page_id:
+            self._index.add(url, page_id)
+
+
+class SyncUrlInfoFetcherAdapter:
+    """Runs a blocking ``UrlInfoFetcher`` in the default executor."""
+
+    def __init__(self, fetcher: UrlInfoFetcher):
+        self._fetcher = fetcher
+
+    async def get_info(self, url: str) -> UrlInfo | None:
+        return await asyncio.to_thread(self._fetcher.get_info, url)
+
+
+class SyncTextAnalyzerAdapter:
+    """Runs a blocking ``TextAnalyzer`` in the default executor."""
+
+    def __init__(self, analyzer: TextAnalyzer):
+        self._analyzer = analyzer
+
+    async def get_info(self, text: str) -> TextInfo:
+        return await asyncio.to_thread(self._analyzer.get_info, text)
+
+
+class SyncUrlInfoStoreAdapter:
+    """Runs a blocking ``UrlInfoStore`` in the default executor."""
+
+    def __init__(self, store: UrlInfoStore):
+        self._store = store
+
+    async def create_page(self, info: UrlInfo) -> str | None:
+        return await asyncio.to_thread(self._store.create_page, info)
+
+    async def update_page(self, page_id: str, info: UrlInfo):
+        return await asyncio.to_thread(self._store.update_page, page_id, info)
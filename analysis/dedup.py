@@ -0,0 +1,137 @@
+import re
+import sqlite3
+import threading
+from enum import Enum
+from typing import Dict, Iterable, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = {
+    "fbclid",
+    "gclid",
+    "yclid",
+    "dclid",
+    "msclkid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "ref_src",
+    "ref_url",
+    "_hsenc",
+    "_hsmi",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "_ga")
+# parameters that only mean "where the link was shared from" on these hosts, but carry meaning elsewhere
+# (e.g. GitHub's ``?ref=<branch>``)
+HOST_TRACKING_PARAMS = {
+    "youtube.com": {"si", "feature"},
+    "m.youtube.com": {"si", "feature"},
+    "music.youtube.com": {"si", "feature"},
+    "youtu.be": {"si", "feature"},
+    "open.spotify.com": {"si"},
+    "twitter.com": {"s", "t", "ref"},
+    "x.com": {"s", "t", "ref"},
+    "producthunt.com": {"ref"},
+}
+
+YT_HOSTS = {"youtube.com", "m.youtube.com", "music.youtube.com", "youtu.be", "youtube-nocookie.com"}
+TG_HOSTS = {"t.me", "telegram.me", "telegram.dog"}
+
+_YT_PATH_ID = re.compile(r"^/(?:shorts|embed|live|v)/([-\w]+)")
+# public channel names are 5-32 characters, so "s" and "c" (private chats, ``/c/<chat id>/<post>``) are never one
+TG_CHANNEL = r"[a-zA-Z]\w{4,31}"
+_TG_POST = re.compile(rf"^/(?:s/)?({TG_CHANNEL})/(\d+)")
+_TG_PRIVATE_POST = re.compile(r"^/c/(\d+)/(\d+)")
+
+
+class DedupMode(Enum):
+    SKIP = "skip"
+    UPDATE = "update"
+    FORCE = "force"
+
+
+def _is_tracking(name: str, host: str) -> bool:
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES) or name in HOST_TRACKING_PARAMS.get(host, ())
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so that trivially different links to the same page compare equal."""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path or "/"
+    query = parse_qsl(parts.query, keep_blank_values=True)
+
+    if host in YT_HOSTS:
+        video_id = None
+        if host == "youtu.be":
+            video_id = path.strip("/") or None
+        elif match := _YT_PATH_ID.match(path):
+            video_id = match.group(1)
+        else:
+            video_id = dict(query).get("v")
+        if video_id:
+            return f"https://youtube.com/watch?v={video_id}"
+
+    if host in TG_HOSTS:
+        if match := _TG_PRIVATE_POST.match(path):
+            return f"https://t.me/c/{match.group(1)}/{match.group(2)}"
+        if match := _TG_POST.match(path):
+            return f"https://t.me/{match.group(1).lower()}/{match.group(2)}"
+        host = "t.me"
+
+    query = sorted((k, v) for k, v in query if not _is_tracking(k.lower(), host))
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+class UrlIndex:
+    """Canonical URL -> Notion page id.
+
+    Lookups hit an in-memory dict; writes go through to SQLite so the index survives restarts.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, page_id TEXT NOT NULL)")
+        self._pages: Dict[str, str] = dict(self._conn.execute("SELECT url, page_id FROM urls"))
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def get(self, url: str) -> str | None:
+        return self._pages.get(canonicalize_url(url))
+
+    def add(self, url: str, page_id: str):
+        key = canonicalize_url(url)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO urls (url, page_id) VALUES (?, ?)", (key, page_id))
+            self._pages[key] = page_id
+
+    def bootstrap(self, pages: Iterable[Tuple[str, str]], batch_size: int = 1000) -> int:
+        """Bulk-load ``(url, page_id)`` pairs, e.g. from ``NotionUrlInfoStore.iter_pages``."""
+        count = 0
+        batch = []
+        for url, page_id in pages:
+            if not url:
+                continue
+            batch.append((canonicalize_url(url), page_id))
+            if len(batch) >= batch_size:
+                count += self._insert(batch)
+                batch = []
+        if batch:
+            count += self._insert(batch)
+        return count
+
+    def _insert(self, batch) -> int:
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO urls (url, page_id) VALUES (?, ?)", batch)
+            for key, page_id in batch:
+                self._pages.setdefault(key, page_id)
+        return len(batch)
@@ -1,46 +1,303 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
 import re
-import traceback
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Protocol, Tuple
+
+from . import tracing
+from .core import AsyncTextAnalyzer, TextAnalyzer, UrlInfo, TextInfo
+from .telegram import parse_post_url
+from .transport import Transport
+from .youtube import PART, YTVideoBatcher
+
+# trafilatura (with dateparser and htmldate), the Google API client and httpx take most of the start-up time, so they
+# are imported where they are first used rather than here
+if TYPE_CHECKING:
+    import httpx
+    from trafilatura.metadata import Document
+
+    from .neardup import NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml", "text/plain", "text/xml", "application/xml"}
+CHUNK_SIZE = 64 * 1024
+# extraction drops boilerplate, so the tree keeps a few times the analyzer's budget of raw body text
+PRUNE_FACTOR = 4
+
+
+class UnsupportedContentException(Exception):
+    pass
+
+
+def build(service: str, version: str, **kwargs):
+    """``googleapiclient.discovery.build`` with the discovery document bundled with the library, no fetch."""
+    from googleapiclient import discovery
+
+    return discovery.build(service, version, static_discovery=True, **kwargs)
+
+
+class LazyYouTubeClient:
+    """Builds the YouTube Data API client on its first request instead of at start-up."""
+
+    def __init__(self, api_key: str, http=None):
+        self._api_key = api_key
+        self._http = http
+        self._client = None
+        self._lock = threading.Lock()
+
+    def videos(self):
+        with self._lock:
+            if self._client is None:
+                self._client = build("youtube", "v3", developerKey=self._api_key, http=self._http)
+        return self._client.videos()
+
+
+def _decode(content: bytes) -> str:
+    from trafilatura.utils import decode_file
+
+    return decode_file(content)
+
+
+def _extract(downloaded: str) -> Tuple[Document, str]:
+    import trafilatura
+
+    meta: Document = trafilatura.extract_metadata(downloaded)
+    text: str = trafilatura.extract(downloaded)
+    return meta, text
+
+
+def _prune(tree, max_chars: int):
+    """Cuts the body after its first ``max_chars * PRUNE_FACTOR`` characters of text, so extraction of a huge page
+    stops near the analyzer's budget instead of walking the whole tree."""
+    body = tree.find(".//body")
+    if body is None:
+        return
+    budget, seen = max_chars * PRUNE_FACTOR, 0
+    for element in body.iter():
+        seen += len(element.text or "") + len(element.tail or "")
+        if seen >= budget:
+            break
+    else:
+        return
+
+    node = element
+    while node is not body:
+        parent = node.getparent()
+        for sibling in list(node.itersiblings()):
+            parent.remove(sibling)
+        node = parent
+
+
+def _extract_once(downloaded: str, url: str | None = None, max_chars: int | None = None) -> Tuple[Document, str]:
+    """Parses the page once and takes both metadata and text from the same extraction pass."""
+    import trafilatura
+    from trafilatura.utils import load_html
+
+    tree = load_html(downloaded)
+    if tree is None:
+        raise UnsupportedContentException(url)
+    if max_chars:
+        _prune(tree, max_chars)
+
+    document = trafilatura.bare_extraction(tree, url=url, include_comments=False, as_dict=False)
+    if document is None:
+        return trafilatura.extract_metadata(tree, default_url=url), ""
+
+    text = document.text or ""
+    return document, text[:max_chars] if max_chars else text
 
-import trafilatura
-from trafilatura.metadata import Document
-from googleapiclient.discovery import build
-from .core import TextAnalyzer, UrlInfo, TextInfo
+
+class ExtractionExecutor(Protocol):
+    def extract(
+        self, downloaded: str, url: str | None = None, max_chars: int | None = None
+    ) -> Tuple[Document, str]: ...
+
+
+class InlineExtractionExecutor:
+    def extract(self, downloaded: str, url: str | None = None, max_chars: int | None = None) -> Tuple[Document, str]:
+        return _extract_once(downloaded, url, max_chars)
+
+
+class PoolExtractionExecutor:
+    def __init__(self, executor: Executor):
+        self._executor = executor
+
+    def extract(self, downloaded: str, url: str | None = None, max_chars: int | None = None) -> Tuple[Document, str]:
+        return self._executor.submit(_extract_once, downloaded, url, max_chars).result()
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+class ThreadExtractionExecutor(PoolExtractionExecutor):
+    def __init__(self, max_workers: int | None = None):
+        super().__init__(ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract"))
+
+
+class ProcessExtractionExecutor(PoolExtractionExecutor):
+    """Runs extraction in worker processes, sidestepping the GIL.
+
+    Workers are replaced after ``max_tasks_per_child`` documents to contain lxml memory growth.
+    """
+
+    def __init__(self, max_workers: int | None = None, max_tasks_per_child: int = 200):
+        super().__init__(
+            ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=max_tasks_per_child,
+            )
+        )
+
+
+def create_extraction_executor(mode: str, max_workers: int | None = None) -> ExtractionExecutor:
+    if mode == "inline":
+        return InlineExtractionExecutor()
+    if mode == "thread":
+        return ThreadExtractionExecutor(max_workers)
+    if mode == "process":
+        return ProcessExtractionExecutor(max_workers)
+    raise ValueError(f"unknown extraction mode: {mode}")
 
 
 class DefaultUrlInfoFetcher:
-    def __init__(self, analyzer: TextAnalyzer):
+    """``max_bytes`` switches on the streaming mode (requires ``transport``): the body is read up to
+    ``max_bytes``, non-HTML responses are rejected from their headers, and the page is parsed once.
+
+    ``executor`` moves single-pass extraction off the calling thread, e.g. into a process pool.
+
+    With ``near_duplicates``, a text near-identical to one analyzed before (a syndicated copy, an AMP variant,
+    a repost) reuses that analysis instead of calling the analyzer again.
+    """
+
+    def __init__(
+        self,
+        analyzer: TextAnalyzer,
+        transport: Transport | None = None,
+        max_bytes: int | None = None,
+        executor: ExtractionExecutor | None = None,
+        near_duplicates: NearDuplicateIndex | None = None,
+    ):
+        if max_bytes and transport is None:
+            raise ValueError("streaming fetch requires a transport")
         self._analyzer = analyzer
+        self._transport = transport
+        self._max_bytes = max_bytes
+        self._max_chars = getattr(analyzer, "max_chars", None)
+        self._executor = executor or (InlineExtractionExecutor() if max_bytes else None)
+        self._near_duplicates = near_duplicates
 
     def _build_url_info(self, url: str, meta: Document, text_info: TextInfo) -> UrlInfo:
-        return UrlInfo(url=url, title=meta.title, tags=text_info.tags, summary=text_info.summary, keywords=text_info.keywords)
+        return UrlInfo(
+            url=url, title=meta.title, tags=text_info.tags, summary=text_info.summary, keywords=text_info.keywords
+        )
+
+    def _download(self, url: str) -> str:
+        if self._transport is None:
+            import trafilatura
+
+            return trafilatura.fetch_url(url)
+        if self._max_bytes:
+            return self._stream(url)
+        response = self._transport.get(url)
+        response.raise_for_status()
+        return _decode(response.content)
+
+    def _stream(self, url: str) -> str:
+        # the same User-Agent trafilatura.fetch_url sends: some sites block the python-requests default
+        from trafilatura.downloads import DEFAULT_HEADERS
+
+        headers = {"User-Agent": DEFAULT_HEADERS["User-Agent"]}
+        with self._transport.get(url, stream=True, headers=headers) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type and content_type not in HTML_CONTENT_TYPES:
+                raise UnsupportedContentException(f"{url}: {content_type}")
+
+            body = bytearray()
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if not body and chunk.lstrip().startswith(b"%PDF"):
+                    raise UnsupportedContentException(f"{url}: pdf")
+                body += chunk
+                if len(body) >= self._max_bytes:
+                    break
+
+        return _decode(bytes(body[: self._max_bytes]))
+
+    def _extract(self, url: str, downloaded: str) -> Tuple[Document, str]:
+        if self._executor is None:
+            return _extract(downloaded)
+        return self._executor.extract(downloaded, url, self._max_chars)
 
     def get_info(self, url: str) -> UrlInfo | None:
-        try:
-            downloaded = trafilatura.fetch_url(url)
-        except Exception as e:
-            traceback.print_exc()
-            return UrlInfo(url=url, title="N/A", tags=[], summary="", keywords=[])
+        with tracing.span(f"fetch {type(self).__name__}") as span:
+            try:
+                with tracing.span("download") as download:
+                    downloaded = self._download(url)
+                    download.set(chars=len(downloaded or ""))
+            except Exception:
+                logger.exception("failed to download %s", url)
+                span.outcome = "download_failed"
+                return UrlInfo(url=url, title="N/A", tags=[], summary="", keywords=[])
 
-        meta: Document = trafilatura.extract_metadata(downloaded)
-        text: str = trafilatura.extract(downloaded)
+            with tracing.span("extract") as extract:
+                meta, text = self._extract(url, downloaded)
+                extract.set(chars=len(text or ""))
 
-        try:
-            text_info = self._analyzer.get_info(text)
-        except:
-            traceback.print_exc()
-            text_info = TextInfo.empty()
+            signature = None
+            if self._near_duplicates is not None:
+                with tracing.span("fingerprint") as fingerprint:
+                    signature = self._near_duplicates.signature(text)
+                    duplicate = self._near_duplicates.find(signature) if signature is not None else None
+                    fingerprint.set(duplicate_of=duplicate[0] if duplicate else None)
+                if duplicate is not None:
+                    logger.info("%s is a near-duplicate of %s", url, duplicate[0])
+                    return self._build_url_info(url, meta, duplicate[1])
 
-        return self._build_url_info(url, meta, text_info)
+            try:
+                text_info = self._analyzer.get_info(text)
+            except Exception:
+                logger.exception("failed to analyze %s", url)
+                span.outcome = "analyze_failed"
+                text_info = TextInfo.empty()
+            else:
+                if signature is not None:
+                    self._near_duplicates.add(url, signature, text_info)
+
+            return self._build_url_info(url, meta, text_info)
 
 
 class TgUrlInfoFetcher(DefaultUrlInfoFetcher):
+    hosts = frozenset({"t.me"})
+
     def get_info(self, url: str) -> UrlInfo | None:
         if not url.startswith("https://t.me"):
             return None
         return super().get_info(url)
 
+    def _download(self, url: str) -> str:
+        # a plain post link is a preview page; the embed variant has the whole post text
+        if parse_post_url(url) is not None and "embed=1" not in url:
+            url = url.split("?")[0] + "?embed=1&mode=tme"
+        return super()._download(url)
+
     def _build_url_info(self, url: str, meta: Document, text_info: TextInfo) -> UrlInfo:
-        return UrlInfo(url=url, title=text_info.title, tags=text_info.tags, summary=text_info.summary, keywords=text_info.keywords)
+        return UrlInfo(
+            url=url, title=text_info.title, tags=text_info.tags, summary=text_info.summary, keywords=text_info.keywords
+        )
+
+
+def _extract_video_id(url: str) -> str:
+    match = re.search(r"v=([-\w]+)", url)
+    if match:
+        return match.group(1)
+    else:
+        raise ValueError("Could not extract video ID from URL")
 
 
 class YTUrlInfoFetcher:
@@ -53,9 +310,18 @@ class YTUrlInfoFetcher:
     - В меню слева выберите «Credentials», затем «Create credentials» и «API key». Скопируйте полученный ключ.
     """
 
-    def __init__(self, api_key: str, analyzer: TextAnalyzer):
+    hosts = frozenset({"www.youtube.com"})
+
+    def __init__(
+        self,
+        api_key: str,
+        analyzer: TextAnalyzer,
+        transport: Transport | None = None,
+        batch_window: float | None = None,
+    ):
         self._analyzer = analyzer
-        self._client = build("youtube", "v3", developerKey=api_key)
+        self._client = LazyYouTubeClient(api_key, transport.httplib2() if transport else None)
+        self._batcher = YTVideoBatcher(self._client, batch_window) if batch_window is not None else None
 
     def get_info(self, url: str) -> UrlInfo | None:
         if not url.startswith("https://www.youtube.com"):
@@ -63,28 +329,107 @@ class YTUrlInfoFetcher:
         return self._get_info(url)
 
     def _extract_video_id(self, url: str) -> str:
-        match = re.search(r'v=([-\w]+)', url)
-        if match:
-            return match.group(1)
-        else:
-            raise ValueError('Could not extract video ID from URL')
+        return _extract_video_id(url)
+
+    def _get_video_item(self, video_id: str) -> dict:
+        if self._batcher is not None:
+            return self._batcher.get(video_id)
+        return self._client.videos().list(part=PART, id=video_id).execute()["items"][0]
 
     def _get_video_info(self, url: str) -> UrlInfo:
         video_id = self._extract_video_id(url)
-        video_response = self._client.videos().list(part="snippet,contentDetails,statistics", id=video_id).execute()
+        item = self._get_video_item(video_id)
 
         return UrlInfo(
             url=url,
-            title=video_response["items"][0]["snippet"]["title"],
-            summary=video_response["items"][0]["snippet"]["description"],
+            title=item["snippet"]["title"],
+            summary=item["snippet"]["description"],
             tags=[],
             keywords=[],
         )
 
     def _get_info(self, url: str) -> UrlInfo:
-        url_info = self._get_video_info(url)
-        text = f"{url_info.title}\n{url_info.summary}"
-        text_info = self._analyzer.get_info(text)
+        with tracing.span(f"fetch {type(self).__name__}"):
+            with tracing.span("youtube videos"):
+                url_info = self._get_video_info(url)
+            text = f"{url_info.title}\n{url_info.summary}"
+            text_info = self._analyzer.get_info(text)
+            url_info.tags = text_info.tags
+            url_info.keywords = text_info.keywords
+            return url_info
+
+
+class AsyncDefaultUrlInfoFetcher:
+    """Downloads pages with a shared ``httpx.AsyncClient``; extraction runs in the default executor."""
+
+    def __init__(self, analyzer: AsyncTextAnalyzer, client: httpx.AsyncClient | None = None):
+        import httpx
+
+        self._analyzer = analyzer
+        self._client = client or httpx.AsyncClient(timeout=30, follow_redirects=True)
+
+    def _build_url_info(self, url: str, meta: Document, text_info: TextInfo) -> UrlInfo:
+        return UrlInfo(
+            url=url, title=meta.title, tags=text_info.tags, summary=text_info.summary, keywords=text_info.keywords
+        )
+
+    async def _download(self, url: str) -> str:
+        response = await self._client.get(url)
+        response.raise_for_status()
+        return response.text
+
+    async def get_info(self, url: str) -> UrlInfo | None:
+        try:
+            downloaded = await self._download(url)
+        except Exception:
+            logger.exception("failed to download %s", url)
+            return UrlInfo(url=url, title="N/A", tags=[], summary="", keywords=[])
+
+        meta, text = await asyncio.to_thread(_extract, downloaded)
+
+        try:
+            text_info = await self._analyzer.get_info(text)
+        except Exception:
+            logger.exception("failed to analyze %s", url)
+            text_info = TextInfo.empty()
+
+        return self._build_url_info(url, meta, text_info)
+
+
+class AsyncTgUrlInfoFetcher(AsyncDefaultUrlInfoFetcher):
+    hosts = frozenset({"t.me"})
+
+    async def get_info(self, url: str) -> UrlInfo | None:
+        if not url.startswith("https://t.me"):
+            return None
+        return await super().get_info(url)
+
+    def _build_url_info(self, url: str, meta: Document, text_info: TextInfo) -> UrlInfo:
+        return UrlInfo(
+            url=url, title=text_info.title, tags=text_info.tags, summary=text_info.summary, keywords=text_info.keywords
+        )
+
+
+class AsyncYTUrlInfoFetcher:
+    """Async counterpart of ``YTUrlInfoFetcher``; the Google API client is blocking, so calls run in the executor."""
+
+    hosts = frozenset({"www.youtube.com"})
+
+    def __init__(self, api_key: str, analyzer: AsyncTextAnalyzer):
+        self._analyzer = analyzer
+        self._client = LazyYouTubeClient(api_key)
+
+    async def get_info(self, url: str) -> UrlInfo | None:
+        if not url.startswith("https://www.youtube.com"):
+            return None
+
+        video_id = _extract_video_id(url)
+        request = self._client.videos().list(part=PART, id=video_id)
+        video_response = await asyncio.to_thread(request.execute)
+        snippet = video_response["items"][0]["snippet"]
+
+        url_info = UrlInfo(url=url, title=snippet["title"], summary=snippet["description"], tags=[], keywords=[])
+        text_info = await self._analyzer.get_info(f"{url_info.title}\n{url_info.summary}")
         url_info.tags = text_info.tags
         url_info.keywords = text_info.keywords
         return url_info
@@ -0,0 +1,35 @@
+from typing import Iterator
+
+import httpx
+import requests
+
+from .transport import _HOP_HEADERS, Transport
+
+
+class _ResponseStream(httpx.SyncByteStream):
+    def __init__(self, response: requests.Response):
+        self._response = response
+
+    def __iter__(self) -> Iterator[bytes]:
+        # chunk_size=None hands over data as it arrives, so server-sent events are not held back
+        yield from self._response.iter_content(chunk_size=None)
+
+    def close(self):
+        self._response.close()
+
+
+class HttpxTransport(httpx.BaseTransport):
+    """Routes an ``httpx.Client`` (Notion, OpenAI) through a ``Transport``.
+
+    Bodies are streamed, so a streaming client sees each chunk as soon as it arrives.
+    """
+
+    def __init__(self, transport: Transport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self._transport.request(
+            request.method, str(request.url), headers=dict(request.headers), data=request.read(), stream=True
+        )
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _HOP_HEADERS]
+        return httpx.Response(response.status_code, headers=headers, stream=_ResponseStream(response), request=request)
@@ -0,0 +1,204 @@
+import dataclasses
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, List, Set
+
+from .core import UrlInfo
+
+logger = logging.getLogger(__name__)
+
+
+class Stage(Enum):
+    ACCEPTED = "accepted"
+    ANALYZED = "analyzed"
+    STORED = "stored"
+    FAILED = "failed"
+
+
+@dataclass
+class JournalEntry:
+    id: int
+    url: str
+    stage: Stage
+    info: UrlInfo | None = None
+    attempts: int = 0
+
+
+class Journal:
+    """Append-only, fsynced log of every accepted URL and its progress through the pipeline.
+
+    Each transition is one JSON line. Appends wait until their line is on disk, but concurrent appends share
+    a single ``fsync`` (group commit): a background thread writes everything queued since its last flush,
+    syncs once and wakes all the writers. On open the log is replayed, a torn last line is ignored, and the
+    file is compacted down to the entries that are not stored yet.
+
+    An entry is run by whoever ``claim``s it first, so a URL sent again while replay is catching up is not handled
+    twice. Claims live in memory only: after a restart nothing is in progress.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3, flush_delay: float = 0.0):
+        self._path = path
+        self._max_attempts = max_attempts
+        self._flush_delay = flush_delay
+        self._entries: Dict[int, JournalEntry] = {}
+        self._open_urls: Dict[str, int] = {}
+        self._claimed: Set[int] = set()
+        self._next_id = 1
+        self._cond = threading.Condition()
+        self._load()
+        self._compact()
+
+        self._file = open(path, "a", encoding="utf-8")
+        self._pending: List[str] = []
+        self._appended = 0
+        self._flushed = 0
+        self._closed = False
+        self.syncs = 0
+        self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def accept(self, url: str) -> JournalEntry:
+        """The open entry of ``url``, or a new one; only the new one is written."""
+        with self._cond:
+            entry_id = self._open_urls.get(url)
+            if entry_id is not None:
+                return self._entries[entry_id]
+            entry = JournalEntry(id=self._next_id, url=url, stage=Stage.ACCEPTED)
+            self._next_id += 1
+            self._entries[entry.id] = entry
+            self._open_urls[url] = entry.id
+        self._append(entry, {})
+        return entry
+
+    def claim(self, entry: JournalEntry) -> bool:
+        """Marks ``entry`` in progress; ``False`` if it already is, or is stored by now."""
+        with self._cond:
+            if entry.id in self._claimed or entry.id not in self._entries:
+                return False
+            self._claimed.add(entry.id)
+            return True
+
+    def release(self, entry: JournalEntry):
+        with self._cond:
+            self._claimed.discard(entry.id)
+
+    def analyzed(self, entry: JournalEntry, info: UrlInfo):
+        entry.stage, entry.info = Stage.ANALYZED, info
+        self._append(entry, {"info": dataclasses.asdict(info)})
+
+    def stored(self, entry: JournalEntry):
+        with self._cond:
+            self._entries.pop(entry.id, None)
+            if self._open_urls.get(entry.url) == entry.id:
+                del self._open_urls[entry.url]
+        entry.stage = Stage.STORED
+        self._append(entry, {})
+
+    def failed(self, entry: JournalEntry, error: Exception):
+        """Counts a failed attempt; after ``max_attempts`` the entry is given up on and not replayed again."""
+        entry.attempts += 1
+        self._append(entry, {"stage": Stage.FAILED.value, "attempts": entry.attempts, "error": repr(error)})
+        if entry.attempts >= self._max_attempts:
+            logger.error("giving up on %s after %s attempts", entry.url, entry.attempts)
+            self.stored(entry)
+
+    def unfinished(self) -> List[JournalEntry]:
+        """Entries to replay, oldest first."""
+        with self._cond:
+            return sorted(self._entries.values(), key=lambda entry: entry.id)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._file.close()
+
+    def _append(self, entry: JournalEntry, extra: dict):
+        record = {"id": entry.id, "url": entry.url, "stage": entry.stage.value, "t": time.time(), **extra}
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("journal is closed")
+            self._pending.append(line)
+            self._appended += 1
+            ticket = self._appended
+            self._cond.notify_all()
+            while self._flushed < ticket:
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+            if self._flush_delay:
+                time.sleep(self._flush_delay)
+            with self._cond:
+                lines, self._pending = self._pending, []
+                ticket = self._appended
+            self._file.write("".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            with self._cond:
+                self.syncs += 1
+                self._flushed = ticket
+                self._cond.notify_all()
+
+    def _load(self):
+        if not os.path.exists(self._path):
+            return
+        with open(self._path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("skipping a torn journal line")
+                    continue
+                self._apply(record)
+
+    def _apply(self, record: dict):
+        entry_id, stage = record["id"], Stage(record["stage"])
+        self._next_id = max(self._next_id, entry_id + 1)
+        if stage == Stage.STORED:
+            entry = self._entries.pop(entry_id, None)
+            if entry is not None and self._open_urls.get(entry.url) == entry_id:
+                del self._open_urls[entry.url]
+            return
+
+        entry = self._entries.get(entry_id)
+        if entry is None:
+            entry = self._entries[entry_id] = JournalEntry(id=entry_id, url=record["url"], stage=Stage.ACCEPTED)
+            self._open_urls[entry.url] = entry_id
+        if stage != Stage.FAILED:
+            entry.stage = stage
+        entry.attempts = record.get("attempts", entry.attempts)
+        if record.get("info"):
+            entry.info = UrlInfo(**record["info"])
+
+    def _compact(self):
+        tmp = f"{self._path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self.unfinished():
+                record = {"id": entry.id, "url": entry.url, "stage": entry.stage.value, "attempts": entry.attempts}
+                if entry.info is not None:
+                    record["info"] = dataclasses.asdict(entry.info)
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path)
+        directory = os.open(os.path.dirname(os.path.abspath(self._path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
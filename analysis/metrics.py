@@ -0,0 +1,95 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Bucketed latency histogram (seconds), safe to share between threads."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def cumulative(self) -> List[int]:
+        with self._lock:
+            counts = list(self._counts)
+        result, total = [], 0
+        for c in counts:
+            total += c
+            result.append(total)
+        return result
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket containing the q-quantile (0 < q <= 1)."""
+        cumulative = self.cumulative()
+        total = cumulative[-1]
+        if total == 0:
+            return 0.0
+        rank = q * total
+        for idx, value in enumerate(cumulative):
+            if value >= rank:
+                return self.buckets[idx] if idx < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        count = self._count
+        return {
+            "count": count,
+            "avg": self._sum / count if count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class StageMetrics:
+    """Named latency histograms, one per pipeline stage."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._stages: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> Histogram:
+        with self._lock:
+            if stage not in self._stages:
+                self._stages[stage] = Histogram(self._buckets)
+            return self._stages[stage]
+
+    def observe(self, stage: str, seconds: float):
+        self.histogram(stage).observe(seconds)
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            stages = dict(self._stages)
+        return {name: hist.snapshot() for name, hist in sorted(stages.items())}
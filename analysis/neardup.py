@@ -0,0 +1,152 @@
+import dataclasses
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import List, Tuple
+
+import numpy as np
+
+from .core import TextInfo
+
+# a prime just below 2**32: shingle hashes are 32-bit and the coefficients 31-bit, so ``a * x + b`` fits in uint64
+_PRIME = np.uint64(4294967291)
+_MASK = np.uint64(0xFFFFFFFF)
+_WORD = re.compile(r"\w+")
+# shingles hashed per block, so long texts do not allocate a (shingles x permutations) matrix at once
+_BLOCK = 2048
+
+
+def shingle_hashes(text: str, size: int = 5) -> np.ndarray:
+    """Unique 32-bit hashes of the ``size``-word shingles of ``text``."""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return np.empty(0, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(word.encode()) for word in words), dtype=np.uint64, count=len(words))
+    count = len(words) - size + 1
+    shingles = np.zeros(count, dtype=np.uint64)
+    for i in range(size):
+        shingles = (shingles * np.uint64(1000003) + hashes[i : i + count]) & _MASK
+    return np.unique(shingles)
+
+
+class MinHasher:
+    """MinHash signatures with ``num_perm`` universal hash functions ``(a * x + b) mod p``, computed with NumPy."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.integers(1, 2**31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2**31, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray | None:
+        """``None`` for texts shorter than one shingle."""
+        shingles = shingle_hashes(text, self.shingle_size)
+        if not len(shingles):
+            return None
+        signature = np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        for start in range(0, len(shingles), _BLOCK):
+            block = shingles[start : start + _BLOCK, None]
+            np.minimum(signature, ((block * self._a + self._b) % _PRIME).min(axis=0), out=signature)
+        return signature
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(a == b))
+
+
+class NearDuplicateIndex:
+    """Analyses of previously seen texts, looked up by MinHash similarity through an SQLite-backed LSH index.
+
+    Signatures are split into ``bands`` bands; texts sharing any band are candidates, and a candidate is a
+    near-duplicate if its estimated Jaccard similarity is at least ``threshold``. Texts under ``min_words`` words
+    (error pages, cookie walls) are never matched.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = 0.85,
+        bands: int = 16,
+        min_words: int = 50,
+        hasher: MinHasher | None = None,
+    ):
+        self._hasher = hasher or MinHasher()
+        if self._hasher.num_perm % bands:
+            raise ValueError("the number of permutations must be a multiple of bands")
+        self._threshold = threshold
+        self._bands = bands
+        self._rows = self._hasher.num_perm // bands
+        self._min_words = min_words
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "id INTEGER PRIMARY KEY, url TEXT NOT NULL, signature BLOB NOT NULL, info TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands ("
+                "band INTEGER NOT NULL, key BLOB NOT NULL, document_id INTEGER NOT NULL, "
+                "PRIMARY KEY (band, key, document_id)) WITHOUT ROWID"
+            )
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def signature(self, text: str | None) -> np.ndarray | None:
+        if not text or len(_WORD.findall(text)) < self._min_words:
+            return None
+        return self._hasher.signature(text)
+
+    def find(self, signature: np.ndarray) -> Tuple[str, TextInfo] | None:
+        """``(url, info)`` of the most similar indexed text, if it is similar enough."""
+        keys = self._band_keys(signature)
+        values = ", ".join("(?, ?)" for _ in keys)
+        with self._lock:
+            candidates = self._conn.execute(
+                "SELECT DISTINCT documents.id, documents.url, documents.signature, documents.info "
+                "FROM bands JOIN documents ON documents.id = bands.document_id "
+                f"WHERE (bands.band, bands.key) IN (VALUES {values})",
+                [value for key in keys for value in key],
+            ).fetchall()
+
+        best, best_similarity = None, self._threshold
+        for _, url, blob, info in candidates:
+            score = similarity(signature, np.frombuffer(blob, dtype=np.uint64))
+            if score >= best_similarity:
+                best, best_similarity = (url, TextInfo(**json.loads(info))), score
+
+        if best is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return best
+
+    def add(self, url: str, signature: np.ndarray, info: TextInfo):
+        value = json.dumps(dataclasses.asdict(info), ensure_ascii=False)
+        with self._lock, self._conn:
+            document_id = self._conn.execute(
+                "INSERT INTO documents (url, signature, info, created_at) VALUES (?, ?, ?, ?)",
+                (url, signature.astype(np.uint64).tobytes(), value, time.time()),
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO bands (band, key, document_id) VALUES (?, ?, ?)",
+                [(band, key, document_id) for band, key in self._band_keys(signature)],
+            )
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        rows = signature.astype(np.uint64).reshape(self._bands, self._rows)
+        return [(band, hashlib.blake2b(row.tobytes(), digest_size=8).digest()) for band, row in enumerate(rows)]
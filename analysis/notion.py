@@ -1,25 +1,169 @@
-from notion_client import Client as NotionClient
+import json
+from typing import AsyncIterator, Iterator, List, Tuple
+
+from . import tracing
 from .core import UrlInfo
+from .transport import Transport
+
+# marks the blocks this store writes, so an update replaces them and leaves the user's own notes alone
+GENERATED_COLOR = "gray"
+
+
+def _paragraph(text: str) -> dict:
+    rich_text = [{"text": {"content": text}, "annotations": {"color": GENERATED_COLOR}}]
+    return {"object": "block", "paragraph": {"rich_text": rich_text}}
+
+
+def _children(info: UrlInfo) -> list:
+    return [_paragraph(info.summary), _paragraph(", ".join(info.keywords))]
+
+
+def _is_generated(block: dict) -> bool:
+    rich_text = block.get("paragraph", {}).get("rich_text")
+    return bool(rich_text) and all(part.get("annotations", {}).get("color") == GENERATED_COLOR for part in rich_text)
+
+
+def _plan_update(blocks: List[dict], children: list) -> Tuple[list, list, list, str | None]:
+    """``(updates, deletes, appends, after)``: generated blocks are rewritten in place, extra ones deleted and
+    missing ones appended after the last generated block."""
+    generated = [block["id"] for block in blocks if _is_generated(block)]
+    updates = list(zip(generated, children))
+    deletes = generated[len(children) :]
+    appends = children[len(generated) :]
+    return updates, deletes, appends, generated[-1] if generated else None
+
+
+def _page_params(database_id: str, info: UrlInfo) -> dict:
+    return {
+        "parent": {"type": "database_id", "database_id": database_id},
+        "properties": {
+            "Name": {"title": [{"text": {"content": info.title}}]},
+            "URL": {"url": info.url},
+            "Tags": {"multi_select": [{"name": tag} for tag in info.tags]},
+            "List": {"select": {"name": "Inbox"}},
+        },
+        "children": _children(info),
+    }
+
+
+def _update_properties(info: UrlInfo) -> dict:
+    return {
+        "Name": {"title": [{"text": {"content": info.title}}]},
+        "Tags": {"multi_select": [{"name": tag} for tag in info.tags]},
+    }
+
+
+def _size(payload) -> int:
+    return len(json.dumps(payload, ensure_ascii=False).encode())
 
 
 class NotionUrlInfoStore:
+    def __init__(self, auth: str, database_id: str, transport: Transport | None = None, base_url: str | None = None):
+        # imported here: notion_client loads httpx, which is a large part of the bot's start-up time
+        from notion_client import Client as NotionClient
+
+        self._database_id = database_id
+        options = {"base_url": base_url} if base_url else {}
+        self._client = NotionClient(auth=auth, client=transport.httpx_client() if transport else None, **options)
+
+    def create_page(self, info: UrlInfo) -> str:
+        params = _page_params(self._database_id, info)
+        with tracing.span("notion create_page", bytes=_size(params)):
+            return self._client.pages.create(**params)["id"]
+
+    def update_page(self, page_id: str, info: UrlInfo):
+        with tracing.span("notion update_page", bytes=_size(_children(info))):
+            self._client.pages.update(page_id=page_id, properties=_update_properties(info))
+
+            updates, deletes, appends, after = _plan_update(list(self._list_children(page_id)), _children(info))
+            for block_id, child in updates:
+                self._client.blocks.update(block_id=block_id, paragraph=child["paragraph"])
+            for block_id in deletes:
+                self._client.blocks.delete(block_id=block_id)
+            if appends:
+                options = {"after": after} if after else {}
+                self._client.blocks.children.append(block_id=page_id, children=appends, **options)
+
+    def _list_children(self, block_id: str) -> Iterator[dict]:
+        cursor = None
+        while True:
+            params = {"block_id": block_id, "page_size": 100}
+            if cursor:
+                params["start_cursor"] = cursor
+            response = self._client.blocks.children.list(**params)
+            yield from response["results"]
+            if not response.get("has_more"):
+                return
+            cursor = response["next_cursor"]
+
+    def tag_names(self) -> List[str]:
+        """Options of the "Tags" multi-select, i.e. every tag the database has."""
+        database = self._client.databases.retrieve(database_id=self._database_id)
+        return [option["name"] for option in database["properties"]["Tags"]["multi_select"]["options"]]
+
+    def iter_pages(self, page_size: int = 100) -> Iterator[Tuple[str, str]]:
+        """Yields ``(url, page_id)`` for every page in the database."""
+        for page in self._query_pages(page_size):
+            yield page["properties"]["URL"]["url"], page["id"]
+
+    def iter_infos(self, page_size: int = 100) -> Iterator[Tuple[UrlInfo, str]]:
+        """Yields ``(info, page_id)`` for every page; only the title, URL and tags, which live in properties."""
+        for page in self._query_pages(page_size):
+            properties = page["properties"]
+            info = UrlInfo(
+                title="".join(part["plain_text"] for part in properties["Name"]["title"]),
+                url=properties["URL"]["url"],
+                tags=[tag["name"] for tag in properties["Tags"]["multi_select"]],
+                summary="",
+                keywords=[],
+            )
+            yield info, page["id"]
+
+    def _query_pages(self, page_size: int) -> Iterator[dict]:
+        cursor = None
+        while True:
+            params = {"database_id": self._database_id, "page_size": page_size}
+            if cursor:
+                params["start_cursor"] = cursor
+            response = self._client.databases.query(**params)
+            yield from response["results"]
+            if not response.get("has_more"):
+                return
+            cursor = response["next_cursor"]
+
+
+class AsyncNotionUrlInfoStore:
     def __init__(self, auth: str, database_id: str):
+        from notion_client import AsyncClient as AsyncNotionClient
+
         self._database_id = database_id
-        self._client = NotionClient(auth=auth)
-
-    def create_page(self, info: UrlInfo):
-        params = {
-            "parent": {"type": "database_id", "database_id": self._database_id},
-            "properties": {
-                "Name": {"title": [{"text": {"content": info.title}}]},
-                "URL": {"url": info.url},
-                "Tags": {"multi_select": [{"name": tag} for tag in info.tags]},
-                "List": {"select": {"name": "Inbox"}},
-            },
-            "children": [
-                {"object": "block", "paragraph": {"rich_text": [{"text": {"content": info.summary}}]}},
-                {"object": "block", "paragraph": {"rich_text": [{"text": {"content": ", ".join(info.keywords)}}]}},
-            ],
-        }
-
-        self._client.pages.create(**params)
+        self._client = AsyncNotionClient(auth=auth)
+
+    async def create_page(self, info: UrlInfo) -> str:
+        return (await self._client.pages.create(**_page_params(self._database_id, info)))["id"]
+
+    async def update_page(self, page_id: str, info: UrlInfo):
+        await self._client.pages.update(page_id=page_id, properties=_update_properties(info))
+
+        blocks = [block async for block in self._list_children(page_id)]
+        updates, deletes, appends, after = _plan_update(blocks, _children(info))
+        for block_id, child in updates:
+            await self._client.blocks.update(block_id=block_id, paragraph=child["paragraph"])
+        for block_id in deletes:
+            await self._client.blocks.delete(block_id=block_id)
+        if appends:
+            options = {"after": after} if after else {}
+            await self._client.blocks.children.append(block_id=page_id, children=appends, **options)
+
+    async def _list_children(self, block_id: str) -> AsyncIterator[dict]:
+        cursor = None
+        while True:
+            params = {"block_id": block_id, "page_size": 100}
+            if cursor:
+                params["start_cursor"] = cursor
+            response = await self._client.blocks.children.list(**params)
+            for block in response["results"]:
+                yield block
+            if not response.get("has_more"):
+                return
+            cursor = response["next_cursor"]
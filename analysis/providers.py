@@ -0,0 +1,198 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List
+
+from .core import TextAnalyzer, TextInfo
+from .metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class NoProviderAvailableException(Exception):
+    pass
+
+
+class Provider:
+    """A ``TextAnalyzer`` with a concurrency limit and the latency / error stats the pool routes by."""
+
+    def __init__(self, name: str, analyzer: TextAnalyzer, max_concurrency: int = 4, decay: float = 0.2):
+        self.name = name
+        self.analyzer = analyzer
+        self.max_concurrency = max_concurrency
+        self._decay = decay
+        self._lock = threading.Lock()
+        self.latency = Histogram()
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.avg_latency = 0.0
+        self.error_rate = 0.0
+        # set by the pool; notified whenever a slot frees up
+        self.released: threading.Condition | None = None
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.max_concurrency:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        if self.released is not None:
+            with self.released:
+                self.released.notify_all()
+
+    def score(self) -> float:
+        """Lower is better: average latency, penalised by the recent error rate."""
+        return self.avg_latency * (1 + 10 * self.error_rate)
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self.calls += 1
+            self.latency.observe(seconds)
+            self.avg_latency += self._decay * (seconds - self.avg_latency) if self.avg_latency else seconds
+            if not ok:
+                self.errors += 1
+            self.error_rate += self._decay * ((0.0 if ok else 1.0) - self.error_rate)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+            self.error_rate += self._decay * (1.0 - self.error_rate)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "error_rate": round(self.error_rate, 3),
+            "avg_latency": round(self.avg_latency, 3),
+            **{k: v for k, v in self.latency.snapshot().items() if k.startswith("p")},
+        }
+
+
+class AnalyzerPool:
+    """Spreads ``get_info`` calls over several providers.
+
+    Each call goes to the provider with the best ``Provider.score`` that is below its concurrency limit.
+    Errors and calls slower than ``timeout`` fail over to the next provider (a timed-out call keeps running in
+    the background and its result is dropped). With ``hedge`` a second provider is also started once the first
+    one has run longer than its ``hedge_quantile`` latency (at least ``min_hedge_delay``); the first answer wins.
+    """
+
+    def __init__(
+        self,
+        providers: List[Provider],
+        timeout: float = 60.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        min_hedge_delay: float = 1.0,
+        max_workers: int = 16,
+    ):
+        if not providers:
+            raise ValueError("at least one provider is required")
+        self.providers = providers
+        self._timeout = timeout
+        self._hedge = hedge
+        self._hedge_quantile = hedge_quantile
+        self._min_hedge_delay = min_hedge_delay
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analyzer")
+        self._released = threading.Condition()
+        for provider in providers:
+            provider.released = self._released
+        self.hedged = 0
+        self.failovers = 0
+        self.model_id = "+".join(str(getattr(p.analyzer, "model_id", p.name)) for p in providers)
+        self.prompt_version = "+".join(str(getattr(p.analyzer, "prompt_version", "")) for p in providers)
+        limits = [getattr(p.analyzer, "max_chars", None) for p in providers]
+        self.max_chars = None if None in limits else max(limits)
+
+    def get_info(self, text: str) -> TextInfo:
+        remaining = sorted(self.providers, key=Provider.score)
+        pending: Dict[Future, tuple] = {}
+        error: Exception | None = None
+
+        while remaining or pending:
+            if not pending:
+                if error is not None:
+                    self.failovers += 1
+                self._launch(remaining, pending, text, block=True)
+
+            now = time.monotonic()
+            deadline = min(started + self._timeout for _, started in pending.values())
+            hedge_at = None
+            if self._hedge and remaining and len(pending) == 1:
+                provider, started = next(iter(pending.values()))
+                hedge_at = started + self._hedge_delay(provider)
+
+            done, _ = wait(
+                pending, timeout=max(0.0, min(deadline, hedge_at or deadline) - now), return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+
+            now = time.monotonic()
+            for future, (provider, started) in list(pending.items()):
+                if now - started >= self._timeout:
+                    logger.warning("analyzer %s timed out", provider.name)
+                    provider.record_timeout()
+                    pending.pop(future)
+                    error = TimeoutError(provider.name)
+
+            if hedge_at is not None and pending and not done and now >= hedge_at and remaining:
+                if self._launch(remaining, pending, text, block=False):
+                    self.hedged += 1
+
+        raise error or NoProviderAvailableException()
+
+    def stats(self) -> dict:
+        return {
+            "hedged": self.hedged,
+            "failovers": self.failovers,
+            "providers": {p.name: p.stats() for p in self.providers},
+        }
+
+    def _hedge_delay(self, provider: Provider) -> float:
+        return max(self._min_hedge_delay, provider.latency.percentile(self._hedge_quantile))
+
+    def _launch(self, remaining: List[Provider], pending: Dict[Future, tuple], text: str, block: bool) -> bool:
+        """Starts the best remaining provider with a free slot; with ``block`` waits up to ``timeout`` for a slot if
+        none is free, then raises ``NoProviderAvailableException``."""
+        deadline = time.monotonic() + self._timeout
+        with self._released:
+            while True:
+                for provider in remaining:
+                    if provider.try_acquire():
+                        remaining.remove(provider)
+                        pending[self._pool.submit(self._call, provider, text)] = (provider, time.monotonic())
+                        return True
+                if not block:
+                    return False
+                wait_for = deadline - time.monotonic()
+                if wait_for <= 0:
+                    raise NoProviderAvailableException("every provider is at its concurrency limit")
+                self._released.wait(wait_for)
+
+    def _call(self, provider: Provider, text: str) -> TextInfo:
+        start = time.perf_counter()
+        try:
+            info = provider.analyzer.get_info(text)
+        except Exception:
+            provider.record(time.perf_counter() - start, ok=False)
+            logger.exception("analyzer %s failed", provider.name)
+            raise
+        else:
+            provider.record(time.perf_counter() - start, ok=True)
+            return info
+        finally:
+            provider.release()
@@ -0,0 +1,144 @@
+import logging
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import List
+
+from .breaker import NegativeCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetryItem:
+    url: str
+    page_id: str | None
+    attempts: int
+
+
+class RetryQueue:
+    """SQLite-backed set of URLs whose fetch failed, each with the time of its next attempt.
+
+    Attempt ``n`` is scheduled ``base_delay * 2**n`` seconds (jittered, capped at ``max_delay``) after the
+    previous one; after ``max_attempts`` the URL is dropped and its placeholder page stays as it is.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        base_delay: float = 60.0,
+        max_delay: float = 6 * 3600.0,
+        max_attempts: int = 8,
+        clock=time.time,
+    ):
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._max_attempts = max_attempts
+        self._clock = clock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS retry ("
+                "url TEXT PRIMARY KEY, page_id TEXT, attempts INTEGER NOT NULL, next_at REAL NOT NULL)"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM retry").fetchone()[0]
+
+    def put(self, url: str, page_id: str | None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO retry (url, page_id, attempts, next_at) VALUES (?, ?, 0, ?) "
+                "ON CONFLICT(url) DO UPDATE SET page_id = COALESCE(excluded.page_id, page_id)",
+                (url, page_id, self._clock() + self._delay(0)),
+            )
+
+    def set_page_id(self, url: str, page_id: str):
+        """Records the page of a placeholder that was written after the URL was queued (e.g. through an outbox)."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE retry SET page_id = ? WHERE url = ? AND page_id IS NULL", (page_id, url))
+
+    def due(self, limit: int = 100) -> List[RetryItem]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, page_id, attempts FROM retry WHERE next_at <= ? ORDER BY next_at LIMIT ?",
+                (self._clock(), limit),
+            ).fetchall()
+        return [RetryItem(*row) for row in rows]
+
+    def remove(self, item: RetryItem):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM retry WHERE url = ?", (item.url,))
+
+    def reschedule(self, item: RetryItem) -> bool:
+        """Schedules the next attempt; returns ``False`` (and drops the item) once attempts are exhausted."""
+        attempts = item.attempts + 1
+        if attempts >= self._max_attempts:
+            self.remove(item)
+            return False
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE retry SET attempts = ?, next_at = ? WHERE url = ?",
+                (attempts, self._clock() + self._delay(attempts), item.url),
+            )
+        return True
+
+    def _delay(self, attempt: int) -> float:
+        delay = min(self._max_delay, self._base_delay * 2**attempt)
+        return random.uniform(delay / 2, delay)
+
+
+class RetryWorker:
+    """Periodically re-fetches due URLs through ``UrlHandler.retry`` and upgrades their placeholder pages.
+
+    A retried URL is dropped from ``negative`` first: the queue's backoff decides when to try again.
+    """
+
+    def __init__(self, handler, queue: RetryQueue, negative: NegativeCache | None = None, interval: float = 30.0):
+        self._handler = handler
+        self._queue = queue
+        self._negative = negative
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.upgraded = 0
+        self.dropped = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="retry", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+
+    def stats(self) -> dict:
+        return {"pending": len(self._queue), "upgraded": self.upgraded, "dropped": self.dropped}
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self.run_once()
+            self._stopped.wait(self._interval)
+
+    def run_once(self) -> int:
+        items = self._queue.due()
+        for item in items:
+            if self._negative is not None:
+                self._negative.remove(item.url)
+            try:
+                upgraded = self._handler.retry(item.url, item.page_id)
+            except Exception as e:
+                logger.info("retry of %s failed: %s", item.url, e)
+                upgraded = False
+
+            if upgraded:
+                self._queue.remove(item)
+                self.upgraded += 1
+            elif not self._queue.reschedule(item):
+                self.dropped += 1
+        return len(items)
@@ -0,0 +1,181 @@
+import logging
+import re
+import sqlite3
+import threading
+from typing import Iterable, List, Tuple
+
+from .core import UrlInfo, UrlInfoStore
+from .dedup import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS links (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    original_url TEXT NOT NULL,
+    page_id TEXT,
+    title TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS links_fts USING fts5(
+    title, tags, keywords, summary, url,
+    content='links', content_rowid='id',
+    tokenize='porter unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS links_ai AFTER INSERT ON links BEGIN
+    INSERT INTO links_fts (rowid, title, tags, keywords, summary, url)
+    VALUES (new.id, new.title, new.tags, new.keywords, new.summary, new.original_url);
+END;
+CREATE TRIGGER IF NOT EXISTS links_ad AFTER DELETE ON links BEGIN
+    INSERT INTO links_fts (links_fts, rowid, title, tags, keywords, summary, url)
+    VALUES ('delete', old.id, old.title, old.tags, old.keywords, old.summary, old.original_url);
+END;
+CREATE TRIGGER IF NOT EXISTS links_au AFTER UPDATE ON links BEGIN
+    INSERT INTO links_fts (links_fts, rowid, title, tags, keywords, summary, url)
+    VALUES ('delete', old.id, old.title, old.tags, old.keywords, old.summary, old.original_url);
+    INSERT INTO links_fts (rowid, title, tags, keywords, summary, url)
+    VALUES (new.id, new.title, new.tags, new.keywords, new.summary, new.original_url);
+END;
+"""
+
+_UPSERT = (
+    "INSERT INTO links (url, original_url, page_id, title, tags, keywords, summary) VALUES (?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(url) DO UPDATE SET original_url = excluded.original_url, "
+    "page_id = COALESCE(excluded.page_id, page_id), title = excluded.title, tags = excluded.tags, "
+    "keywords = excluded.keywords, summary = excluded.summary"
+)
+
+# title and tags weigh more than keywords, the summary and the url
+_RANK = "bm25(links_fts, 10.0, 5.0, 3.0, 1.0, 1.0)"
+_TERM = re.compile(r"(#?)(\w+)(\*?)")
+_SEP = "\x1f"
+
+
+def match_query(text: str) -> str:
+    """FTS5 query for free-form user input: every word must match, ``#word`` only in tags, ``word*`` as a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation in the input cannot produce a syntax error.
+    """
+    terms = []
+    for tag, word, prefix in _TERM.findall(text):
+        term = f'"{word}"{prefix and "*"}'
+        terms.append(f"tags:{term}" if tag else term)
+    return " ".join(terms)
+
+
+def _row(info: UrlInfo, page_id: str | None) -> tuple:
+    return (
+        canonicalize_url(info.url),
+        info.url,
+        page_id,
+        info.title,
+        _SEP.join(info.tags),
+        _SEP.join(info.keywords),
+        info.summary,
+    )
+
+
+def _split(value: str) -> List[str]:
+    return value.split(_SEP) if value else []
+
+
+class SearchIndex:
+    """Local full-text mirror of saved links in SQLite FTS5.
+
+    Implements ``UrlInfoStore`` so it can sit next to Notion in a ``FanOutUrlInfoStore``. Links are keyed by
+    their canonical URL, so saving a link again replaces its entry whatever page id it was given.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+
+    def create_page(self, info: UrlInfo) -> str:
+        self.add(info)
+        return canonicalize_url(info.url)
+
+    def update_page(self, page_id: str, info: UrlInfo):
+        self.add(info, page_id)
+
+    def add(self, info: UrlInfo, page_id: str | None = None):
+        with self._lock, self._conn:
+            self._conn.execute(_UPSERT, _row(info, page_id))
+
+    def bootstrap(self, pages: Iterable[Tuple[UrlInfo, str]], batch_size: int = 1000) -> int:
+        """Bulk-load ``(info, page_id)`` pairs, e.g. from ``NotionUrlInfoStore.iter_infos``."""
+        count = 0
+        batch = []
+        for info, page_id in pages:
+            if not info.url:
+                continue
+            batch.append(_row(info, page_id))
+            if len(batch) >= batch_size:
+                count += self._insert(batch)
+                batch = []
+        if batch:
+            count += self._insert(batch)
+        return count
+
+    def _insert(self, batch) -> int:
+        with self._lock, self._conn:
+            self._conn.executemany(_UPSERT, batch)
+        return len(batch)
+
+    def search(self, text: str, limit: int = 10) -> List[UrlInfo]:
+        """Best matches for ``text`` first; an empty list for input without any words."""
+        query = match_query(text)
+        if not query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT links.original_url, links.title, links.tags, links.keywords, links.summary "
+                "FROM links_fts JOIN links ON links.id = links_fts.rowid "
+                f"WHERE links_fts MATCH ? ORDER BY {_RANK} LIMIT ?",
+                (query, limit),
+            ).fetchall()
+        return [
+            UrlInfo(url=url, title=title, tags=_split(tags), keywords=_split(keywords), summary=summary)
+            for url, title, tags, keywords, summary in rows
+        ]
+
+
+class FanOutUrlInfoStore:
+    """Writes to ``primary`` and then to every mirror.
+
+    Mirrors are keyed by URL (like ``SearchIndex``): they are passed the primary's page id, which is also what
+    callers get back. A failing mirror is logged and does not fail the write.
+    """
+
+    def __init__(self, primary: UrlInfoStore, mirrors: List[UrlInfoStore]):
+        self._primary = primary
+        self._mirrors = mirrors
+
+    def create_page(self, info: UrlInfo) -> str | None:
+        page_id = self._primary.create_page(info)
+        for mirror in self._mirrors:
+            try:
+                if page_id is not None:
+                    mirror.update_page(page_id, info)
+                else:
+                    mirror.create_page(info)
+            except Exception:
+                logger.exception("failed to mirror %s", info.url)
+        return page_id
+
+    def update_page(self, page_id: str, info: UrlInfo):
+        self._primary.update_page(page_id, info)
+        for mirror in self._mirrors:
+            try:
+                mirror.update_page(page_id, info)
+            except Exception:
+                logger.exception("failed to mirror %s", info.url)
@@ -0,0 +1,132 @@
+import json
+import logging
+from typing import Callable, Iterable
+
+from .core import TextInfo
+
+logger = logging.getLogger(__name__)
+
+_FIELDS = {"title": str, "summary": str, "tags": list, "keywords": list}
+_FENCES = ("```json", "```")
+
+
+class MalformedResponseException(Exception):
+    pass
+
+
+def _is_preamble(text: str) -> bool:
+    """Whitespace and a markdown code fence (possibly still being streamed) may precede the object."""
+    text = text.strip()
+    return any(fence.startswith(text) or text.startswith(fence) and not text[len(fence) :].strip() for fence in _FENCES)
+
+
+class IncrementalJsonParser:
+    """Parses a ``TextInfo`` JSON object from a stream of text pieces.
+
+    Each top-level field is validated as soon as its value is closed, so an off-format answer is rejected
+    without waiting for the rest of it. ``feed`` returns the ``TextInfo`` once the object is closed; anything
+    after it is ignored. Up to ``max_preamble`` characters before the opening brace are tolerated.
+    """
+
+    def __init__(self, max_preamble: int = 32):
+        self._max_preamble = max_preamble
+        self._buffer = ""
+        self._pos = 0
+        self._start = -1
+        self._member = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._data: dict = {}
+
+    def feed(self, piece: str) -> TextInfo | None:
+        self._buffer += piece.replace("“", '"').replace("”", '"')
+        if self._start < 0 and not self._find_start():
+            return None
+
+        buffer = self._buffer
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_member(pos)
+                    self._pos = pos + 1
+                    return self._result()
+            elif char == "," and self._depth == 1:
+                self._close_member(pos)
+                self._member = pos + 1
+        self._pos = len(buffer)
+        return None
+
+    def finish(self) -> TextInfo:
+        """Called when the stream ended; raises if the object never closed."""
+        raise MalformedResponseException(f"Incomplete response: {self._buffer[:200]!r}")
+
+    def _find_start(self) -> bool:
+        start = self._buffer.find("{")
+        preamble = self._buffer[: start if start >= 0 else len(self._buffer)]
+        if not _is_preamble(preamble) or (start < 0 and len(self._buffer) > self._max_preamble):
+            raise MalformedResponseException(f"Response does not start with an object: {self._buffer[:200]!r}")
+        if start < 0:
+            return False
+        self._start = self._pos = start
+        self._member = start + 1
+        return True
+
+    def _close_member(self, end: int):
+        member = self._buffer[self._member : end].strip()
+        if not member:
+            return
+        try:
+            (key, value), *_ = json.loads("{" + member + "}").items()
+        except (ValueError, TypeError) as e:
+            raise MalformedResponseException(f"Bad field {member[:100]!r}") from e
+
+        expected = _FIELDS.get(key)
+        if expected is None:
+            raise MalformedResponseException(f"Unexpected field {key!r}")
+        if not isinstance(value, expected) or (expected is list and not all(isinstance(v, str) for v in value)):
+            raise MalformedResponseException(f"Field {key!r} has wrong type: {value!r}")
+        self._data[key] = value
+
+    def _result(self) -> TextInfo:
+        missing = _FIELDS.keys() - self._data.keys()
+        if missing:
+            raise MalformedResponseException(f"Missing fields {sorted(missing)}")
+        return TextInfo(**self._data)
+
+
+def parse_stream(pieces: Iterable[str], close: Callable[[], None] | None = None) -> TextInfo:
+    """Feeds ``pieces`` to an ``IncrementalJsonParser`` and calls ``close`` as soon as the result is known."""
+    parser = IncrementalJsonParser()
+    try:
+        for piece in pieces:
+            info = parser.feed(piece)
+            if info is not None:
+                return info
+        return parser.finish()
+    finally:
+        if close is not None:
+            close()
+
+
+def with_retries(attempt: Callable[[], TextInfo], max_attempts: int) -> TextInfo:
+    for n in range(1, max_attempts + 1):
+        try:
+            return attempt()
+        except MalformedResponseException as e:
+            if n == max_attempts:
+                raise
+            logger.warning("malformed response (%s), retrying", e)
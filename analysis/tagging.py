@@ -0,0 +1,206 @@
+import re
+import threading
+import unicodedata
+import zlib
+from enum import Enum
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .chunking import split_sentences
+from .core import TextAnalyzer, TextInfo
+
+_WORD = re.compile(r"\w+")
+# a crude stemmer that works the same for Russian and English: "systems"/"system", "базы"/"базами"
+STEM_CHARS = 6
+MIN_WORD_CHARS = 3
+
+
+class TaggingMode(Enum):
+    OFF = "off"
+    CANONICALIZE = "canonicalize"
+    CHEAP = "cheap"
+
+
+def _stems(text: str) -> List[str]:
+    words = _WORD.findall(unicodedata.normalize("NFKC", text).casefold())
+    return [word[:STEM_CHARS] for word in words if len(word) >= MIN_WORD_CHARS and not word.isdigit()]
+
+
+def tag_key(tag: str) -> str:
+    """Spelling-insensitive key of a tag: "System Design", "system-design" and "system_designs" share it."""
+    words = _WORD.findall(unicodedata.normalize("NFKC", tag).casefold().replace("_", " "))
+    return " ".join(word[:STEM_CHARS] for word in words)
+
+
+class TagSuggester:
+    """Suggests tags from a fixed vocabulary with TF-IDF centroids, computed with NumPy.
+
+    Terms are hashed into ``dim`` buckets. Each tag's centroid is the normalized sum of the TF-IDF vectors of
+    its examples (``fit``) and of its own name, so a tag nobody has used yet is still matched by its words.
+    """
+
+    def __init__(self, tags: Iterable[str], dim: int = 2**14, min_score: float = 0.25, max_tags: int = 3):
+        self._dim = dim
+        self._min_score = min_score
+        self._max_tags = max_tags
+        self._lock = threading.Lock()
+        self._canonical: Dict[str, str] = {}
+        for tag in tags:
+            self._canonical.setdefault(tag_key(tag), tag.strip())
+        self._canonical.pop("", None)
+        self.tags: List[str] = list(self._canonical.values())
+        self._idf = np.ones(dim, dtype=np.float32)
+        self._centroids = np.zeros((len(self.tags), dim), dtype=np.float32)
+        self.fit([])
+
+    def fit(self, examples: Iterable[Tuple[str, List[str]]]) -> int:
+        """Learns tag profiles from ``(text, tags)`` pairs, e.g. titles and tags of saved pages.
+
+        Tags outside the vocabulary are ignored. Returns the number of examples used.
+        """
+        rows = {tag_key(tag): i for i, tag in enumerate(self.tags)}
+        docs = [(self._counts(tag), [i]) for i, tag in enumerate(self.tags)]
+        for text, tags in examples:
+            labels = sorted({rows[key] for key in map(tag_key, tags) if key in rows})
+            if labels:
+                docs.append((self._counts(text), labels))
+
+        df = np.zeros(self._dim, dtype=np.float32)
+        for (buckets, _), _ in docs:
+            df[buckets] += 1
+        idf = np.log((1 + len(docs)) / (1 + df)).astype(np.float32) + 1
+
+        centroids = np.zeros((len(self.tags), self._dim), dtype=np.float32)
+        for (buckets, counts), labels in docs:
+            weights = np.log1p(counts) * idf[buckets]
+            norm = np.linalg.norm(weights)
+            if norm:
+                for label in labels:
+                    centroids[label, buckets] += weights / norm
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        with self._lock:
+            self._idf = idf
+            # terms none of the examples has carry no evidence for any tag: like out-of-vocabulary words they are
+            # left out of the suggestion vectors instead of diluting them
+            self._known = df > 0
+            self._centroids = centroids / np.where(norms == 0, 1, norms)
+        return len(docs) - len(self.tags)
+
+    def canonical(self, tag: str) -> str | None:
+        """The vocabulary spelling of ``tag``, or ``None`` for a tag the vocabulary does not have."""
+        return self._canonical.get(tag_key(tag))
+
+    def canonicalize(self, tags: Iterable[str]) -> List[str]:
+        """Maps tags onto the vocabulary; new tags are kept and their spelling becomes the canonical one."""
+        result = []
+        with self._lock:
+            for tag in tags:
+                key = tag_key(tag)
+                if not key:
+                    continue
+                canonical = self._canonical.setdefault(key, tag.strip())
+                if canonical not in result:
+                    result.append(canonical)
+        return result
+
+    def suggest(self, text: str) -> List[Tuple[str, float]]:
+        return self.suggest_many([text])[0]
+
+    def suggest_many(self, texts: List[str]) -> List[List[Tuple[str, float]]]:
+        """Best ``(tag, score)`` pairs for every text, scored in one matrix product."""
+        if not self.tags:
+            return [[] for _ in texts]
+        with self._lock:
+            idf, centroids = np.where(self._known, self._idf, 0), self._centroids
+        vectors = np.zeros((len(texts), self._dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            buckets, counts = self._counts(text)
+            vectors[row, buckets] = np.log1p(counts) * idf[buckets]
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+        scores = vectors @ centroids.T
+        result = []
+        for row in scores:
+            best = np.argsort(-row)[: self._max_tags]
+            result.append([(self.tags[i], float(row[i])) for i in best if row[i] >= self._min_score])
+        return result
+
+    def keywords(self, text: str, limit: int = 10) -> List[str]:
+        """The ``limit`` words of ``text`` with the highest TF-IDF, in their first spelling."""
+        spelling: Dict[str, str] = {}
+        counts: Dict[str, int] = {}
+        for word in _WORD.findall(unicodedata.normalize("NFKC", text)):
+            if len(word) <= MIN_WORD_CHARS or word.isdigit():
+                continue
+            stem = word.casefold()[:STEM_CHARS]
+            spelling.setdefault(stem, word)
+            counts[stem] = counts.get(stem, 0) + 1
+        if not counts:
+            return []
+        stems = list(counts)
+        weights = np.log1p(np.array([counts[stem] for stem in stems], dtype=np.float32)) * self._idf[self._hash(stems)]
+        return [spelling[stems[i]] for i in np.argsort(-weights, kind="stable")[:limit]]
+
+    def _hash(self, stems: List[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(stem.encode()) for stem in stems), dtype=np.int64, count=len(stems))
+        return hashes % self._dim
+
+    def _counts(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Distinct buckets of the terms of ``text`` and their counts."""
+        return np.unique(self._hash(_stems(text or "")), return_counts=True)
+
+
+def _lead(text: str, max_chars: int) -> str:
+    summary = ""
+    for sentence in split_sentences(text):
+        if summary and len(summary) + len(sentence) + 1 > max_chars:
+            break
+        summary = f"{summary} {sentence}".strip()
+    return summary[:max_chars]
+
+
+class TaggingTextAnalyzer:
+    """Tags texts with the vocabulary of a ``TagSuggester``.
+
+    ``CANONICALIZE`` calls the wrapped analyzer and maps its tags onto existing ones. ``CHEAP`` makes no remote
+    call: tags come from the suggester, keywords from TF-IDF, and the title and summary are the text's first
+    sentences.
+    """
+
+    def __init__(
+        self,
+        analyzer: TextAnalyzer,
+        suggester: TagSuggester,
+        mode: TaggingMode = TaggingMode.CANONICALIZE,
+        max_keywords: int = 10,
+        summary_chars: int = 300,
+    ):
+        self._analyzer = analyzer
+        self._suggester = suggester
+        self._mode = mode
+        self._max_keywords = max_keywords
+        self._summary_chars = summary_chars
+        self.max_chars = getattr(analyzer, "max_chars", None)
+        if mode == TaggingMode.CHEAP:
+            self.model_id, self.prompt_version = "tfidf", ""
+        else:
+            self.model_id = getattr(analyzer, "model_id", type(analyzer).__name__)
+            self.prompt_version = f"{getattr(analyzer, 'prompt_version', '')}-tags"
+
+    def get_info(self, text: str) -> TextInfo:
+        if self._mode == TaggingMode.CHEAP:
+            if not text:
+                return TextInfo.empty()
+            sentences = split_sentences(text)
+            return TextInfo(
+                title=sentences[0][:100] if sentences else "",
+                tags=[tag for tag, _ in self._suggester.suggest(text)],
+                summary=_lead(text, self._summary_chars),
+                keywords=self._suggester.keywords(text, self._max_keywords),
+            )
+
+        info = self._analyzer.get_info(text)
+        if self._mode == TaggingMode.CANONICALIZE:
+            info.tags = self._suggester.canonicalize(info.tags)
+        return info
@@ -0,0 +1,139 @@
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import lxml.html
+
+from . import tracing
+from .core import TextAnalyzer, TextInfo, UrlInfo
+from .dedup import TG_CHANNEL
+from .transport import Transport
+
+logger = logging.getLogger(__name__)
+
+FEED_URL = "https://t.me/s/{channel}?before={before}"
+# a feed page holds ~20 posts; asking for the ones before ``id + 10`` centres the requested post in it
+FEED_AHEAD = 10
+
+_POST_URL = re.compile(rf"^https?://t\.me/(?:s/)?({TG_CHANNEL})/(\d+)/?(?:[?#].*)?$")
+_MESSAGE_XPATH = "//div[contains(concat(' ', normalize-space(@class), ' '), ' tgme_widget_message ')][@data-post]"
+_TEXT_XPATH = ".//div[contains(concat(' ', normalize-space(@class), ' '), ' tgme_widget_message_text ')]"
+
+
+def parse_post_url(url: str) -> Tuple[str, int] | None:
+    """``(channel, post_id)`` for ``t.me/<channel>/<id>`` links (with or without ``?embed=1``), else ``None``."""
+    match = _POST_URL.match(url)
+    if match is None:
+        return None
+    return match.group(1).lower(), int(match.group(2))
+
+
+def parse_channel_feed(html: str) -> Dict[int, str]:
+    """Post id -> text for every post on a ``t.me/s/<channel>`` page; posts without text map to ``""``."""
+    posts = {}
+    for message in lxml.html.fromstring(html).xpath(_MESSAGE_XPATH):
+        _, _, post_id = message.get("data-post").rpartition("/")
+        if not post_id.isdigit():
+            continue
+        texts = message.xpath(_TEXT_XPATH)
+        if texts:
+            for br in texts[0].iter("br"):
+                br.tail = "\n" + (br.tail or "")
+            posts[int(post_id)] = texts[0].text_content().strip()
+        else:
+            posts[int(post_id)] = ""
+    return posts
+
+
+@dataclass
+class _Feed:
+    posts: Dict[int, str] = field(default_factory=dict)
+    # (lowest id, highest id, fetched at) of every cached page
+    pages: list = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class TgChannelFeed:
+    """Reads posts from public channel feeds (``t.me/s/<channel>``), one feed page for many posts.
+
+    Every fetched page is cached for ``ttl`` seconds, so a burst of posts forwarded from the same channel
+    costs one request. Concurrent lookups in the same channel wait for a single fetch.
+    """
+
+    def __init__(self, transport: Transport | None = None, ttl: float = 300.0, clock=time.monotonic):
+        self._transport = transport or Transport()
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._feeds: Dict[str, _Feed] = {}
+        self.fetches = 0
+        self.hits = 0
+
+    def get_post(self, channel: str, post_id: int) -> str | None:
+        """Text of the post (``""`` for media-only posts), or ``None`` if the feed does not have it."""
+        with self._lock:
+            feed = self._feeds.setdefault(channel, _Feed())
+
+        with feed.lock:
+            now = self._clock()
+            feed.pages = [page for page in feed.pages if now - page[2] < self._ttl]
+            if not feed.pages:
+                feed.posts.clear()
+            if any(low <= post_id <= high for low, high, _ in feed.pages):
+                self.hits += 1
+                return feed.posts.get(post_id)
+
+            before = post_id + FEED_AHEAD
+            posts = self._fetch(channel, before)
+            feed.posts.update(posts)
+            # the page holds every post from its oldest one up to ``before``, so ids missing from that range are
+            # deleted and are not fetched again within ``ttl``
+            feed.pages.append((min(posts, default=post_id), before - 1, now))
+            return feed.posts.get(post_id)
+
+    def _fetch(self, channel: str, before: int) -> Dict[int, str]:
+        self.fetches += 1
+        with tracing.span("telegram feed", channel=channel) as span:
+            response = self._transport.get(FEED_URL.format(channel=channel, before=before))
+            response.raise_for_status()
+            posts = parse_channel_feed(response.text)
+            span.set(bytes=len(response.content), posts=len(posts))
+        return posts
+
+
+class TgChannelUrlInfoFetcher:
+    """Analyzes Telegram channel posts read from the channel feed.
+
+    Returns ``None`` for links it cannot resolve (private chats, posts missing from the feed), so
+    ``TgUrlInfoFetcher`` can still try the embed page.
+    """
+
+    hosts = frozenset({"t.me"})
+
+    def __init__(self, analyzer: TextAnalyzer, feed: TgChannelFeed):
+        self._analyzer = analyzer
+        self._feed = feed
+
+    def get_info(self, url: str) -> UrlInfo | None:
+        post = parse_post_url(url)
+        if post is None:
+            return None
+        try:
+            text = self._feed.get_post(*post)
+        except Exception as e:
+            logger.warning("failed to read the feed for %s: %s", url, e)
+            return None
+        if not text:
+            return None
+
+        try:
+            text_info = self._analyzer.get_info(text)
+        except Exception:
+            logger.exception("failed to analyze %s", url)
+            text_info = TextInfo.empty()
+        return UrlInfo(
+            url=url, title=text_info.title, tags=text_info.tags, summary=text_info.summary, keywords=text_info.keywords
+        )
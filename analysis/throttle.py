@@ -0,0 +1,252 @@
+import dataclasses
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+from .core import UrlInfo, UrlInfoStore
+
+if TYPE_CHECKING:
+    from notion_client.errors import HTTPResponseError
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxFullException(Exception):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float = 1.0, clock=time.monotonic, sleep=time.sleep):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            self._sleep(wait)
+
+
+@dataclass
+class OutboxItem:
+    id: int
+    info: UrlInfo
+    page_id: str | None
+    created_at: float
+    attempts: int
+    version: int = 0
+
+
+class Outbox:
+    """Bounded, SQLite-backed queue of pending page writes.
+
+    Writes for a URL that is already pending replace the pending one (coalescing) and keep its place. Each
+    replacement bumps the row's version, so a writer only removes a row if nothing was coalesced into it while
+    the write was in flight.
+    """
+
+    def __init__(self, path: str, max_size: int = 10000):
+        self._max_size = max_size
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE, info TEXT NOT NULL, "
+                "page_id TEXT, created_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+                "version INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")]
+            if "version" not in columns:
+                self._conn.execute("ALTER TABLE outbox ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def put(self, info: UrlInfo, page_id: str | None = None):
+        payload = json.dumps(dataclasses.asdict(info), ensure_ascii=False)
+        with self._lock, self._conn:
+            exists = self._conn.execute("SELECT 1 FROM outbox WHERE url = ?", (info.url,)).fetchone()
+            if exists:
+                self._conn.execute(
+                    "UPDATE outbox SET info = ?, page_id = COALESCE(?, page_id), version = version + 1 WHERE url = ?",
+                    (payload, page_id, info.url),
+                )
+                return
+            if self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0] >= self._max_size:
+                raise OutboxFullException(info.url)
+            self._conn.execute(
+                "INSERT INTO outbox (url, info, page_id, created_at) VALUES (?, ?, ?, ?)",
+                (info.url, payload, page_id, time.time()),
+            )
+
+    def peek(self) -> OutboxItem | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, info, page_id, created_at, attempts, version FROM outbox ORDER BY id LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        id, info, page_id, created_at, attempts, version = row
+        return OutboxItem(id, UrlInfo(**json.loads(info)), page_id, created_at, attempts, version)
+
+    def remove(self, item: OutboxItem, page_id: str | None = None) -> bool:
+        """Removes ``item`` if it is still the version that was written; returns ``False`` if a newer write was
+        coalesced into it meanwhile. That one stays queued, with ``page_id`` (of the page just created) so it
+        updates that page instead of creating another."""
+        with self._lock, self._conn:
+            if page_id is not None:
+                self._conn.execute("UPDATE outbox SET page_id = ? WHERE id = ?", (page_id, item.id))
+            cursor = self._conn.execute("DELETE FROM outbox WHERE id = ? AND version = ?", (item.id, item.version))
+            return cursor.rowcount == 1
+
+    def retry_later(self, item: OutboxItem):
+        """Bumps the attempt counter and moves the item, with any write coalesced into it, to the back of the
+        queue."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT url, info, page_id, created_at, attempts, version FROM outbox WHERE id = ?", (item.id,)
+            ).fetchone()
+            if row is None:
+                return
+            url, info, page_id, created_at, attempts, version = row
+            self._conn.execute("DELETE FROM outbox WHERE id = ?", (item.id,))
+            self._conn.execute(
+                "INSERT INTO outbox (url, info, page_id, created_at, attempts, version) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, info, page_id, created_at, attempts + 1, version),
+            )
+
+
+def _retry_after(e: "HTTPResponseError", default: float) -> float:
+    try:
+        return float(e.headers.get("Retry-After", default))
+    except ValueError:
+        return default
+
+
+class ThrottledUrlInfoStore:
+    """Queues page writes in an ``Outbox`` and drains it at ``rate`` requests per second.
+
+    ``create_page`` returns ``None``: the page id is only known once the write goes out, and is passed to
+    ``on_created(info, page_id)`` (e.g. to record it in the URL index and the retry queue). On 429 the writer
+    honours ``Retry-After``; other errors are retried up to ``max_attempts`` times before the item is dropped.
+    """
+
+    def __init__(
+        self,
+        store: UrlInfoStore,
+        outbox: Outbox,
+        rate: float = 3.0,
+        max_attempts: int = 5,
+        on_created: Callable[[UrlInfo, str], None] | None = None,
+        sleep=time.sleep,
+    ):
+        self._store = store
+        self._outbox = outbox
+        self._bucket = TokenBucket(rate, sleep=sleep)
+        self._max_attempts = max_attempts
+        self._on_created = on_created
+        self._sleep = sleep
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.written = 0
+        self.rate_limited = 0
+        self.dropped = 0
+
+    def create_page(self, info: UrlInfo) -> None:
+        self._outbox.put(info)
+        self._wakeup.set()
+
+    def update_page(self, page_id: str, info: UrlInfo):
+        self._outbox.put(info, page_id)
+        self._wakeup.set()
+
+    def __getattr__(self, name):
+        return getattr(self._store, name)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="notion-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+
+    def stats(self) -> dict:
+        item = self._outbox.peek()
+        return {
+            "pending": len(self._outbox),
+            "lag": time.time() - item.created_at if item else 0.0,
+            "written": self.written,
+            "rate_limited": self.rate_limited,
+            "dropped": self.dropped,
+        }
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if not self.drain_one():
+                self._wakeup.wait(1.0)
+                self._wakeup.clear()
+
+    def drain_one(self) -> bool:
+        """Writes the oldest pending item; returns ``False`` if the outbox is empty."""
+        item = self._outbox.peek()
+        if item is None:
+            return False
+
+        # notion_client pulls in httpx; it is only needed once there is something to write
+        from notion_client.errors import HTTPResponseError
+
+        self._bucket.acquire()
+        page_id = None
+        try:
+            if item.page_id is not None:
+                self._store.update_page(item.page_id, item.info)
+            else:
+                page_id = self._store.create_page(item.info)
+        except HTTPResponseError as e:
+            if e.status != 429:
+                return self._failed(item)
+            self.rate_limited += 1
+            self._sleep(_retry_after(e, 1.0))
+            return True
+        except Exception:
+            return self._failed(item)
+
+        # the page exists now: a failing callback must not send the item through the retry path a second time
+        self._outbox.remove(item, page_id)
+        self.written += 1
+        if self._on_created is not None and page_id:
+            try:
+                self._on_created(item.info, page_id)
+            except Exception:
+                logger.exception("on_created failed for %s", item.info.url)
+        return True
+
+    def _failed(self, item: OutboxItem) -> bool:
+        logger.exception("failed to write %s", item.info.url)
+        if item.attempts + 1 >= self._max_attempts:
+            if self._outbox.remove(item):
+                self.dropped += 1
+        else:
+            self._outbox.retry_later(item)
+        return True
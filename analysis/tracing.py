@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, Protocol, Tuple
+
+from .metrics import StageMetrics
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar["Span | None"] = ContextVar("span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    started_at: float
+    duration: float = 0.0
+    outcome: str = "ok"
+    attrs: dict = field(default_factory=dict)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class SpanSink(Protocol):
+    def write(self, span: Span): ...
+
+
+class Tracer:
+    """Records a span per pipeline stage.
+
+    Span durations go to ``metrics`` as a histogram per span name; outcomes are counted and numeric
+    attributes (bytes, tokens, ...) are summed per span name. Finished spans are also passed to ``sink``.
+    Components with their own counters (queues, provider pools) expose them with ``add_gauges``.
+    """
+
+    def __init__(self, metrics: StageMetrics | None = None, sink: SpanSink | None = None):
+        self.metrics = metrics or StageMetrics()
+        self.sink = sink
+        self._lock = threading.Lock()
+        self._outcomes: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._totals: Dict[Tuple[str, str], float] = defaultdict(float)
+        self._gauges: Dict[str, Callable[[], dict]] = {}
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        parent = _current.get()
+        span = Span(
+            name=name,
+            trace_id=parent.trace_id if parent else os.urandom(8).hex(),
+            span_id=os.urandom(4).hex(),
+            parent_id=parent.span_id if parent else None,
+            started_at=time.time(),
+            attrs=attrs,
+        )
+        token = _current.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.outcome = type(e).__name__
+            raise
+        finally:
+            span.duration = time.perf_counter() - start
+            _current.reset(token)
+            self._finish(span)
+
+    def outcomes(self) -> Dict[Tuple[str, str], int]:
+        with self._lock:
+            return dict(self._outcomes)
+
+    def totals(self) -> Dict[Tuple[str, str], float]:
+        with self._lock:
+            return dict(self._totals)
+
+    def add_gauges(self, component: str, stats: Callable[[], dict]):
+        """Reports the numbers in ``stats()`` (nested dicts are flattened to ``a.b``) on every scrape."""
+        with self._lock:
+            self._gauges[component] = stats
+
+    def gauges(self) -> Dict[Tuple[str, str], float]:
+        with self._lock:
+            sources = dict(self._gauges)
+        values: Dict[Tuple[str, str], float] = {}
+        for component, stats in sources.items():
+            try:
+                _flatten(stats(), component, "", values)
+            except Exception:
+                logger.exception("failed to read stats of %s", component)
+        return values
+
+    def _finish(self, span: Span):
+        self.metrics.observe(span.name, span.duration)
+        with self._lock:
+            self._outcomes[span.name, span.outcome] += 1
+            for key, value in span.attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._totals[span.name, key] += value
+        if self.sink is not None:
+            try:
+                self.sink.write(span)
+            except Exception:
+                logger.exception("failed to write span %s", span.name)
+
+
+def _flatten(stats: dict, component: str, prefix: str, values: Dict[Tuple[str, str], float]):
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            _flatten(value, component, f"{prefix}{key}.", values)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[component, prefix + str(key)] = value
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+
+def set_tracer(tracer: Tracer):
+    global _tracer
+    _tracer = tracer
+
+
+def span(name: str, **attrs):
+    """``with tracing.span("download", url=url) as s: ...`` on the process-wide tracer."""
+    return _tracer.span(name, **attrs)
+
+
+class JsonlSpanSink:
+    """Appends finished spans to a JSON-lines file."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+
+    def write(self, span: Span):
+        line = json.dumps(
+            {
+                "name": span.name,
+                "trace_id": span.trace_id,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "started_at": span.started_at,
+                "duration": span.duration,
+                "outcome": span.outcome,
+                "attrs": span.attrs,
+            },
+            ensure_ascii=False,
+            default=str,
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(tracer: Tracer) -> str:
+    """Prometheus text exposition of the tracer's histograms, counters and component gauges."""
+    lines = ["# TYPE pipeline_stage_seconds histogram"]
+    for name in sorted(tracer.metrics.snapshot()):
+        hist = tracer.metrics.histogram(name)
+        stage = _label(name)
+        for bound, count in zip(list(hist.buckets) + ["+Inf"], hist.cumulative()):
+            lines.append(f'pipeline_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'pipeline_stage_seconds_sum{{stage="{stage}"}} {hist.sum}')
+        lines.append(f'pipeline_stage_seconds_count{{stage="{stage}"}} {hist.count}')
+
+    lines.append("# TYPE pipeline_stage_outcomes_total counter")
+    for (name, outcome), count in sorted(tracer.outcomes().items()):
+        lines.append(f'pipeline_stage_outcomes_total{{stage="{_label(name)}",outcome="{_label(outcome)}"}} {count}')
+
+    lines.append("# TYPE pipeline_stage_attr_total counter")
+    for (name, key), total in sorted(tracer.totals().items()):
+        lines.append(f'pipeline_stage_attr_total{{stage="{_label(name)}",attr="{_label(key)}"}} {total}')
+
+    lines.append("# TYPE component_stat gauge")
+    for (component, key), value in sorted(tracer.gauges().items()):
+        lines.append(f'component_stat{{component="{_label(component)}",stat="{_label(key)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves ``render_prometheus`` on ``GET /metrics`` from a background thread."""
+
+    def __init__(self, tracer: Tracer, port: int, host: str = "127.0.0.1"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_prometheus(tracer).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
@@ -0,0 +1,185 @@
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, FrozenSet, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import StageMetrics
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+# Content is already decoded by requests, so these must not be passed on to other clients.
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+@dataclass
+class RetryPolicy:
+    attempts: int = 4
+    backoff_base: float = 0.5
+    backoff_max: float = 20.0
+    statuses: FrozenSet[int] = field(default_factory=lambda: frozenset({429, 500, 502, 503, 504}))
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """Full-jitter exponential backoff; ``Retry-After`` from the server wins when present."""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+class RetryBudget:
+    """Caps retries to a fraction of traffic so a struggling upstream is not hammered by retry storms.
+
+    Every request deposits ``ratio`` tokens (up to ``capacity``), every retry withdraws one.
+    """
+
+    def __init__(self, ratio: float = 0.2, capacity: float = 10.0):
+        self._ratio = ratio
+        self._capacity = capacity
+        self._tokens = capacity
+        self._lock = threading.Lock()
+        self.exhausted = 0
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self._capacity, self._tokens + self._ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+
+def _retry_after(response: requests.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Transport:
+    """Shared HTTP layer for all outbound calls.
+
+    One ``requests.Session`` with per-host connection pools, connect/read timeouts, jittered retries on
+    429/5xx within a retry budget, and per-host latency histograms (``http <host>``) in ``metrics``.
+    """
+
+    def __init__(
+        self,
+        timeout: Tuple[float, float] = (5.0, 30.0),
+        retry: RetryPolicy | None = None,
+        budget: RetryBudget | None = None,
+        pool_connections: int = 32,
+        pool_maxsize: int = 16,
+        metrics: StageMetrics | None = None,
+        sleep=time.sleep,
+    ):
+        self.timeout = timeout
+        self.retry = retry or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.metrics = metrics or StageMetrics()
+        self._sleep = sleep
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).hostname or ""
+        method = method.upper()
+        self.budget.deposit()
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self._session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.observe(f"http {host}", time.perf_counter() - start)
+                # a read timeout on a non-idempotent call may already have been applied upstream
+                retryable = method in IDEMPOTENT_METHODS or isinstance(e, requests.ConnectTimeout)
+                if not retryable or not self._can_retry(attempt):
+                    raise
+                logger.warning("%s %s failed (%s), retrying", method, url, e)
+                self._sleep(self.retry.delay(attempt))
+                attempt += 1
+                continue
+
+            self.metrics.observe(f"http {host}", time.perf_counter() - start)
+            retry_after = _retry_after(response)
+            if not self._retryable_status(method, response.status_code, retry_after) or not self._can_retry(attempt):
+                return response
+
+            logger.warning("%s %s returned %s, retrying", method, url, response.status_code)
+            delay = self.retry.delay(attempt, retry_after)
+            response.close()
+            self._sleep(delay)
+            attempt += 1
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def httplib2(self) -> "Httplib2Adapter":
+        return Httplib2Adapter(self)
+
+    def httpx_client(self) -> "httpx.Client":
+        # httpx is only needed by the clients routed through here (Notion, OpenAI), so it is not loaded at import
+        import httpx
+
+        from .httpx_transport import HttpxTransport
+
+        return httpx.Client(transport=HttpxTransport(self))
+
+    def close(self):
+        self._session.close()
+
+    def _retryable_status(self, method: str, status: int, retry_after: float | None) -> bool:
+        if status not in self.retry.statuses:
+            return False
+        # a 5xx from a gateway may come after a POST was applied; only a rejection before handling is safe
+        return method in IDEMPOTENT_METHODS or status == 429 or (status == 503 and retry_after is not None)
+
+    def _can_retry(self, attempt: int) -> bool:
+        return attempt + 1 < self.retry.attempts and self.budget.withdraw()
+
+
+class Httplib2Adapter:
+    """``httplib2.Http`` look-alike for the Google API client."""
+
+    def __init__(self, transport: Transport):
+        self._transport = transport
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=None, connection_type=None):
+        import httplib2
+
+        response = self._transport.request(method, uri, data=body, headers=headers)
+        info = {k.lower(): v for k, v in response.headers.items() if k.lower() not in _HOP_HEADERS}
+        info["status"] = str(response.status_code)
+        return httplib2.Response(info), response.content
+
+    def close(self):
+        pass
@@ -1,7 +1,16 @@
+from __future__ import annotations
+
+import hashlib
 import json
-import requests
+from typing import TYPE_CHECKING, Iterator
 
+from . import tracing
 from .core import TextInfo
+from .streaming import parse_stream, with_retries
+from .transport import Transport
+
+if TYPE_CHECKING:
+    import httpx
 
 prompt = """
 Анализируя данный текст, нужно сформулировать:
@@ -28,35 +37,118 @@ prompt = """
 """
 
 
+URL = "https://llm.api.cloud.yandex.net/foundationModels/v1/completion"
+MODEL = "yandexgpt/latest"
+MAX_CHARS = 2000
+PROMPT_VERSION = hashlib.sha1(prompt.encode()).hexdigest()[:8]
+
+
+def _build_request(catalog_id: str, text: str, max_chars: int = MAX_CHARS, stream: bool = False) -> dict:
+    # Пришлось добавить ограничение на количество знаков.
+    # Без этого ограничения модель не всегда возвращала JSON или возвращал JSON + обычный текст
+    messages = [
+        {"role": "user", "text": prompt % text[:max_chars]},
+    ]
+
+    return {
+        "modelUri": f"gpt://{catalog_id}/{MODEL}",
+        "completionOptions": {"stream": stream, "temperature": 0, "maxTokens": "1000"},
+        "messages": messages,
+    }
+
+
+def _parse_response(data: dict) -> TextInfo:
+    text = data["result"]["alternatives"][0]["message"]["text"]
+    text = text.replace("“", '"').replace("”", '"')
+
+    return TextInfo(**json.loads(text))
+
+
+def _usage(data: dict) -> dict:
+    usage = data.get("result", {}).get("usage")
+    if not usage:
+        return {}
+    return {"tokens_in": int(usage.get("inputTextTokens", 0)), "tokens_out": int(usage.get("completionTokens", 0))}
+
+
+def _stream_deltas(lines, span: tracing.Span) -> Iterator[str]:
+    # every streamed line carries the whole alternative generated so far, not just the new part
+    seen = 0
+    for line in lines:
+        if not line:
+            continue
+        data = json.loads(line)
+        span.set(**_usage(data))
+        text = data["result"]["alternatives"][0]["message"]["text"]
+        yield text[seen:]
+        seen = len(text)
+
+
 class YandexGptTextAnalyzer:
-    def __init__(self, api_key: str, catalog_id: str):
+    model_id = MODEL
+    prompt_version = PROMPT_VERSION
+
+    def __init__(
+        self,
+        api_key: str,
+        catalog_id: str,
+        transport: Transport | None = None,
+        max_chars: int = MAX_CHARS,
+        stream: bool = False,
+        max_attempts: int = 2,
+        url: str = URL,
+    ):
         self._api_key = api_key
         self._catalog_id = catalog_id
-    
+        self._transport = transport or Transport()
+        self._url = url
+        self._stream = stream
+        self._max_attempts = max_attempts
+        self.max_chars = max_chars
+
     def get_info(self, text: str) -> TextInfo:
+        with tracing.span("analyze YandexGptTextAnalyzer", chars=len(text)) as span:
+            if self._stream:
+                return with_retries(lambda: self._get_info_streaming(text, span), self._max_attempts)
+
+            response = self._transport.post(
+                self._url,
+                json=_build_request(self._catalog_id, text, self.max_chars),
+                headers={"Authorization": f"Api-Key {self._api_key}"},
+            )
+            data = response.json()
+            span.set(**_usage(data))
+            return _parse_response(data)
+
+    def _get_info_streaming(self, text: str, span: tracing.Span) -> TextInfo:
+        response = self._transport.post(
+            self._url,
+            json=_build_request(self._catalog_id, text, self.max_chars, stream=True),
+            headers={"Authorization": f"Api-Key {self._api_key}"},
+            stream=True,
+        )
+        response.raise_for_status()
+        return parse_stream(_stream_deltas(response.iter_lines(), span), close=response.close)
+
+
+class AsyncYandexGptTextAnalyzer:
+    model_id = MODEL
+    prompt_version = PROMPT_VERSION
+
+    def __init__(
+        self, api_key: str, catalog_id: str, client: httpx.AsyncClient | None = None, max_chars: int = MAX_CHARS
+    ):
+        import httpx
+
+        self._api_key = api_key
+        self._catalog_id = catalog_id
+        self._client = client or httpx.AsyncClient(timeout=60)
+        self.max_chars = max_chars
 
-        # Пришлось добавить ограничение на количество знаков. 
-        # Без этого ограничения модель не всегда возвращала JSON или возвращал JSON + обычный текст
-        messages=[
-            {"role": "user", "text": prompt % text[:2000]},  
-        ]
-        
-        response = requests.post("https://llm.api.cloud.yandex.net/foundationModels/v1/completion", json={
-            "modelUri": f"gpt://{self._catalog_id}/yandexgpt/latest",
-            "completionOptions": {
-                "stream": False,
-                "temperature": 0,
-                "maxTokens": "1000"
-            },
-            "messages": messages
-        }, headers={"Authorization": f"Api-Key {self._api_key}"})
-        
-        text = response.json()
-        text = text['result']['alternatives'][0]['message']['text']
-        text = text.replace('“', '"').replace('”', '"')
-
-        print(text)
-
-        data = json.loads(text)
-
-        return TextInfo(**data)
+    async def get_info(self, text: str) -> TextInfo:
+        response = await self._client.post(
+            URL,
+            json=_build_request(self._catalog_id, text, self.max_chars),
+            headers={"Authorization": f"Api-Key {self._api_key}"},
+        )
+        return _parse_response(response.json())
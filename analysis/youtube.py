@@ -0,0 +1,144 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict
+
+from googleapiclient.errors import HttpError
+
+PART = "snippet,contentDetails,statistics"
+MAX_IDS_PER_CALL = 50
+
+
+@dataclass
+class _CachedVideo:
+    item: dict
+    etag: str | None
+    fetched_at: float
+
+
+class YTVideoBatcher:
+    """Coalesces ``videos().list`` lookups.
+
+    Ids requested within ``window`` seconds go out as one call of up to 50 ids, and each caller gets its own
+    item back. Cached items are served without a call within ``fresh_ttl``; after that a lone re-request of an
+    item that was fetched alone is sent with ``If-None-Match`` and a 304 keeps the cached item. Conditional
+    requests are single-id only: a response ETag covers the whole id set, which a later batch rarely repeats.
+    """
+
+    def __init__(
+        self,
+        client,
+        window: float = 0.05,
+        max_batch: int = MAX_IDS_PER_CALL,
+        fresh_ttl: float = 3600.0,
+        max_cache: int = 10000,
+        part: str = PART,
+        clock=time.monotonic,
+    ):
+        self._client = client
+        self._window = window
+        self._max_batch = min(max_batch, MAX_IDS_PER_CALL)
+        self._fresh_ttl = fresh_ttl
+        self._max_cache = max_cache
+        self._part = part
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._timer: threading.Timer | None = None
+        self._cache: OrderedDict[str, _CachedVideo] = OrderedDict()
+        self.calls = 0
+        self.cache_hits = 0
+        self.not_modified = 0
+
+    def get(self, video_id: str, timeout: float | None = 60) -> dict:
+        batch = None
+        with self._lock:
+            cached = self._cache.get(video_id)
+            if cached is not None and self._clock() - cached.fetched_at < self._fresh_ttl:
+                self.cache_hits += 1
+                self._cache.move_to_end(video_id)
+                return cached.item
+
+            future = self._pending.get(video_id)
+            if future is None:
+                future = Future()
+                self._pending[video_id] = future
+                if len(self._pending) >= self._max_batch:
+                    batch = self._take()
+                elif self._timer is None:
+                    self._timer = threading.Timer(self._window, self._on_timer)
+                    self._timer.daemon = True
+                    self._timer.start()
+
+        if batch:
+            self._flush(batch)
+        return future.result(timeout)
+
+    def _on_timer(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._flush(batch)
+
+    def _take(self) -> Dict[str, Future]:
+        batch, self._pending = self._pending, {}
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self, batch: Dict[str, Future]):
+        try:
+            ids = list(batch)
+            cached = self._cache.get(ids[0]) if len(ids) == 1 else None
+            if cached is not None and cached.etag:
+                items = self._refresh(ids[0], cached)
+            else:
+                items = self._fetch(ids)
+        except Exception as e:
+            for future in batch.values():
+                future.set_exception(e)
+            return
+
+        for video_id, future in batch.items():
+            if video_id in items:
+                future.set_result(items[video_id])
+            else:
+                future.set_exception(ValueError(f"Video {video_id} not found"))
+
+    def _fetch(self, ids: list) -> Dict[str, dict]:
+        self.calls += 1
+        response = self._client.videos().list(part=self._part, id=",".join(ids)).execute()
+        items = {item["id"]: item for item in response.get("items", [])}
+        # If-None-Match is compared with the response etag, which only a single-id response can be reused for
+        etag = response.get("etag") if len(ids) == 1 else None
+        for video_id, item in items.items():
+            self._store(video_id, item, etag)
+        return items
+
+    def _refresh(self, video_id: str, cached: _CachedVideo) -> Dict[str, dict]:
+        self.calls += 1
+        request = self._client.videos().list(part=self._part, id=video_id)
+        request.headers["If-None-Match"] = cached.etag
+        try:
+            response = request.execute()
+        except HttpError as e:
+            if e.resp.status != 304:
+                raise
+            self.not_modified += 1
+            self._store(video_id, cached.item, cached.etag)
+            return {video_id: cached.item}
+
+        items = {item["id"]: item for item in response.get("items", [])}
+        if video_id in items:
+            self._store(video_id, items[video_id], response.get("etag"))
+        return items
+
+    def _store(self, video_id: str, item: dict, etag: str | None):
+        with self._lock:
+            self._cache[video_id] = _CachedVideo(item=item, etag=etag, fetched_at=self._clock())
+            self._cache.move_to_end(video_id)
+            while len(self._cache) > self._max_cache:
+                self._cache.popitem(last=False)
@@ -0,0 +1,65 @@
+"""Compares inline, thread and process extraction on a corpus of saved HTML files.
+
+    python -m benchmarks.extraction path/to/corpus --threads 16 --workers 4 --repeat 3
+
+Every mode is driven from ``--threads`` caller threads, like fetchers running on the bot's job queue.
+"""
+
+import argparse
+import glob
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis.fetchers import ExtractionExecutor, create_extraction_executor
+
+
+def load_corpus(path: str) -> list:
+    files = sorted(glob.glob(os.path.join(path, "**", "*.htm*"), recursive=True))
+    corpus = []
+    for name in files:
+        with open(name, encoding="utf-8", errors="replace") as f:
+            corpus.append((name, f.read()))
+    return corpus
+
+
+def run(executor: ExtractionExecutor, corpus: list, threads: int, max_chars: int | None) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as callers:
+        list(callers.map(lambda item: executor.extract(item[1], None, max_chars), corpus))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus", help="directory with saved .html files")
+    parser.add_argument("--threads", type=int, default=16, help="caller threads")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="thread/process pool size")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-chars", type=int, default=None)
+    parser.add_argument("--modes", default="inline,thread,process")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        parser.error(f"no html files in {args.corpus}")
+    size = sum(len(html) for _, html in corpus)
+    print(f"{len(corpus)} documents, {size / 1024 / 1024:.1f} MiB, {args.threads} caller threads")
+
+    for mode in args.modes.split(","):
+        executor = create_extraction_executor(mode, args.workers)
+        run(executor, corpus[: args.workers or 1], args.threads, args.max_chars)  # warm up pools
+        timings = [run(executor, corpus, args.threads, args.max_chars) for _ in range(args.repeat)]
+        if hasattr(executor, "shutdown"):
+            executor.shutdown()
+
+        best = min(timings)
+        print(
+            f"{mode:>8}: best {best:.2f}s  median {statistics.median(timings):.2f}s  "
+            f"{len(corpus) / best:.1f} docs/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Local stand-ins for the services the pipeline talks to, for offline benchmarks.
+
+One ``FakeServices`` HTTP server answers on a free local port:
+
+- ``GET /pages/<n>`` serves the n-th document of an HTML corpus;
+- ``POST /yandex`` answers like the YandexGPT completion API (plain or streamed);
+- ``POST /openai/chat/completions`` answers like the OpenAI chat API;
+- ``POST /notion/v1/pages`` and friends answer like the Notion API.
+
+``FakeTelegramClient`` posts updates to the bot's webhook the way Telegram does.
+
+LLM latency and error rate are configurable; errors and jitter come from a seeded RNG so that two runs
+with the same seed see the same sequence.
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    import httpx
+
+_WORDS = (
+    "система данные модель сервер запрос ответ страница текст анализ пользователь поток очередь задержка "
+    "python cache latency throughput worker request response page index store"
+).split()
+
+ANSWER = {
+    "title": "Заголовок",
+    "tags": ["Тег1", "Тег2", "Тег3"],
+    "keywords": ["слово1", "слово2", "слово3"],
+    "summary": "Краткое содержание страницы в двух предложениях. Второе предложение.",
+}
+
+
+def synthetic_corpus(size: int, seed: int = 0, paragraphs: int = 30) -> List[str]:
+    rng = random.Random(seed)
+    corpus = []
+    for n in range(size):
+        body = "".join(
+            "<p>" + " ".join(rng.choice(_WORDS) for _ in range(rng.randint(20, 80))) + ".</p>"
+            for _ in range(paragraphs)
+        )
+        corpus.append(f"<html><head><title>Page {n}</title></head><body><article>{body}</article></body></html>")
+    return corpus
+
+
+class FakeServices:
+    def __init__(
+        self,
+        corpus: List[str],
+        llm_latency: float = 0.2,
+        llm_jitter: float = 0.1,
+        llm_error_rate: float = 0.0,
+        notion_latency: float = 0.05,
+        seed: int = 0,
+    ):
+        self.corpus = corpus
+        self.llm_latency = llm_latency
+        self.llm_jitter = llm_jitter
+        self.llm_error_rate = llm_error_rate
+        self.notion_latency = notion_latency
+        self.requests = {"pages": 0, "llm": 0, "llm_errors": 0, "notion": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def page_url(self, n: int) -> str:
+        return f"{self.base_url}/pages/{n % len(self.corpus)}?r={n}"
+
+    def __enter__(self) -> "FakeServices":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _llm_delay(self) -> tuple:
+        with self._lock:
+            self.requests["llm"] += 1
+            failed = self._rng.random() < self.llm_error_rate
+            if failed:
+                self.requests["llm_errors"] += 1
+            delay = max(0.0, self.llm_latency + self._rng.uniform(-self.llm_jitter, self.llm_jitter))
+        return delay, failed
+
+    def _count(self, name: str):
+        with self._lock:
+            self.requests[name] += 1
+
+    def _handler(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self) -> dict:
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path.startswith("/pages/"):
+                    services._count("pages")
+                    html = services.corpus[int(path.rsplit("/", 1)[1]) % len(services.corpus)]
+                    self._send(200, html.encode(), "text/html; charset=utf-8")
+                elif path.startswith("/notion/v1/blocks/"):
+                    self._notion({"object": "list", "results": [], "has_more": False, "next_cursor": None})
+                else:
+                    self._send(404, b"{}")
+
+            def do_POST(self):
+                path = self.path.split("?")[0]
+                request = self._json()
+                if path == "/yandex":
+                    self._yandex(request)
+                elif path == "/openai/chat/completions":
+                    self._openai(request)
+                elif path == "/notion/v1/pages":
+                    self._notion({"object": "page", "id": str(uuid.uuid4())})
+                elif path.startswith("/notion/v1/databases/"):
+                    self._notion({"object": "list", "results": [], "has_more": False, "next_cursor": None})
+                else:
+                    self._send(404, b"{}")
+
+            def do_PATCH(self):
+                self._json()
+                self._notion({"object": "page", "id": self.path.rsplit("/", 1)[1]})
+
+            def do_DELETE(self):
+                self._notion({"object": "block", "id": self.path.rsplit("/", 1)[1]})
+
+            def _notion(self, body: dict):
+                services._count("notion")
+                time.sleep(services.notion_latency)
+                self._send(200, json.dumps(body).encode())
+
+            def _yandex(self, request: dict):
+                delay, failed = services._llm_delay()
+                time.sleep(delay)
+                if failed:
+                    self._send(503, b'{"error": "unavailable"}')
+                    return
+
+                text = json.dumps(ANSWER, ensure_ascii=False)
+                usage = {"inputTextTokens": "500", "completionTokens": str(len(text) // 4)}
+                if not request.get("completionOptions", {}).get("stream"):
+                    result = {"alternatives": [{"message": {"role": "assistant", "text": text}}], "usage": usage}
+                    self._send(200, json.dumps({"result": result}, ensure_ascii=False).encode())
+                    return
+
+                lines = []
+                for end in range(16, len(text) + 16, 16):
+                    result = {"alternatives": [{"message": {"role": "assistant", "text": text[:end]}}], "usage": usage}
+                    lines.append(json.dumps({"result": result}, ensure_ascii=False))
+                self._send(200, ("\n".join(lines) + "\n").encode())
+
+            def _openai(self, request: dict):
+                delay, failed = services._llm_delay()
+                time.sleep(delay)
+                if failed:
+                    self._send(503, b'{"error": {"message": "unavailable"}}')
+                    return
+                body = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": json.dumps(ANSWER, ensure_ascii=False)},
+                        }
+                    ],
+                    "usage": {"prompt_tokens": 500, "completion_tokens": 60, "total_tokens": 560},
+                }
+                self._send(200, json.dumps(body, ensure_ascii=False).encode())
+
+        return Handler
+
+
+class FakeTelegramClient:
+    """Posts updates to a webhook the way Telegram does, for local runs and tests."""
+
+    def __init__(self, url: str, secret_token: str | None = None):
+        self._url = url
+        self._secret_token = secret_token
+        self._update_id = 0
+
+    def message_update(self, text: str, chat_id: int = 1, **message) -> dict:
+        self._update_id += 1
+        return {
+            "update_id": self._update_id,
+            "message": {
+                "message_id": self._update_id,
+                "date": 0,
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": "test"},
+                "text": text,
+                **message,
+            },
+        }
+
+    async def post(self, update: dict, client: "httpx.AsyncClient | None" = None) -> int:
+        import httpx
+
+        headers = {"X-Telegram-Bot-Api-Secret-Token": self._secret_token} if self._secret_token else {}
+        if client is None:
+            async with httpx.AsyncClient() as client:
+                return (await client.post(self._url, json=update, headers=headers)).status_code
+        return (await client.post(self._url, json=update, headers=headers)).status_code
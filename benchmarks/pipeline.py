@@ -0,0 +1,167 @@
+"""Drives URLs through the real ``UrlHandler`` against local fake services (see ``benchmarks.fakes``).
+
+    python -m benchmarks.pipeline --urls 200 --concurrency 16 --llm-latency 0.3 --json results.json
+    python -m benchmarks.pipeline --urls 200 --concurrency 16 --compare results.json
+
+Reports per-URL p50/p95/p99 latency, throughput, peak RSS and per-stage latencies. With ``--json`` the
+results are written together with the commit and the parameters, and ``--compare`` prints the change
+against such a file, so runs with the same ``--seed`` can be compared between commits.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from analysis import DefaultUrlInfoFetcher, GptTextAnalyzer, NotionUrlInfoStore, Transport, UrlHandler
+from analysis import UrlInfoFetcherContext, YandexGptTextAnalyzer, create_extraction_executor
+from analysis.metrics import StageMetrics
+from analysis.tracing import Tracer, get_tracer, set_tracer
+from benchmarks.extraction import load_corpus
+from benchmarks.fakes import FakeServices, synthetic_corpus
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def percentiles(latencies: list) -> dict:
+    if len(latencies) < 2:
+        value = latencies[0] if latencies else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def build_handler(services: FakeServices, args, metrics: StageMetrics) -> UrlHandler:
+    transport = Transport(metrics=metrics, pool_maxsize=max(16, args.concurrency))
+    if args.llm == "openai":
+        analyzer = GptTextAnalyzer("key", transport, base_url=f"{services.base_url}/openai")
+    else:
+        analyzer = YandexGptTextAnalyzer(
+            "key", "catalog", transport, stream=args.stream, url=f"{services.base_url}/yandex"
+        )
+
+    executor = create_extraction_executor(args.extraction, args.extraction_workers)
+    fetcher = DefaultUrlInfoFetcher(analyzer, transport, args.max_bytes, executor)
+    store = NotionUrlInfoStore("secret", "database", transport, base_url=f"{services.base_url}/notion")
+    return UrlHandler(UrlInfoFetcherContext([fetcher]), store, metrics=metrics)
+
+
+def run(args) -> dict:
+    corpus = [html for _, html in load_corpus(args.corpus)] if args.corpus else synthetic_corpus(64, args.seed)
+    metrics = StageMetrics()
+    previous = get_tracer()
+    set_tracer(Tracer(metrics))
+    try:
+        with FakeServices(
+            corpus,
+            llm_latency=args.llm_latency,
+            llm_jitter=args.llm_jitter,
+            llm_error_rate=args.llm_error_rate,
+            notion_latency=args.notion_latency,
+            seed=args.seed,
+        ) as services:
+            handler = build_handler(services, args, metrics)
+            for n in range(min(args.warmup, args.urls)):
+                handler.handle(services.page_url(n))
+
+            def handle(n: int) -> float:
+                start = time.perf_counter()
+                handler.handle(services.page_url(n))
+                return time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                latencies = list(pool.map(handle, range(args.urls)))
+            elapsed = time.perf_counter() - start
+            requests = dict(services.requests)
+    finally:
+        set_tracer(previous)
+
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("json", "compare")},
+        "urls": args.urls,
+        "elapsed": elapsed,
+        "throughput": args.urls / elapsed,
+        "latency": {**percentiles(latencies), "mean": statistics.fmean(latencies)},
+        "peak_rss_mb": _peak_rss_mb(),
+        "requests": requests,
+        "stages": metrics.snapshot(),
+    }
+
+
+def report(result: dict, baseline: dict | None = None):
+    def delta(new: float, old: float | None) -> str:
+        if not old:
+            return ""
+        return f"  ({(new - old) / old * 100:+.1f}%)"
+
+    base_latency = (baseline or {}).get("latency", {})
+    print(f"commit {result['commit']}, {result['urls']} urls in {result['elapsed']:.2f}s")
+    print(
+        f"throughput {result['throughput']:.1f} url/s{delta(result['throughput'], (baseline or {}).get('throughput'))}"
+    )
+    for key in ("p50", "p95", "p99"):
+        print(
+            f"latency {key} {result['latency'][key] * 1000:.0f} ms{delta(result['latency'][key], base_latency.get(key))}"
+        )
+    print(
+        f"peak rss {result['peak_rss_mb']:.0f} MiB{delta(result['peak_rss_mb'], (baseline or {}).get('peak_rss_mb'))}"
+    )
+    for stage, snapshot in result["stages"].items():
+        print(f"  {stage:<40} n={snapshot['count']:<6} avg={snapshot['avg'] * 1000:.0f}ms p95<={snapshot['p95']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--corpus", help="directory with saved .html files, defaults to a synthetic corpus")
+    parser.add_argument("--llm", choices=["yandex", "openai"], default="yandex")
+    parser.add_argument("--stream", action="store_true", help="streamed completions (yandex)")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--notion-latency", type=float, default=0.05)
+    parser.add_argument("--max-bytes", type=int, default=2 * 1024 * 1024)
+    parser.add_argument("--extraction", default="inline")
+    parser.add_argument("--extraction-workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="results file of a previous run to compare with")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    result = run(args)
+    report(result, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Measures how long the bot process takes to import ``main`` and build its ``UrlHandler``.
+
+    python -m benchmarks.startup --runs 5 --json startup.json
+    python -m benchmarks.startup --compare startup.json --max-import-ms 600
+
+Every run is a fresh interpreter started with ``-X importtime``. The report has the median import and handler
+times, the slowest top-level packages (summed self import time, from the median run) and the heavy packages
+that got imported at all. It exits with status 1 if ``--max-import-ms`` is exceeded or one of the ``--lazy``
+packages was imported at start-up, so it can guard against regressions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks.pipeline import _commit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# only needed once a link of that kind arrives, or when an optional feature is configured
+LAZY = ("trafilatura", "openai", "googleapiclient.discovery", "numpy", "httplib2")
+
+_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.create_url_handler(main.Config.from_env())
+built = time.perf_counter()
+print(json.dumps({"import": imported - started, "handler": built - imported, "modules": sorted(sys.modules)}))
+"""
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """Import time in seconds spent in each top-level package, from ``-X importtime`` output.
+
+    Self times are summed, so a package is not charged for the unrelated packages its modules import.
+    """
+    packages: Dict[str, float] = defaultdict(float)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        own, _, name = line[len("import time:") :].split("|")
+        if not own.strip().isdigit():
+            continue
+        packages[name.strip().split(".")[0]] += int(own) / 1e6
+    return dict(packages)
+
+
+def measure(env: dict | None = None) -> dict:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _SCRIPT],
+        cwd=ROOT,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["packages"] = parse_importtime(process.stderr)
+    return result
+
+
+def run(runs: int, lazy=LAZY, top: int = 15, env: dict | None = None) -> dict:
+    samples = [measure(env) for _ in range(runs)]
+    median = sorted(samples, key=lambda sample: sample["import"])[len(samples) // 2]
+    modules = set(median["modules"])
+    packages = sorted(median["packages"].items(), key=lambda item: item[1], reverse=True)
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "runs": runs,
+        "import": statistics.median(sample["import"] for sample in samples),
+        "handler": statistics.median(sample["handler"] for sample in samples),
+        "packages": dict(packages[:top]),
+        "eager": [name for name in lazy if name in modules],
+    }
+
+
+def report(result: dict, baseline: dict | None = None):
+    def delta(key: str) -> str:
+        old = (baseline or {}).get(key)
+        return f"  ({(result[key] - old) / old * 100:+.1f}%)" if old else ""
+
+    print(f"commit {result['commit']}, median of {result['runs']} runs")
+    print(f"import main        {result['import'] * 1000:.0f} ms{delta('import')}")
+    print(f"create_url_handler {result['handler'] * 1000:.0f} ms{delta('handler')}")
+    for package, seconds in result["packages"].items():
+        print(f"  {package:<30} {seconds * 1000:.0f} ms")
+    if result["eager"]:
+        print(f"imported at start-up: {', '.join(result['eager'])}")
+
+
+def check(result: dict, max_import_ms: float | None) -> List[str]:
+    problems = [f"{name} is imported at start-up" for name in result["eager"]]
+    if max_import_ms is not None and result["import"] * 1000 > max_import_ms:
+        problems.append(f"import took {result['import'] * 1000:.0f} ms, more than {max_import_ms:.0f} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="number of packages in the breakdown")
+    parser.add_argument("--lazy", default=",".join(LAZY), help="packages that must not be imported at start-up")
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="results file of a previous run to compare with")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    result = run(args.runs, [name for name in args.lazy.split(",") if name], args.top)
+    report(result, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    problems = check(result, args.max_import_ms)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
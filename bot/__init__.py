@@ -1,2 +1,5 @@
 from .bot import Bot
+from .batch import BatchProgress, MessageBatcher
+from .jobs import JobQueue, UrlJob
 from .url import UrlExtractorContext, create_url_extractor, NoUrlException
+from .webhook import WebhookServer, MemoryUpdateDedup, SqliteUpdateDedup
@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List
+
+import telebot
+
+logger = logging.getLogger(__name__)
+
+
+def batch_key(message: telebot.types.Message) -> Hashable:
+    """Messages of one album share a ``media_group_id``; anything else is grouped per chat."""
+    media_group_id = getattr(message, "media_group_id", None)
+    if isinstance(media_group_id, str) and media_group_id:
+        return "album", media_group_id
+    return "chat", message.chat.id
+
+
+@dataclass
+class _Group:
+    first_at: float
+    messages: List[Any] = field(default_factory=list)
+    timer: threading.Timer | None = None
+
+
+class MessageBatcher:
+    """Collects messages into batches and passes each batch to ``on_batch(messages)``.
+
+    A batch is flushed ``window`` seconds after its latest message, and at most ``max_wait`` seconds after
+    its first one. ``on_batch`` runs on a timer thread.
+    """
+
+    def __init__(
+        self,
+        on_batch: Callable[[List[Any]], None],
+        window: float = 1.0,
+        max_wait: float = 5.0,
+        key: Callable[[Any], Hashable] = batch_key,
+        clock=time.monotonic,
+    ):
+        self._on_batch = on_batch
+        self._window = window
+        self._max_wait = max_wait
+        self._key = key
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._groups: Dict[Hashable, _Group] = {}
+
+    def add(self, message):
+        key = self._key(message)
+        with self._lock:
+            now = self._clock()
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = _Group(first_at=now)
+            elif group.timer is not None:
+                group.timer.cancel()
+            group.messages.append(message)
+
+            delay = max(0.0, min(self._window, group.first_at + self._max_wait - now))
+            group.timer = threading.Timer(delay, self.flush, args=(key,))
+            group.timer.daemon = True
+            group.timer.start()
+
+    def flush(self, key: Hashable):
+        with self._lock:
+            group = self._groups.pop(key, None)
+            if group is not None and group.timer is not None:
+                group.timer.cancel()
+        if group is None:
+            return
+        try:
+            self._on_batch(group.messages)
+        except Exception:
+            logger.exception("failed to process a batch of %s messages", len(group.messages))
+
+    def flush_all(self):
+        with self._lock:
+            keys = list(self._groups)
+        for key in keys:
+            self.flush(key)
+
+
+class BatchProgress:
+    """One progress message per batch, edited in place as URLs finish (at most every ``min_interval`` seconds)."""
+
+    def __init__(self, bot: telebot.TeleBot, message, total: int, min_interval: float = 1.0, clock=time.monotonic):
+        self._bot = bot
+        self._clock = clock
+        self._min_interval = min_interval
+        self._lock = threading.Lock()
+        self.total = total
+        self.succeeded = 0
+        self.failed = 0
+        self._reply = bot.reply_to(message, self.text())
+        self._edited_at = clock()
+
+    @property
+    def finished(self) -> bool:
+        return self.succeeded + self.failed >= self.total
+
+    def text(self) -> str:
+        if not self.finished:
+            return "wait..." if self.total == 1 else f"wait... {self.succeeded + self.failed}/{self.total}"
+        if self.total == 1:
+            return "done" if self.failed == 0 else "error"
+        if self.failed == 0:
+            return f"done: {self.total} links"
+        return f"done: {self.succeeded}/{self.total} links, {self.failed} failed"
+
+    def done(self, error: Exception | None = None):
+        # edits happen under the lock so that the final text cannot be overwritten by a late progress update
+        with self._lock:
+            if error is None:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            now = self._clock()
+            if not self.finished and now - self._edited_at < self._min_interval:
+                return
+            self._edited_at = now
+            try:
+                self._bot.edit_message_text(self.text(), chat_id=self._reply.chat.id, message_id=self._reply.message_id)
+            except Exception:
+                logger.exception("failed to update progress")
@@ -1,26 +1,134 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
 import telebot
 
-from analysis import UrlHandler
+from analysis import SearchIndex, UrlHandler
+from .batch import BatchProgress, MessageBatcher
+from .jobs import JobQueue, UrlJob
 from .url import UrlExtractorContext
+from .webhook import UpdateDedup, WebhookServer
+
+logger = logging.getLogger(__name__)
+
+# concurrency of a batch when there is no job queue
+BATCH_WORKERS = 8
+SEARCH_RESULTS = 10
 
 
 class Bot:
-    def __init__(self, token, handler: UrlHandler, extractor: UrlExtractorContext):
+    """Saves the links from incoming messages.
+
+    Messages of one album, or sent to a chat within ``batch_window`` seconds, are handled as one batch: all of
+    their URLs run concurrently and share a single progress reply that is edited in place.
+    """
+
+    def __init__(
+        self,
+        token,
+        handler: UrlHandler,
+        extractor: UrlExtractorContext,
+        workers: int = 0,
+        batch_window: float = 1.0,
+        search: SearchIndex | None = None,
+    ):
         self._bot = telebot.TeleBot(token)
         self._handler = handler
         self._extractor = extractor
+        self._search = search
+        self._jobs = JobQueue(handler, self._on_job_done, workers) if workers > 0 else None
+        self._batcher = MessageBatcher(self.handle_batch, batch_window) if batch_window > 0 else None
 
         self._bot.register_message_handler(self.send_welcome, commands=["start", "help"])
+        self._bot.register_message_handler(self.send_stats, commands=["stats"])
+        if search is not None:
+            self._bot.register_message_handler(self.send_search, commands=["search"])
         self._bot.register_message_handler(self.handle_url, func=lambda message: True)
 
     def send_welcome(self, message):
         self._bot.reply_to(message, "Howdy, how are you doing?")
 
+    def send_stats(self, message):
+        stats = self._jobs.stats() if self._jobs else {"stages": self._handler.metrics.snapshot()}
+        self._bot.reply_to(message, json.dumps(stats, indent=2))
+
+    def send_search(self, message):
+        query = telebot.util.extract_arguments(message.text or "")
+        if not query:
+            self._bot.reply_to(message, "usage: /search <words>, #tag or prefix*")
+            return
+
+        results = self._search.search(query, SEARCH_RESULTS)
+        if not results:
+            self._bot.reply_to(message, "nothing found")
+            return
+        lines = [f"{i}. {info.title}\n{info.url}" for i, info in enumerate(results, 1)]
+        self._bot.reply_to(message, "\n\n".join(lines), disable_web_page_preview=True)
+
     def handle_url(self, message: telebot.types.Message):
-        self._bot.reply_to(message, "wait...")
-        url = self._extractor.extract_url(message)
-        self._handler.handle(url)
-        self._bot.reply_to(message, "done")
+        if self._batcher is None:
+            self.handle_batch([message])
+        else:
+            self._batcher.add(message)
+
+    def handle_batch(self, messages: List[telebot.types.Message]):
+        urls = list(dict.fromkeys(url for message in messages for url in self._extractor.extract_urls(message)))
+        if not urls:
+            self._bot.reply_to(messages[0], "no links found")
+            return
+
+        for url in urls:
+            self._handler.accept(url)
+        progress = BatchProgress(self._bot, messages[0], len(urls))
+        if self._jobs:
+            for url in urls:
+                self._jobs.submit(url, progress)
+            return
+
+        def handle(url: str):
+            try:
+                self._handler.handle(url)
+            except Exception as e:
+                logger.exception("failed to handle %s", url)
+                progress.done(e)
+            else:
+                progress.done()
+
+        with ThreadPoolExecutor(max_workers=min(len(urls), BATCH_WORKERS)) as pool:
+            list(pool.map(handle, urls))
+
+    def _on_job_done(self, job: UrlJob, error: Exception | None):
+        job.context.done(error)
+
+    def process_update(self, update: dict):
+        self._bot.process_new_updates([telebot.types.Update.de_json(update)])
 
     def run(self):
-        self._bot.infinity_polling()
+        self._serve(self._bot.infinity_polling)
+
+    def run_webhook(
+        self,
+        url: str,
+        secret_token: str,
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        dedup: UpdateDedup | None = None,
+    ):
+        """Receives updates on a ``WebhookServer`` instead of long polling; ``url`` is its public address."""
+        server = WebhookServer(self.process_update, secret_token, host=host, port=port, dedup=dedup)
+        self._bot.set_webhook(url=url, secret_token=secret_token)
+        self._serve(lambda: asyncio.run(server.serve_forever()))
+
+    def _serve(self, loop):
+        if self._jobs:
+            self._jobs.start()
+        try:
+            loop()
+        finally:
+            if self._batcher:
+                self._batcher.flush_all()
+            if self._jobs:
+                self._jobs.stop()
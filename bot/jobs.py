@@ -0,0 +1,120 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, List
+
+from analysis import UrlHandler
+from analysis.metrics import StageMetrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UrlJob:
+    url: str
+    context: Any = None
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class JobQueue:
+    """Runs ``UrlHandler.handle`` on a pool of worker threads.
+
+    ``on_done(job, error)`` is called from the worker once the job finishes, ``error`` is ``None`` on success.
+    Wait time and per-stage latency go to ``metrics`` (shared with the handler, so fetch/store stages are there too).
+    """
+
+    def __init__(
+        self,
+        handler: UrlHandler,
+        on_done: Callable[[UrlJob, Exception | None], None],
+        workers: int = 4,
+        maxsize: int = 0,
+    ):
+        self._handler = handler
+        self._on_done = on_done
+        self._workers = workers
+        self._queue: queue.Queue[UrlJob | None] = queue.Queue(maxsize=maxsize)
+        self._threads: List[threading.Thread] = []
+        self.metrics: StageMetrics = handler.metrics
+        self.completed = 0
+        self.failed = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def start(self):
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._work, name=f"url-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, url: str, context: Any = None) -> UrlJob:
+        job = UrlJob(url=url, context=context)
+        self._queue.put(job)
+        return job
+
+    def join(self):
+        self._queue.join()
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": self._workers,
+            "depth": self.depth,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "stages": self.metrics.snapshot(),
+        }
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                return
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: UrlJob):
+        self.metrics.observe("wait", time.monotonic() - job.enqueued_at)
+        with self._lock:
+            self._in_flight += 1
+
+        error = None
+        try:
+            with self.metrics.time("handle"):
+                self._handler.handle(job.url)
+        except Exception as e:
+            logger.exception("failed to handle %s", job.url)
+            error = e
+
+        with self._lock:
+            self._in_flight -= 1
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+        try:
+            with self.metrics.time("reply"):
+                self._on_done(job, error)
+        except Exception:
+            logger.exception("failed to report result for %s", job.url)
@@ -3,6 +3,9 @@ from typing import Protocol, Optional, List
 
 import telebot
 
+URL_PATTERN = re.compile(r"https?://[^\s<>\"'«»]+")
+_TRAILING = ".,;:!?)]}»"
+
 
 class NoUrlException(Exception):
     pass
@@ -11,22 +14,55 @@ class NoUrlException(Exception):
 class UrlExtractor(Protocol):
     def extract(self, message: telebot.types.Message) -> Optional[str]: ...
 
+    def extract_all(self, message: telebot.types.Message) -> List[str]: ...
+
+
+def _text(message: telebot.types.Message) -> str:
+    text = message.text or getattr(message, "caption", None)
+    return text if isinstance(text, str) else ""
+
+
+def _entities(message: telebot.types.Message) -> list:
+    entities = []
+    for name in ("entities", "caption_entities"):
+        value = getattr(message, name, None)
+        if isinstance(value, list):
+            entities.extend(value)
+    return entities
+
+
+def scan_urls(text: str) -> List[str]:
+    """All URLs in ``text`` in order of appearance, without duplicates and trailing punctuation."""
+    urls = (url.rstrip(_TRAILING) for url in URL_PATTERN.findall(text))
+    return list(dict.fromkeys(url for url in urls if url))
+
 
 class UrlFromTextExtractor:
     def extract(self, message: telebot.types.Message) -> Optional[str]:
-        url_pattern = r"(https?://[^\s]+)"
-        url_match = re.search(url_pattern, message.text)
-        if url_match:
-            return url_match.group(0)
+        urls = self.extract_all(message)
+        if urls:
+            return urls[0]
+
+    def extract_all(self, message: telebot.types.Message) -> List[str]:
+        urls = scan_urls(_text(message))
+        # links hidden behind text ("text_link" entities) do not appear in the text itself
+        for entity in _entities(message):
+            url = getattr(entity, "url", None)
+            if getattr(entity, "type", None) == "text_link" and isinstance(url, str) and url not in urls:
+                urls.append(url)
+        return urls
 
 
 class UrlFromForwardExtractor:
     def extract(self, message: telebot.types.Message) -> Optional[str]:
-        #  todo: add support for https://t.me/emacsway_log/1349 links
-        if message.forward_from_message_id is None:
+        if message.forward_from_message_id is None or not message.forward_from_chat.username:
             return
         return f"https://t.me/{message.forward_from_chat.username}/{message.forward_from_message_id}?embed=1&mode=tme"
 
+    def extract_all(self, message: telebot.types.Message) -> List[str]:
+        url = self.extract(message)
+        return [url] if url else []
+
 
 class UrlExtractorContext:
     def __init__(self, strategies: List[UrlExtractor]) -> None:
@@ -40,6 +76,15 @@ class UrlExtractorContext:
 
         raise NoUrlException(message.text)
 
+    def extract_urls(self, message: telebot.types.Message) -> List[str]:
+        """All URLs from the first strategy that finds any, or an empty list."""
+        # first match wins like in ``extract_url``: a forward is saved as the post, not as the links inside it
+        for strategy in self._strategies:
+            urls = strategy.extract_all(message)
+            if urls:
+                return urls
+        return []
+
 
 def create_url_extractor() -> UrlExtractorContext:
     strategies = [UrlFromForwardExtractor(), UrlFromTextExtractor()]
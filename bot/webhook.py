@@ -0,0 +1,211 @@
+import asyncio
+import hmac
+import json
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Protocol, Tuple
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+MAX_BODY = 1024 * 1024
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 413: "Payload Too Large"}
+
+
+class UpdateDedup(Protocol):
+    def first_seen(self, update_id: int) -> bool: ...
+
+
+class MemoryUpdateDedup:
+    """Remembers the last ``max_size`` update ids of this process."""
+
+    def __init__(self, max_size: int = 10000):
+        self._max_size = max_size
+        self._seen: OrderedDict[int, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def first_seen(self, update_id: int) -> bool:
+        with self._lock:
+            if update_id in self._seen:
+                return False
+            self._seen[update_id] = None
+            while len(self._seen) > self._max_size:
+                self._seen.popitem(last=False)
+            return True
+
+
+class SqliteUpdateDedup:
+    """Update ids persisted in an SQLite file, so they survive restarts.
+
+    The first ``INSERT`` of an id wins, so a redelivered update (Telegram retries until it gets a 200) is
+    processed once. Several processes can share the file only on the same host or a shared local disk; SQLite
+    locking is not safe over network filesystems, and message batching stays per process anyway. Ids older than
+    the last ``keep`` are pruned.
+    """
+
+    def __init__(self, path: str, keep: int = 100000):
+        self._keep = keep
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._inserted = 0
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS updates (update_id INTEGER PRIMARY KEY)")
+
+    def first_seen(self, update_id: int) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("INSERT OR IGNORE INTO updates (update_id) VALUES (?)", (update_id,))
+            if cursor.rowcount == 0:
+                return False
+            self._inserted += 1
+            if self._inserted % 1000 == 0:
+                self._conn.execute("DELETE FROM updates WHERE update_id < ?", (update_id - self._keep,))
+            return True
+
+
+class WebhookServer:
+    """Minimal asyncio HTTP server for Telegram webhooks.
+
+    ``POST <path>`` checks the ``X-Telegram-Bot-Api-Secret-Token`` header, drops update ids seen before,
+    answers 200 right away and passes the parsed update to ``on_update`` on a thread pool. ``GET /healthz``
+    is there for load balancers. The secret is required: without it anyone could post forged updates.
+    """
+
+    def __init__(
+        self,
+        on_update: Callable[[dict], None],
+        secret_token: str,
+        path: str = "/webhook",
+        host: str = "0.0.0.0",
+        port: int = 8080,
+        dedup: UpdateDedup | None = None,
+        workers: int = 8,
+    ):
+        if not secret_token:
+            raise ValueError("a webhook requires a secret token")
+        self._on_update = on_update
+        self._secret_token = secret_token
+        self._path = path
+        self._host = host
+        self._port = port
+        self._dedup = dedup or MemoryUpdateDedup()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="webhook")
+        self._server: asyncio.AbstractServer | None = None
+        self.received = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1] if self._server else self._port
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self._host, self._port)
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        return {"received": self.received, "duplicates": self.duplicates, "rejected": self.rejected}
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status = self._respond(method, path, headers, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(_response(status, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except _BadRequest as e:
+            writer.write(_response(e.status, keep_alive=False))
+        finally:
+            writer.close()
+
+    def _respond(self, method: str, path: str, headers: dict, body: bytes) -> int:
+        path = path.split("?")[0]
+        if method == "GET" and path == "/healthz":
+            return 200
+        if method != "POST" or path != self._path:
+            return 404
+        if not hmac.compare_digest(headers.get(SECRET_HEADER, "").encode(), self._secret_token.encode()):
+            self.rejected += 1
+            return 401
+
+        try:
+            update = json.loads(body)
+            update_id = int(update["update_id"])
+        except (ValueError, KeyError, TypeError):
+            return 400
+
+        self.received += 1
+        if not self._dedup.first_seen(update_id):
+            self.duplicates += 1
+            return 200
+
+        asyncio.get_running_loop().run_in_executor(self._executor, self._dispatch, update)
+        return 200
+
+    def _dispatch(self, update: dict):
+        try:
+            self._on_update(update)
+        except Exception:
+            logger.exception("failed to process update %s", update.get("update_id"))
+
+
+class _BadRequest(Exception):
+    def __init__(self, status: int):
+        self.status = status
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, dict, bytes] | None:
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise _BadRequest(400)
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise _BadRequest(400)
+    if length < 0 or length > MAX_BODY:
+        raise _BadRequest(413)
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+def _response(status: int, keep_alive: bool) -> bytes:
+    connection = "keep-alive" if keep_alive else "close"
+    return (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n" f"Content-Length: 0\r\nConnection: {connection}\r\n\r\n"
+    ).encode()
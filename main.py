@@ -1,14 +1,31 @@
+import argparse
 import os
 import logging
+import threading
 from dataclasses import dataclass
 
 import dotenv
 
+from analysis import CachedTextAnalyzer, SqliteAnalysisCache
+from analysis import DedupMode, UrlIndex
+from analysis import Transport
+from analysis import Outbox, ThrottledUrlInfoStore
+from analysis.bulk import BoundedTextAnalyzer, BoundedUrlInfoStore, BulkImporter, Checkpoint, read_urls
+from analysis.metrics import StageMetrics
+from analysis.tracing import JsonlSpanSink, MetricsServer, Tracer, get_tracer, set_tracer
 from analysis import DefaultUrlInfoFetcher
-from analysis import GptTextAnalyzer, YandexGptTextAnalyzer
+from analysis import YandexGptTextAnalyzer
 from analysis import NotionUrlInfoStore
 from analysis import UrlHandler, UrlInfoFetcherContext, TgUrlInfoFetcher, YTUrlInfoFetcher
-from bot import Bot
+from analysis import create_extraction_executor
+from analysis import HedgedUrlInfoFetcher
+from analysis import MapReduceTextAnalyzer
+from analysis import AnalyzerPool, Provider
+from analysis import TgChannelFeed, TgChannelUrlInfoFetcher
+from analysis import GuardedUrlInfoFetcher, HostCircuitBreakers, NegativeCache, RetryQueue, RetryWorker
+from analysis import FanOutUrlInfoStore, SearchIndex
+from analysis import Journal
+from bot import Bot, SqliteUpdateDedup
 from bot import create_url_extractor
 
 
@@ -25,6 +42,39 @@ class Config:
     yt_api_key: str
     yandex_gpt_key: str
     yandex_gpt_catalog: str
+    workers: int
+    batch_window: float
+    webhook_url: str
+    webhook_secret: str
+    webhook_port: int
+    update_dedup_path: str
+    analysis_cache_path: str
+    url_index_path: str
+    dedup_mode: str
+    notion_outbox_path: str
+    search_index_path: str
+    near_duplicate_path: str
+    near_duplicate_threshold: float
+    tagging_mode: str
+    journal_path: str
+    max_page_bytes: int
+    extraction_mode: str
+    extraction_workers: int
+    yt_hedge_delay: float | None
+    yt_batch_window: float | None
+    chunk_tokens: int
+    llm_stream: bool
+    analyzer_hedge: bool
+    analyzer_timeout: float
+    analyzer_concurrency: int
+    tg_feed_ttl: float
+    breaker_threshold: int
+    breaker_reset: float
+    negative_cache_path: str
+    negative_cache_ttl: float
+    retry_queue_path: str
+    metrics_port: int
+    trace_path: str
 
     @staticmethod
     def from_env() -> "Config":
@@ -35,44 +85,250 @@ class Config:
             tg_api_key=os.environ.get("TG_API_KEY"),
             yt_api_key=os.environ.get("YT_API_KEY"),
             yandex_gpt_key=os.environ.get("YANDEX_GPT_KEY"),
-            yandex_gpt_catalog=os.environ.get("YANDEX_GPT_CATALOG")
+            yandex_gpt_catalog=os.environ.get("YANDEX_GPT_CATALOG"),
+            workers=int(os.environ.get("WORKERS", "0")),
+            batch_window=float(os.environ.get("BATCH_WINDOW", "1.0")),
+            webhook_url=os.environ.get("WEBHOOK_URL"),
+            webhook_secret=os.environ.get("WEBHOOK_SECRET"),
+            webhook_port=int(os.environ.get("WEBHOOK_PORT", "8080")),
+            update_dedup_path=os.environ.get("UPDATE_DEDUP_PATH"),
+            analysis_cache_path=os.environ.get("ANALYSIS_CACHE_PATH"),
+            url_index_path=os.environ.get("URL_INDEX_PATH"),
+            dedup_mode=os.environ.get("DEDUP_MODE", "skip"),
+            notion_outbox_path=os.environ.get("NOTION_OUTBOX_PATH"),
+            search_index_path=os.environ.get("SEARCH_INDEX_PATH"),
+            near_duplicate_path=os.environ.get("NEAR_DUPLICATE_PATH"),
+            near_duplicate_threshold=float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", "0.85")),
+            tagging_mode=os.environ.get("TAGGING_MODE", "off"),
+            journal_path=os.environ.get("JOURNAL_PATH"),
+            max_page_bytes=int(os.environ.get("MAX_PAGE_BYTES", str(2 * 1024 * 1024))),
+            extraction_mode=os.environ.get("EXTRACTION_MODE", "inline"),
+            extraction_workers=int(os.environ.get("EXTRACTION_WORKERS", "0")) or None,
+            yt_hedge_delay=float(os.environ["YT_HEDGE_DELAY"]) if os.environ.get("YT_HEDGE_DELAY") else None,
+            yt_batch_window=float(os.environ.get("YT_BATCH_WINDOW", "0.05")) or None,
+            chunk_tokens=int(os.environ.get("CHUNK_TOKENS", "0")),
+            llm_stream=os.environ.get("LLM_STREAM", "0") == "1",
+            analyzer_hedge=os.environ.get("ANALYZER_HEDGE", "0") == "1",
+            analyzer_timeout=float(os.environ.get("ANALYZER_TIMEOUT", "60")),
+            analyzer_concurrency=int(os.environ.get("ANALYZER_CONCURRENCY", "4")),
+            tg_feed_ttl=float(os.environ.get("TG_FEED_TTL", "300")),
+            breaker_threshold=int(os.environ.get("BREAKER_THRESHOLD", "5")),
+            breaker_reset=float(os.environ.get("BREAKER_RESET", "60")),
+            negative_cache_path=os.environ.get("NEGATIVE_CACHE_PATH"),
+            negative_cache_ttl=float(os.environ.get("NEGATIVE_CACHE_TTL", "3600")),
+            retry_queue_path=os.environ.get("RETRY_QUEUE_PATH"),
+            metrics_port=int(os.environ.get("METRICS_PORT", "0")),
+            trace_path=os.environ.get("TRACE_PATH"),
         )
 
 
-def create_info_fetcher(config: Config) -> UrlInfoFetcherContext:
-    text_analyzer = YandexGptTextAnalyzer(config.yandex_gpt_key, config.yandex_gpt_catalog)
+def create_tag_suggester(config: Config):
+    from analysis import TagSuggester
+
+    store = NotionUrlInfoStore(config.notion_api_key, config.notion_database_id)
+    suggester = TagSuggester(store.tag_names())
+    examples = suggester.fit((info.title, info.tags) for info, _ in store.iter_infos())
+    logger.error("fitted %s tags on %s pages", len(suggester.tags), examples)
+    return suggester
+
+
+def create_info_fetcher(
+    config: Config, transport: Transport, analyze_limit: int = 0, negative: NegativeCache | None = None
+) -> UrlInfoFetcherContext:
+    text_analyzer = YandexGptTextAnalyzer(
+        config.yandex_gpt_key, config.yandex_gpt_catalog, transport, stream=config.llm_stream
+    )
+    if config.gpt_api_key:
+        from analysis import GptTextAnalyzer
+
+        gpt_analyzer = GptTextAnalyzer(config.gpt_api_key, transport, stream=config.llm_stream)
+        text_analyzer = AnalyzerPool(
+            [
+                Provider("yandex", text_analyzer, config.analyzer_concurrency),
+                Provider("gpt", gpt_analyzer, config.analyzer_concurrency),
+            ],
+            timeout=config.analyzer_timeout,
+            hedge=config.analyzer_hedge,
+        )
+        get_tracer().add_gauges("analyzers", text_analyzer.stats)
+    if config.chunk_tokens:
+        text_analyzer = MapReduceTextAnalyzer(text_analyzer, token_budget=config.chunk_tokens)
+    if config.tagging_mode != "off":
+        from analysis import TaggingMode, TaggingTextAnalyzer
+
+        tagging_mode = TaggingMode(config.tagging_mode)
+        text_analyzer = TaggingTextAnalyzer(text_analyzer, create_tag_suggester(config), tagging_mode)
+
+    disk_cache = SqliteAnalysisCache(config.analysis_cache_path) if config.analysis_cache_path else None
+    text_analyzer = CachedTextAnalyzer(text_analyzer, disk=disk_cache)
+    if analyze_limit:
+        text_analyzer = BoundedTextAnalyzer(text_analyzer, analyze_limit)
+
+    executor = create_extraction_executor(config.extraction_mode, config.extraction_workers)
+
+    near_duplicates = None
+    if config.near_duplicate_path:
+        from analysis import NearDuplicateIndex
+
+        near_duplicates = NearDuplicateIndex(config.near_duplicate_path, config.near_duplicate_threshold)
+
+    breakers = HostCircuitBreakers(config.breaker_threshold, config.breaker_reset)
+    default_fetcher = GuardedUrlInfoFetcher(
+        DefaultUrlInfoFetcher(text_analyzer, transport, config.max_page_bytes, executor, near_duplicates),
+        breakers,
+        negative,
+    )
+    tg_fetcher = GuardedUrlInfoFetcher(
+        TgUrlInfoFetcher(text_analyzer, transport, config.max_page_bytes, executor), breakers, negative
+    )
+    yt_fetcher = YTUrlInfoFetcher(config.yt_api_key, text_analyzer, transport, config.yt_batch_window)
+    if config.yt_hedge_delay is not None:
+        yt_fetcher = HedgedUrlInfoFetcher(yt_fetcher, default_fetcher, config.yt_hedge_delay)
 
     strategies = [
-        YTUrlInfoFetcher(config.yt_api_key, text_analyzer),
-        TgUrlInfoFetcher(text_analyzer),
-        DefaultUrlInfoFetcher(text_analyzer),
+        yt_fetcher,
+        TgChannelUrlInfoFetcher(text_analyzer, TgChannelFeed(transport, config.tg_feed_ttl)),
+        tg_fetcher,
+        default_fetcher,
     ]
 
     return UrlInfoFetcherContext(strategies)
 
 
-def create_url_handler(config: Config) -> UrlHandler:
+def create_search_index(config: Config) -> SearchIndex | None:
+    if not config.search_index_path:
+        return None
+    search = SearchIndex(config.search_index_path)
+    if len(search) == 0:
+        store = NotionUrlInfoStore(config.notion_api_key, config.notion_database_id)
+        logger.error("bootstrapped search index with %s pages", search.bootstrap(store.iter_infos()))
+    return search
 
-    url_info_fetcher = create_info_fetcher(config)
-    store = NotionUrlInfoStore(config.notion_api_key, config.notion_database_id)
 
-    handler = UrlHandler(url_info_fetcher, store)
+def create_url_handler(
+    config: Config, analyze_limit: int = 0, store_limit: int = 0, search: SearchIndex | None = None
+) -> UrlHandler:
+    metrics = StageMetrics()
+    tracer = Tracer(metrics, JsonlSpanSink(config.trace_path) if config.trace_path else None)
+    set_tracer(tracer)
+    if config.metrics_port:
+        MetricsServer(tracer, config.metrics_port).start()
+    transport = Transport(metrics=metrics)
 
-    return handler
+    negative = None
+    if config.negative_cache_path:
+        negative = NegativeCache(config.negative_cache_path, config.negative_cache_ttl)
+    url_info_fetcher = create_info_fetcher(config, transport, analyze_limit, negative)
+    store = NotionUrlInfoStore(config.notion_api_key, config.notion_database_id, transport)
 
+    index = None
+    if config.url_index_path:
+        index = UrlIndex(config.url_index_path)
+        if len(index) == 0:
+            logger.error("bootstrapped url index with %s pages", index.bootstrap(store.iter_pages()))
 
-def main():
-    dotenv.load_dotenv()
+    retry_queue = RetryQueue(config.retry_queue_path) if config.retry_queue_path else None
+    if config.notion_outbox_path:
 
-    config = Config.from_env()
+        def on_created(info, page_id):
+            # a queued placeholder's page id is only known now; the retry must update that page
+            if index is not None:
+                index.add(info.url, page_id)
+            if retry_queue is not None:
+                retry_queue.set_page_id(info.url, page_id)
+
+        store = ThrottledUrlInfoStore(store, Outbox(config.notion_outbox_path), on_created=on_created)
+        tracer.add_gauges("notion_outbox", store.stats)
+        store.start()
+    elif store_limit:
+        store = BoundedUrlInfoStore(store, store_limit)
+    if search is not None:
+        store = FanOutUrlInfoStore(store, [search])
+
+    journal = Journal(config.journal_path) if config.journal_path else None
+    handler = UrlHandler(
+        url_info_fetcher,
+        store,
+        metrics=metrics,
+        index=index,
+        dedup_mode=DedupMode(config.dedup_mode),
+        retry_queue=retry_queue,
+        journal=journal,
+    )
+    if retry_queue is not None:
+        RetryWorker(handler, retry_queue, negative).start()
+    if journal is not None and len(journal):
+        logger.error("replaying %s unfinished urls", len(journal))
+        threading.Thread(target=handler.replay, name="replay", daemon=True).start()
 
-    handler = create_url_handler(config)
+    return handler
+
+
+def run_bot(config: Config, args):
+    if config.webhook_url and not config.webhook_secret:
+        raise ValueError("WEBHOOK_SECRET is required when WEBHOOK_URL is set")
+    search = create_search_index(config)
+    handler = create_url_handler(config, search=search)
     url_extractor = create_url_extractor()
 
-    bot = Bot(config.tg_api_key, handler, url_extractor)
+    bot = Bot(
+        config.tg_api_key,
+        handler,
+        url_extractor,
+        workers=config.workers,
+        batch_window=config.batch_window,
+        search=search,
+    )
 
     logger.error("start")
-    bot.run()
+    if config.webhook_url:
+        dedup = SqliteUpdateDedup(config.update_dedup_path) if config.update_dedup_path else None
+        bot.run_webhook(config.webhook_url, config.webhook_secret, port=config.webhook_port, dedup=dedup)
+    else:
+        bot.run()
+
+
+def run_import(config: Config, args):
+    handler = create_url_handler(
+        config, analyze_limit=args.analyze, store_limit=args.store, search=create_search_index(config)
+    )
+    checkpoint = Checkpoint(args.checkpoint or f"{args.file}.checkpoint")
+    total = sum(1 for _ in read_urls(args.file))
+
+    try:
+        stats = BulkImporter(handler, checkpoint, workers=args.fetch).run(read_urls(args.file), total)
+    finally:
+        checkpoint.close()
+
+    logger.error("import finished: %s", stats)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.set_defaults(run=run_bot)
+    commands = parser.add_subparsers()
+
+    bot = commands.add_parser("bot", help="run the telegram bot (default)")
+    bot.set_defaults(run=run_bot)
+
+    bulk = commands.add_parser("import", help="import urls from a text, jsonl or bookmarks html file")
+    bulk.add_argument("file")
+    bulk.add_argument("--checkpoint", help="progress file, defaults to <file>.checkpoint")
+    bulk.add_argument("--fetch", type=int, default=16, help="concurrent fetches")
+    bulk.add_argument("--analyze", type=int, default=4, help="concurrent analyzer calls")
+    bulk.add_argument("--store", type=int, default=2, help="concurrent notion writes")
+    bulk.set_defaults(run=run_import)
+
+    return parser.parse_args(argv)
+
+
+def main():
+    dotenv.load_dotenv()
+
+    args = parse_args()
+    config = Config.from_env()
+
+    args.run(config, args)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,121 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import UrlHandler
+from analysis.metrics import StageMetrics
+from bot import BatchProgress, Bot, MessageBatcher, create_url_extractor
+
+
+def message(text=None, chat_id=1, media_group_id=None):
+    mock_message = MagicMock()
+    mock_message.text = text
+    mock_message.caption = None
+    mock_message.entities = None
+    mock_message.caption_entities = None
+    mock_message.forward_from_message_id = None
+    mock_message.media_group_id = media_group_id
+    mock_message.chat.id = chat_id
+    return mock_message
+
+
+class TestMessageBatcher:
+
+    def test_groups_by_album_and_chat(self):
+        batches = []
+        batcher = MessageBatcher(batches.append, window=10)
+        a1, a2 = message(media_group_id="album"), message(media_group_id="album")
+        c1, c2, other = message(chat_id=1), message(chat_id=1), message(chat_id=2)
+
+        for m in (a1, c1, a2, c2, other):
+            batcher.add(m)
+        batcher.flush_all()
+
+        assert sorted(batches, key=len, reverse=True) == [[a1, a2], [c1, c2], [other]]
+
+    def test_flushes_after_window(self):
+        flushed = threading.Event()
+        batches = []
+        batcher = MessageBatcher(lambda batch: (batches.append(batch), flushed.set()), window=0.05)
+
+        batcher.add(message())
+        batcher.add(message())
+
+        assert flushed.wait(2)
+        assert len(batches) == 1 and len(batches[0]) == 2
+
+
+class TestBatchProgress:
+
+    def test_edits_one_message(self):
+        bot = MagicMock()
+        now = [0.0]
+        progress = BatchProgress(bot, message(), total=3, min_interval=1.0, clock=lambda: now[0])
+
+        progress.done()
+        now[0] = 1.0
+        progress.done(Exception())
+        progress.done()
+
+        bot.reply_to.assert_called_once()
+        assert bot.reply_to.call_args.args[1] == "wait... 0/3"
+        assert [c.args[0] for c in bot.edit_message_text.call_args_list] == [
+            "wait... 2/3",
+            "done: 2/3 links, 1 failed",
+        ]
+
+    def test_single_url(self):
+        bot = MagicMock()
+        progress = BatchProgress(bot, message(), total=1)
+
+        progress.done()
+
+        assert bot.reply_to.call_args.args[1] == "wait..."
+        assert bot.edit_message_text.call_args.args[0] == "done"
+
+
+class TestBot:
+
+    @pytest.fixture
+    def handler(self):
+        handler = MagicMock(UrlHandler)
+        handler.metrics = StageMetrics()
+        return handler
+
+    @pytest.fixture
+    def telebot_mock(self, mocker):
+        return mocker.patch("bot.bot.telebot.TeleBot").return_value
+
+    def test_batch_runs_all_urls(self, handler, telebot_mock):
+        bot = Bot("token", handler, create_url_extractor(), batch_window=0)
+
+        bot.handle_batch([message("https://a.com https://b.com"), message("https://a.com https://c.com")])
+
+        assert sorted(call.args[0] for call in handler.handle.call_args_list) == [
+            "https://a.com",
+            "https://b.com",
+            "https://c.com",
+        ]
+        telebot_mock.reply_to.assert_called_once()
+        assert telebot_mock.edit_message_text.call_args.args[0] == "done: 3 links"
+
+    def test_batch_with_job_queue(self, handler, telebot_mock):
+        bot = Bot("token", handler, create_url_extractor(), workers=2, batch_window=0)
+        bot._jobs.start()
+
+        bot.handle_url(message("https://a.com https://b.com"))
+        bot._jobs.join()
+        bot._jobs.stop()
+
+        assert handler.handle.call_count == 2
+        assert telebot_mock.edit_message_text.call_args.args[0] == "done: 2 links"
+
+    def test_no_links(self, handler, telebot_mock):
+        bot = Bot("token", handler, create_url_extractor(), batch_window=0)
+
+        bot.handle_url(message("hello"))
+
+        telebot_mock.reply_to.assert_called_once()
+        assert telebot_mock.reply_to.call_args.args[1] == "no links found"
+        handler.handle.assert_not_called()
@@ -0,0 +1,91 @@
+import argparse
+import ast
+import inspect
+import subprocess
+import sys
+
+import pytest
+
+import analysis
+from benchmarks.pipeline import percentiles, run
+from benchmarks.startup import LAZY, ROOT, check, parse_importtime
+from benchmarks.startup import run as run_startup
+
+
+def test_percentiles():
+    result = percentiles([float(n) for n in range(1, 101)])
+
+    assert result["p50"] == 50.5
+    assert 95 <= result["p95"] <= 96
+    assert 99 <= result["p99"] <= 100
+
+
+def test_pipeline_smoke():
+    args = argparse.Namespace(
+        urls=6,
+        concurrency=3,
+        warmup=1,
+        corpus=None,
+        llm="yandex",
+        stream=False,
+        llm_latency=0.0,
+        llm_jitter=0.0,
+        llm_error_rate=0.0,
+        notion_latency=0.0,
+        max_bytes=1024 * 1024,
+        extraction="inline",
+        extraction_workers=None,
+        seed=0,
+    )
+
+    result = run(args)
+
+    assert result["urls"] == 6
+    assert result["requests"]["pages"] == 7
+    assert result["requests"]["llm"] == 7
+    assert result["requests"]["notion"] == 7
+    assert result["stages"]["pipeline"]["count"] == 7
+    assert result["peak_rss_mb"] > 0
+
+
+def test_parse_importtime():
+    stderr = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |     httpx._models",
+            "import time:        80 |        200 |   httpx",
+            "import time:        50 |        250 | main",
+            "some other output",
+        ]
+    )
+
+    assert parse_importtime(stderr) == pytest.approx({"httpx": 0.0002, "main": 0.00005})
+
+
+def test_startup_loads_no_optional_dependencies():
+    result = run_startup(1)
+
+    assert result["eager"] == []
+    assert check(result, max_import_ms=None) == []
+    assert check({**result, "eager": list(LAZY)}, max_import_ms=None)
+
+
+def test_import_main_does_not_load_http_clients():
+    script = "import sys, main; print(sorted({'httpx', 'notion_client'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+
+    assert output.stdout.strip() == "[]"
+
+
+def test_lazy_exports():
+    assert analysis.UrlHandler.__module__ == "analysis.core"
+    with pytest.raises(AttributeError):
+        analysis.NoSuchThing
+
+
+def test_lazy_exports_match_type_checking_imports():
+    tree = ast.parse(inspect.getsource(analysis))
+    [block] = [node for node in tree.body if isinstance(node, ast.If) and ast.unparse(node.test) == "TYPE_CHECKING"]
+    imported = {alias.name: node.module for node in block.body for alias in node.names}
+
+    assert imported == analysis._EXPORTS
@@ -0,0 +1,217 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import (
+    CircuitBreaker,
+    DedupMode,
+    GuardedUrlInfoFetcher,
+    HostCircuitBreakers,
+    HostUnavailableException,
+    NegativeCache,
+    Outbox,
+    RetryQueue,
+    RetryWorker,
+    ThrottledUrlInfoStore,
+    UrlHandler,
+    UrlInfo,
+    UrlInfoFetcherContext,
+    UrlInfoStore,
+)
+from analysis.breaker import BreakerState
+from analysis.core import UrlInfoFetcher
+
+GOOD = UrlInfo(title="title", url="https://example.com/a", tags=[], summary="", keywords=[])
+NA = UrlInfo(title="N/A", url="https://example.com/a", tags=[], summary="", keywords=[])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+
+    def test_opens_and_recovers(self):
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+
+        breaker.record(ok=False)
+        assert breaker.allow()
+        breaker.record(ok=False)
+        assert breaker.state == BreakerState.OPEN
+        assert not breaker.allow()
+
+        clock.now += 10
+        assert breaker.allow()
+        assert breaker.state == BreakerState.HALF_OPEN
+        assert not breaker.allow()
+
+        breaker.record(ok=True)
+        assert breaker.state == BreakerState.CLOSED
+
+    def test_failed_probe_reopens(self):
+        clock = Clock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record(ok=False)
+        clock.now += 10
+        breaker.allow()
+
+        breaker.record(ok=False)
+
+        assert breaker.state == BreakerState.OPEN
+        assert not breaker.allow()
+
+
+class TestNegativeCache:
+
+    def test_ttl_and_persistence(self, tmp_path):
+        clock = Clock()
+        path = str(tmp_path / "negative.sqlite")
+        cache = NegativeCache(path, ttl=60, clock=clock)
+
+        cache.add("https://example.com/a?utm_source=x", "timeout")
+
+        assert cache.get("https://example.com/a") == "timeout"
+        assert NegativeCache(path, ttl=60, clock=clock).get("https://example.com/a") == "timeout"
+        clock.now += 60
+        assert cache.get("https://example.com/a") is None
+
+    def test_remove(self):
+        cache = NegativeCache(":memory:")
+        cache.add("https://example.com/a", "timeout")
+
+        cache.remove("https://example.com/a")
+
+        assert cache.get("https://example.com/a") is None
+
+
+class TestGuardedUrlInfoFetcher:
+
+    def test_trips_per_host(self):
+        fetcher = MagicMock(spec=UrlInfoFetcher)
+        fetcher.get_info.return_value = NA
+        guarded = GuardedUrlInfoFetcher(fetcher, HostCircuitBreakers(failure_threshold=2))
+
+        guarded.get_info("https://example.com/a")
+        guarded.get_info("https://example.com/b")
+        with pytest.raises(HostUnavailableException):
+            guarded.get_info("https://example.com/c")
+
+        fetcher.get_info.return_value = GOOD
+        assert guarded.get_info("https://other.com/a") == GOOD
+        assert fetcher.get_info.call_count == 3
+
+    def test_unhandled_url_releases_probe(self):
+        clock = Clock()
+        fetcher = MagicMock(spec=UrlInfoFetcher)
+        fetcher.get_info.return_value = NA
+        guarded = GuardedUrlInfoFetcher(
+            fetcher, HostCircuitBreakers(failure_threshold=1, reset_timeout=10, clock=clock)
+        )
+        guarded.get_info("https://example.com/a")
+        clock.now += 10
+
+        fetcher.get_info.return_value = None
+        assert guarded.get_info("http://example.com/b") is None
+        fetcher.get_info.return_value = GOOD
+        assert guarded.get_info("https://example.com/c") == GOOD
+
+        assert guarded._breakers.get("https://example.com").state == BreakerState.CLOSED
+
+    def test_negative_cache(self):
+        fetcher = MagicMock(spec=UrlInfoFetcher)
+        fetcher.get_info.side_effect = ConnectionError()
+        negative = NegativeCache(":memory:")
+        guarded = GuardedUrlInfoFetcher(fetcher, HostCircuitBreakers(), negative)
+
+        with pytest.raises(ConnectionError):
+            guarded.get_info("https://example.com/a")
+        with pytest.raises(HostUnavailableException):
+            guarded.get_info("https://example.com/a")
+
+        assert fetcher.get_info.call_count == 1
+        assert guarded.rejected == 1
+
+
+class TestRetry:
+
+    def test_placeholder_is_upgraded(self):
+        clock = Clock()
+        fetcher = MagicMock(spec=UrlInfoFetcherContext)
+        fetcher.get_info.side_effect = HostUnavailableException()
+        store = MagicMock(spec=UrlInfoStore)
+        store.create_page.return_value = "page-1"
+        queue = RetryQueue(":memory:", base_delay=10, clock=clock)
+        handler = UrlHandler(fetcher, store, retry_queue=queue)
+
+        handler.handle("https://example.com/a")
+
+        store.create_page.assert_called_once()
+        assert store.create_page.call_args.args[0].title == "N/A"
+        assert len(queue) == 1
+
+        worker = RetryWorker(handler, queue)
+        assert worker.run_once() == 0
+        clock.now += 10
+        fetcher.get_info.side_effect = None
+        fetcher.get_info.return_value = GOOD
+
+        assert worker.run_once() == 1
+        store.update_page.assert_called_once_with("page-1", GOOD)
+        assert len(queue) == 0
+        assert worker.upgraded == 1
+
+    def test_placeholder_written_through_outbox_is_upgraded(self, tmp_path):
+        clock = Clock()
+        fetcher = MagicMock(spec=UrlInfoFetcherContext)
+        fetcher.get_info.side_effect = HostUnavailableException()
+        store = MagicMock(spec=UrlInfoStore)
+        store.create_page.return_value = "page-1"
+        queue = RetryQueue(":memory:", base_delay=10, clock=clock)
+        on_created = lambda info, page_id: queue.set_page_id(info.url, page_id)
+        throttled = ThrottledUrlInfoStore(store, Outbox(str(tmp_path / "outbox.db")), rate=1000, on_created=on_created)
+        handler = UrlHandler(fetcher, throttled, retry_queue=queue)
+
+        handler.handle("https://example.com/a")
+        throttled.drain_one()
+        clock.now += 10
+        fetcher.get_info.side_effect = None
+        fetcher.get_info.return_value = GOOD
+        RetryWorker(handler, queue).run_once()
+        throttled.drain_one()
+
+        store.create_page.assert_called_once()
+        store.update_page.assert_called_once_with("page-1", GOOD)
+
+    def test_existing_page_not_overwritten(self):
+        fetcher = MagicMock(spec=UrlInfoFetcherContext)
+        fetcher.get_info.return_value = NA
+        store = MagicMock(spec=UrlInfoStore)
+        index = MagicMock()
+        index.get.return_value = "page-1"
+        queue = RetryQueue(":memory:")
+
+        UrlHandler(fetcher, store, index=index, dedup_mode=DedupMode.UPDATE, retry_queue=queue).handle(GOOD.url)
+
+        store.update_page.assert_not_called()
+        store.create_page.assert_not_called()
+        assert queue.due() == [] and len(queue) == 1
+
+    def test_dropped_after_max_attempts(self):
+        clock = Clock()
+        handler = MagicMock()
+        handler.retry.return_value = False
+        queue = RetryQueue(":memory:", base_delay=1, max_delay=1, max_attempts=2, clock=clock)
+        queue.put("https://example.com/a", "page-1")
+        worker = RetryWorker(handler, queue)
+
+        for _ in range(2):
+            clock.now += 1
+            worker.run_once()
+
+        assert len(queue) == 0
+        assert worker.dropped == 1
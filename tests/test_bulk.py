@@ -0,0 +1,58 @@
+import io
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import UrlHandler
+from analysis.bulk import BulkImporter, Checkpoint, read_urls
+
+
+@pytest.mark.parametrize(
+    "name, content, expected",
+    [
+        (
+            "urls.txt",
+            "https://a.com\n\nsee https://b.com/x, and http://c.com\n",
+            ["https://a.com", "https://b.com/x", "http://c.com"],
+        ),
+        (
+            "urls.jsonl",
+            '{"url": "https://a.com"}\n{"body": "text https://b.com text"}\n\n',
+            ["https://a.com", "https://b.com"],
+        ),
+        ("bookmarks.html", '<DT><A HREF="https://a.com" ADD_DATE="1">A</A>\n<a href="ftp://x">', ["https://a.com"]),
+    ],
+)
+def test_read_urls(tmp_path, name, content, expected):
+    path = tmp_path / name
+    path.write_text(content)
+
+    assert list(read_urls(str(path))) == list(enumerate(expected))
+
+
+class TestBulkImporter:
+
+    def test_run_and_resume(self, tmp_path):
+        def handle(url):
+            if url == "https://b.com":
+                raise Exception("Error")
+
+        handler = MagicMock(UrlHandler)
+        handler.handle.side_effect = handle
+        path = str(tmp_path / "checkpoint")
+        items = [(0, "https://a.com"), (1, "https://b.com"), (2, "https://c.com")]
+
+        checkpoint = Checkpoint(path)
+        stats = BulkImporter(handler, checkpoint, workers=2, out=io.StringIO()).run(items, 3)
+        checkpoint.close()
+
+        assert (stats.done, stats.failed) == (2, 1)
+
+        handler.handle.reset_mock()
+        handler.handle.side_effect = None
+        checkpoint = Checkpoint(path)
+        stats = BulkImporter(handler, checkpoint, workers=2, out=io.StringIO()).run(items, 3)
+        checkpoint.close()
+
+        handler.handle.assert_called_once_with("https://b.com")
+        assert (stats.done, stats.skipped) == (1, 2)
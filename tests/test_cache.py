@@ -0,0 +1,77 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import CachedTextAnalyzer, SqliteAnalysisCache, TextInfo
+from analysis.cache import cache_key
+from analysis.core import TextAnalyzer
+
+
+class TestCachedTextAnalyzer:
+
+    @pytest.fixture
+    def analyzer(self):
+        analyzer = MagicMock(spec=TextAnalyzer)
+        analyzer.model_id = "model"
+        analyzer.prompt_version = "v1"
+        analyzer.max_chars = 10
+        analyzer.get_info.return_value = TextInfo(title="title", tags=["tag"], summary="summary", keywords=["k"])
+        return analyzer
+
+    def test_hit_on_same_normalized_text(self, analyzer):
+        cached = CachedTextAnalyzer(analyzer)
+
+        first = cached.get_info("some  text")
+        second = cached.get_info(" some text\n")
+
+        assert first == second
+        analyzer.get_info.assert_called_once_with("some  text")
+        assert cached.stats() == {"size": 1, "hits": 1, "disk_hits": 0, "misses": 1}
+
+    def test_returned_lists_are_copies(self, analyzer):
+        cached = CachedTextAnalyzer(analyzer)
+
+        first = cached.get_info("some text")
+        first.tags.append("mutated")
+        first.keywords.clear()
+
+        assert cached.get_info("some text") == TextInfo(title="title", tags=["tag"], summary="summary", keywords=["k"])
+
+    def test_key_uses_truncated_text(self, analyzer):
+        cached = CachedTextAnalyzer(analyzer)
+
+        cached.get_info("0123456789 tail one")
+        cached.get_info("0123456789 tail two")
+
+        assert analyzer.get_info.call_count == 1
+
+    def test_key_depends_on_prompt_version(self):
+        assert cache_key("text", "model", "v1") != cache_key("text", "model", "v2")
+
+    def test_lru_eviction(self, analyzer):
+        cached = CachedTextAnalyzer(analyzer, max_size=1)
+
+        cached.get_info("a")
+        cached.get_info("b")
+        cached.get_info("a")
+
+        assert analyzer.get_info.call_count == 3
+
+    def test_ttl_expiry(self, analyzer):
+        cached = CachedTextAnalyzer(analyzer, ttl=-1)
+
+        cached.get_info("a")
+        cached.get_info("a")
+
+        assert analyzer.get_info.call_count == 2
+
+    def test_disk_tier(self, analyzer, tmp_path):
+        path = str(tmp_path / "cache.db")
+        CachedTextAnalyzer(analyzer, disk=SqliteAnalysisCache(path)).get_info("a")
+
+        cached = CachedTextAnalyzer(analyzer, disk=SqliteAnalysisCache(path))
+        info = cached.get_info("a")
+
+        assert info == TextInfo(title="title", tags=["tag"], summary="summary", keywords=["k"])
+        assert analyzer.get_info.call_count == 1
+        assert cached.disk_hits == 1
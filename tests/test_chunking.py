@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+
+from analysis import MapReduceTextAnalyzer, TextInfo, chunk_text, estimate_tokens
+from analysis.core import TextAnalyzer
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("one two three") == 3
+    assert estimate_tokens("Привет, мир!") == 5
+
+
+def test_chunk_text_keeps_sentences_together():
+    text = "First sentence here. Second one follows. Third is last."
+
+    chunks = chunk_text(text, max_tokens=10)
+
+    assert chunks == ["First sentence here. Second one follows.", "Third is last."]
+    assert all(estimate_tokens(chunk) <= 10 for chunk in chunks)
+
+
+def test_chunk_text_splits_long_sentence():
+    chunks = chunk_text("word " * 100, max_tokens=13)
+
+    assert len(chunks) == 10
+    assert " ".join(chunks) == ("word " * 100).strip()
+
+
+def test_chunk_text_respects_max_chars():
+    chunks = chunk_text("Short one. " * 20, max_tokens=1000, max_chars=50)
+
+    assert all(len(chunk) <= 50 for chunk in chunks)
+
+
+class TestMapReduceTextAnalyzer:
+
+    def test_short_text_single_call(self):
+        analyzer = MagicMock(spec=TextAnalyzer)
+        analyzer.get_info.return_value = TextInfo("title", ["tag"], "summary", ["k"])
+
+        info = MapReduceTextAnalyzer(analyzer, token_budget=100).get_info("Short text.")
+
+        assert info == TextInfo("title", ["tag"], "summary", ["k"])
+        analyzer.get_info.assert_called_once_with("Short text.")
+
+    def test_map_reduce(self):
+        def get_info(text):
+            if text.startswith("A"):
+                return TextInfo("A", ["Python", "Web"], "about a", ["x"])
+            if text.startswith("B"):
+                return TextInfo("B", ["python", "Db"], "about b", ["y", "x"])
+            return TextInfo("Final", ["Python"], "final summary", [])
+
+        analyzer = MagicMock(spec=TextAnalyzer)
+        analyzer.get_info.side_effect = get_info
+        text = "A " + "a " * 20 + ". B " + "b " * 20 + "."
+
+        info = MapReduceTextAnalyzer(analyzer, token_budget=30, max_tags=2).get_info(text)
+
+        assert info == TextInfo("Final", ["Python", "Web"], "final summary", ["x", "y"])
+        analyzer.get_info.assert_called_with("about a\nabout b")
+
+    def test_max_chunks(self):
+        analyzer = MagicMock(spec=TextAnalyzer)
+        analyzer.get_info.return_value = TextInfo("t", [], "s", [])
+
+        MapReduceTextAnalyzer(analyzer, token_budget=5, max_chunks=2, reduce_with_llm=False).get_info(
+            "One two three. " * 10
+        )
+
+        assert analyzer.get_info.call_count == 2
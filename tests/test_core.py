@@ -1,9 +1,14 @@
-from unittest.mock import MagicMock
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from analysis import UrlHandler, UrlInfo, UrlInfoStore
 from analysis import UrlInfoFetcherContext, UrlInfoFetcher, NoUrlInfoFetcherException
+from analysis import DedupMode, UrlIndex
+from analysis import FetcherRouter, HedgedUrlInfoFetcher
+from analysis import AsyncUrlHandler, AsyncUrlInfoFetcherContext, AsyncUrlInfoStore, SyncUrlInfoFetcherAdapter
 
 
 class TestUrlHandler:
@@ -37,6 +42,47 @@ class TestUrlHandler:
 
         store.create_page.assert_called_with(UrlInfo("N/A", "http://url.com", [], "", []))
 
+    def test_handle_records_page_in_index(self, fetcher, store):
+        fetcher.get_info.return_value = UrlInfo("Title", "http://url.com", [], "", [])
+        store.create_page.return_value = "page-1"
+        index = MagicMock(UrlIndex)
+        index.get.return_value = None
+
+        UrlHandler(fetcher, store, index=index).handle("http://url.com")
+
+        index.add.assert_called_once_with("http://url.com", "page-1")
+
+    def test_handle_skips_saved_url(self, fetcher, store):
+        index = MagicMock(UrlIndex)
+        index.get.return_value = "page-1"
+
+        UrlHandler(fetcher, store, index=index).handle("http://url.com")
+
+        fetcher.get_info.assert_not_called()
+        store.create_page.assert_not_called()
+
+    def test_handle_updates_saved_url(self, fetcher, store):
+        info = UrlInfo("Title", "http://url.com", [], "", [])
+        fetcher.get_info.return_value = info
+        index = MagicMock(UrlIndex)
+        index.get.return_value = "page-1"
+
+        UrlHandler(fetcher, store, index=index, dedup_mode=DedupMode.UPDATE).handle("http://url.com")
+
+        store.update_page.assert_called_once_with("page-1", info)
+        store.create_page.assert_not_called()
+
+    def test_handle_force_creates_new_page(self, fetcher, store):
+        fetcher.get_info.return_value = UrlInfo("Title", "http://url.com", [], "", [])
+        store.create_page.return_value = "page-2"
+        index = MagicMock(UrlIndex)
+        index.get.return_value = "page-1"
+
+        UrlHandler(fetcher, store, index=index, dedup_mode=DedupMode.FORCE).handle("http://url.com")
+
+        store.create_page.assert_called_once()
+        index.add.assert_called_once_with("http://url.com", "page-2")
+
 
 class TestUrlInfoFetcherContext:
 
@@ -68,3 +114,147 @@ class TestUrlInfoFetcherContext:
 
         with pytest.raises(NoUrlInfoFetcherException):
             context.get_info(url)
+
+
+class TestAsyncUrlHandler:
+
+    def test_handle(self):
+        fetcher = MagicMock(AsyncUrlInfoFetcherContext)
+        fetcher.get_info = AsyncMock(return_value=UrlInfo("Title", "http://url.com", ["tag1"], "summary", ["k"]))
+        store = MagicMock(AsyncUrlInfoStore)
+        store.create_page = AsyncMock()
+
+        asyncio.run(AsyncUrlHandler(fetcher, store).handle("http://url.com"))
+
+        store.create_page.assert_awaited_with(UrlInfo("Title", "http://url.com", ["tag1"], "summary", ["k"]))
+
+    def test_handle_exception(self):
+        fetcher = MagicMock(AsyncUrlInfoFetcherContext)
+        fetcher.get_info = AsyncMock(side_effect=Exception("Error"))
+        store = MagicMock(AsyncUrlInfoStore)
+        store.create_page = AsyncMock()
+
+        asyncio.run(AsyncUrlHandler(fetcher, store).handle("http://url.com"))
+
+        store.create_page.assert_awaited_with(UrlInfo("N/A", "http://url.com", [], "", []))
+
+
+class TestAsyncUrlInfoFetcherContext:
+
+    def test_returns_info_from_first_matching_strategy(self):
+        url = "http://example.com"
+        expected = UrlInfo("title", url, ["tag"], "summary", ["k"])
+
+        strategies = [
+            MagicMock(get_info=AsyncMock(return_value=None)),
+            MagicMock(get_info=AsyncMock(return_value=expected)),
+        ]
+
+        assert asyncio.run(AsyncUrlInfoFetcherContext(strategies).get_info(url)) == expected
+
+    def test_raises_if_no_match(self):
+        strategies = [MagicMock(get_info=AsyncMock(return_value=None))]
+
+        with pytest.raises(NoUrlInfoFetcherException):
+            asyncio.run(AsyncUrlInfoFetcherContext(strategies).get_info("http://example.com"))
+
+    def test_sync_fetcher_adapter(self):
+        url = "http://example.com"
+        expected = UrlInfo("title", url, ["tag"], "summary", ["k"])
+        fetcher = MagicMock(spec=UrlInfoFetcher)
+        fetcher.get_info.return_value = expected
+
+        context = AsyncUrlInfoFetcherContext([SyncUrlInfoFetcherAdapter(fetcher)])
+
+        assert asyncio.run(context.get_info(url)) == expected
+
+
+class TestFetcherRouter:
+
+    def fetcher(self, hosts=None):
+        fetcher = MagicMock(spec=UrlInfoFetcher)
+        if hosts is not None:
+            fetcher.hosts = frozenset(hosts)
+        return fetcher
+
+    def test_routes_by_host(self):
+        yt = self.fetcher({"www.youtube.com"})
+        tg = self.fetcher({"t.me"})
+        default = self.fetcher()
+        router = FetcherRouter([yt, tg, default])
+
+        assert router.route("https://www.youtube.com/watch?v=1") == [yt, default]
+        assert router.route("https://t.me/chat/1") == [tg, default]
+        assert router.route("https://example.com") == [default]
+
+    def test_wildcard_host(self):
+        substack = self.fetcher({"*.substack.com"})
+        default = self.fetcher()
+        router = FetcherRouter([substack, default])
+
+        assert router.route("https://blog.substack.com/p/1") == [substack, default]
+        assert router.route("https://substack.com/p/1") == [default]
+
+    def test_wildcard_fetcher_kept_for_exact_host(self):
+        substack = self.fetcher({"*.substack.com"})
+        blog = self.fetcher({"blog.substack.com"})
+        default = self.fetcher()
+        router = FetcherRouter([substack, blog, default])
+
+        assert router.route("https://blog.substack.com/p/1") == [substack, blog, default]
+        assert router.route("https://news.substack.com/p/1") == [substack, default]
+
+    def test_context_skips_fetchers_for_other_hosts(self):
+        url = "http://example.com"
+        expected = UrlInfo("title", url, [], "", [])
+        yt = self.fetcher({"www.youtube.com"})
+        default = self.fetcher()
+        default.get_info.return_value = expected
+
+        assert UrlInfoFetcherContext([yt, default]).get_info(url) == expected
+        yt.get_info.assert_not_called()
+
+
+class TestHedgedUrlInfoFetcher:
+
+    def test_returns_primary_without_hedging(self):
+        expected = UrlInfo("title", "http://url.com", [], "", [])
+        primary = MagicMock(get_info=MagicMock(return_value=expected))
+        secondary = MagicMock()
+        fetcher = HedgedUrlInfoFetcher(primary, secondary, delay=1)
+
+        assert fetcher.get_info("http://url.com") == expected
+        secondary.get_info.assert_not_called()
+
+    def test_secondary_wins_when_primary_is_slow(self):
+        release = threading.Event()
+        expected = UrlInfo("title", "http://url.com", [], "", [])
+
+        def slow(url):
+            release.wait(5)
+            return UrlInfo("slow", url, [], "", [])
+
+        fetcher = HedgedUrlInfoFetcher(
+            MagicMock(get_info=MagicMock(side_effect=slow)),
+            MagicMock(get_info=MagicMock(return_value=expected)),
+            delay=0.01,
+        )
+
+        assert fetcher.get_info("http://url.com") == expected
+        assert fetcher.secondary_wins == 1
+        release.set()
+
+    def test_secondary_used_when_primary_fails(self):
+        expected = UrlInfo("title", "http://url.com", [], "", [])
+        primary = MagicMock(get_info=MagicMock(side_effect=Exception("Error")))
+        secondary = MagicMock(get_info=MagicMock(return_value=expected))
+
+        assert HedgedUrlInfoFetcher(primary, secondary, delay=1).get_info("http://url.com") == expected
+
+    def test_failed_primary_is_logged_once(self, caplog):
+        expected = UrlInfo("title", "http://url.com", [], "", [])
+        primary = MagicMock(get_info=MagicMock(side_effect=Exception("Error")))
+        secondary = MagicMock(get_info=MagicMock(return_value=expected))
+
+        assert HedgedUrlInfoFetcher(primary, secondary, delay=1).get_info("http://url.com") == expected
+        assert [record.message for record in caplog.records] == ["hedged fetch failed"]
@@ -0,0 +1,54 @@
+import pytest
+
+from analysis import UrlIndex, canonicalize_url
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://www.example.com/post/?utm_source=tg&id=1&fbclid=x", "https://example.com/post?id=1"),
+        ("http://example.com/#section", "https://example.com/"),
+        ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+        ("https://youtu.be/abc123?si=xyz", "https://youtube.com/watch?v=abc123"),
+        ("https://www.youtube.com/watch?v=abc123&x=123", "https://youtube.com/watch?v=abc123"),
+        ("https://m.youtube.com/shorts/abc123", "https://youtube.com/watch?v=abc123"),
+        ("https://t.me/SomeChat/123?embed=1&mode=tme", "https://t.me/somechat/123"),
+        ("https://t.me/s/somechat/123", "https://t.me/somechat/123"),
+        ("https://telegram.me/somechat/123", "https://t.me/somechat/123"),
+        ("https://t.me/c/1234567/5", "https://t.me/c/1234567/5"),
+        ("https://t.me/c/1234567/6?single", "https://t.me/c/1234567/6"),
+        ("https://github.com/org/repo/blob/main/a.py?ref=dev", "https://github.com/org/repo/blob/main/a.py?ref=dev"),
+        ("https://www.youtube.com/@channel?si=xyz&feature=shared", "https://youtube.com/@channel"),
+        ("https://x.com/user/status/1?s=20&t=abc", "https://x.com/user/status/1"),
+    ],
+)
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+class TestUrlIndex:
+
+    def test_add_and_get_variant(self, tmp_path):
+        index = UrlIndex(str(tmp_path / "index.db"))
+
+        index.add("https://youtu.be/abc123", "page-1")
+
+        assert index.get("https://www.youtube.com/watch?v=abc123") == "page-1"
+        assert index.get("https://example.com") is None
+
+    def test_persists(self, tmp_path):
+        path = str(tmp_path / "index.db")
+        UrlIndex(path).add("https://example.com/a", "page-1")
+
+        assert UrlIndex(path).get("https://example.com/a/") == "page-1"
+
+    def test_bootstrap(self, tmp_path):
+        index = UrlIndex(str(tmp_path / "index.db"))
+
+        count = index.bootstrap(
+            [("https://example.com/a", "page-1"), (None, "page-2"), ("https://b.com", "page-3")], batch_size=1
+        )
+
+        assert count == 2
+        assert len(index) == 2
+        assert index.get("https://b.com") == "page-3"
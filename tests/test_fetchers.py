@@ -1,10 +1,19 @@
+import asyncio
+import io
+
+import httpx
+import requests
 import pytest
 from pytest_mock import MockerFixture
-from unittest.mock import MagicMock
+from unittest.mock import ANY, AsyncMock, MagicMock
+import lxml.html
 import trafilatura
 
 from analysis import TextInfo, UrlInfo, DefaultUrlInfoFetcher, TgUrlInfoFetcher, YTUrlInfoFetcher
+from analysis import AsyncDefaultUrlInfoFetcher
+from analysis import ExtractionExecutor, Transport, create_extraction_executor
 from analysis.core import TextAnalyzer
+from analysis.fetchers import _extract_once, _prune
 
 
 class TestDefaultUrlInfoFetcher:
@@ -31,11 +40,15 @@ class TestDefaultUrlInfoFetcher:
         mock_metadata.return_value = MagicMock(title="title")
 
         analyzer = fetcher._analyzer
-        analyzer.get_info.return_value = TextInfo(title="title", tags=["tag1", "tag2"], summary="summary", keywords=["k"])
+        analyzer.get_info.return_value = TextInfo(
+            title="title", tags=["tag1", "tag2"], summary="summary", keywords=["k"]
+        )
 
         url_info = fetcher.get_info("http://example.com")
 
-        assert url_info == UrlInfo(url="http://example.com", title="title", tags=["tag1", "tag2"], summary="summary", keywords=["k"])
+        assert url_info == UrlInfo(
+            url="http://example.com", title="title", tags=["tag1", "tag2"], summary="summary", keywords=["k"]
+        )
 
     def test_fetch_failure(self, fetcher, mock_fetch, mock_metadata):
         mock_fetch.side_effect = Exception("Fetch error")
@@ -74,7 +87,11 @@ class TestTgUrlInfoFetcher:
         info = fetcher.get_info(url)
 
         assert info == UrlInfo(
-            url=url, title=mock_text_info.title, tags=mock_text_info.tags, summary=mock_text_info.summary, keywords=mock_text_info.keywords
+            url=url,
+            title=mock_text_info.title,
+            tags=mock_text_info.tags,
+            summary=mock_text_info.summary,
+            keywords=mock_text_info.keywords,
         )
 
 
@@ -97,10 +114,167 @@ class TestYTUrlInfoFetcher:
 
         info = fetcher.get_info(url)
 
-        assert info == UrlInfo(url=url, title="Video title", summary="Video description", tags=["tag1", "tag2"], keywords=["k"])
+        assert info == UrlInfo(
+            url=url, title="Video title", summary="Video description", tags=["tag1", "tag2"], keywords=["k"]
+        )
 
         mock_analyzer.get_info.assert_called_once_with(f"{info.title}\n{info.summary}")
 
         mock_client.videos.return_value.list.assert_called_once_with(
             part="snippet,contentDetails,statistics", id=video_id
         )
+
+    def test_get_info_batched(self, mocker: MockerFixture):
+        mock_build = mocker.patch("analysis.fetchers.build")
+        mock_client = mock_build.return_value
+        mock_client.videos.return_value.list.return_value.execute.return_value = {
+            "items": [{"id": "abc123", "snippet": {"title": "Video title", "description": "Video description"}}]
+        }
+        mock_analyzer = mocker.Mock(spec=TextAnalyzer)
+        mock_analyzer.get_info.return_value = TextInfo(title="", summary="", tags=["tag1"], keywords=["k"])
+
+        fetcher = YTUrlInfoFetcher("api_key", mock_analyzer, batch_window=0.01)
+
+        info = fetcher.get_info("https://www.youtube.com/watch?v=abc123")
+
+        assert info.title == "Video title"
+        mock_client.videos.return_value.list.assert_called_once_with(
+            part="snippet,contentDetails,statistics", id="abc123"
+        )
+
+
+class TestAsyncDefaultUrlInfoFetcher:
+
+    def client(self, handler) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def test_success(self, monkeypatch):
+        monkeypatch.setattr(trafilatura, "extract_metadata", MagicMock(return_value=MagicMock(title="title")))
+        analyzer = MagicMock()
+        analyzer.get_info = AsyncMock(return_value=TextInfo(title="", tags=["tag1"], summary="summary", keywords=["k"]))
+        fetcher = AsyncDefaultUrlInfoFetcher(analyzer, self.client(lambda request: httpx.Response(200, text="content")))
+
+        url_info = asyncio.run(fetcher.get_info("http://example.com"))
+
+        assert url_info == UrlInfo(
+            url="http://example.com", title="title", tags=["tag1"], summary="summary", keywords=["k"]
+        )
+
+    def test_fetch_failure(self):
+        fetcher = AsyncDefaultUrlInfoFetcher(MagicMock(), self.client(lambda request: httpx.Response(500)))
+
+        url_info = asyncio.run(fetcher.get_info("http://example.com"))
+
+        assert url_info == UrlInfo(url="http://example.com", title="N/A", tags=[], summary="", keywords=[])
+
+
+class TestStreamingDefaultUrlInfoFetcher:
+
+    def response(self, body: bytes, content_type: str = "text/html; charset=utf-8") -> requests.Response:
+        r = requests.Response()
+        r.status_code = 200
+        r.headers["Content-Type"] = content_type
+        r.raw = io.BytesIO(body)
+        return r
+
+    @pytest.fixture
+    def transport(self):
+        return MagicMock(Transport)
+
+    @pytest.fixture
+    def analyzer(self):
+        analyzer = MagicMock(spec=TextAnalyzer)
+        analyzer.max_chars = 100
+        analyzer.get_info.return_value = TextInfo(title="", tags=["tag"], summary="summary", keywords=["k"])
+        return analyzer
+
+    def test_success(self, transport, analyzer):
+        html = (
+            "<html><head><title>Title</title></head><body><article><p>"
+            + "Some sentence here. " * 50
+            + "</p></article></body></html>"
+        )
+        transport.get.return_value = self.response(html.encode())
+        fetcher = DefaultUrlInfoFetcher(analyzer, transport, max_bytes=1024 * 1024)
+
+        url_info = fetcher.get_info("http://example.com")
+
+        assert url_info == UrlInfo(
+            url="http://example.com", title="Title", tags=["tag"], summary="summary", keywords=["k"]
+        )
+        transport.get.assert_called_once_with("http://example.com", stream=True, headers=ANY)
+        assert transport.get.call_args.kwargs["headers"]["User-Agent"].startswith("trafilatura/")
+        text = analyzer.get_info.call_args.args[0]
+        assert text.startswith("Some sentence here.") and len(text) == 100
+
+    def test_truncates_body(self, transport, analyzer, mocker):
+        extract = mocker.patch("analysis.fetchers._extract_once", return_value=(MagicMock(title="t"), ""))
+        transport.get.return_value = self.response(b"<html>" + b"x" * 200_000)
+        fetcher = DefaultUrlInfoFetcher(analyzer, transport, max_bytes=1000)
+
+        fetcher.get_info("http://example.com")
+
+        assert len(extract.call_args.args[0]) == 1000
+
+    @pytest.mark.parametrize(
+        "content_type, body", [("application/pdf", b"%PDF-1.4"), ("", b"%PDF-1.4 ..."), ("image/png", b"")]
+    )
+    def test_skips_binary_content(self, transport, analyzer, content_type, body):
+        transport.get.return_value = self.response(body, content_type)
+        fetcher = DefaultUrlInfoFetcher(analyzer, transport, max_bytes=1000)
+
+        url_info = fetcher.get_info("http://example.com/file")
+
+        assert url_info == UrlInfo(url="http://example.com/file", title="N/A", tags=[], summary="", keywords=[])
+        analyzer.get_info.assert_not_called()
+
+
+class TestExtractionExecutor:
+
+    HTML = (
+        "<html><head><title>Title</title></head><body><article><p>"
+        + "Some sentence here. " * 50
+        + "</p></article></body></html>"
+    )
+
+    @pytest.mark.parametrize("mode", ["inline", "thread", "process"])
+    def test_extract(self, mode):
+        executor = create_extraction_executor(mode, 1)
+
+        meta, text = executor.extract(self.HTML, "http://example.com", 20)
+
+        assert meta.title == "Title"
+        assert text == "Some sentence here. "
+        if hasattr(executor, "shutdown"):
+            executor.shutdown()
+
+    def test_prunes_tree_to_budget(self):
+        tree = lxml.html.fromstring(
+            "<html><body><main>" + "".join(f"<p>paragraph {i}</p>" for i in range(1000)) + "</main></body></html>"
+        )
+
+        _prune(tree, 20)
+
+        paragraphs = tree.findall(".//p")
+        assert 0 < len(paragraphs) < 20
+        assert paragraphs[0].text == "paragraph 0"
+
+    def test_extract_keeps_text_within_budget(self):
+        html = "<html><body><article>" + "<p>Some sentence here.</p>" * 5000 + "</article></body></html>"
+
+        _, text = _extract_once(html, "http://example.com", 100)
+
+        assert text.startswith("Some sentence here.") and len(text) == 100
+
+    def test_fetcher_uses_executor(self, mocker):
+        mocker.patch.object(trafilatura, "fetch_url", return_value="content")
+        executor = MagicMock(ExtractionExecutor)
+        executor.extract.return_value = (MagicMock(title="title"), "text")
+        analyzer = MagicMock()
+        analyzer.max_chars = 10
+        analyzer.get_info.return_value = TextInfo.empty()
+
+        DefaultUrlInfoFetcher(analyzer, executor=executor).get_info("http://example.com")
+
+        executor.extract.assert_called_once_with("content", "http://example.com", 10)
+        analyzer.get_info.assert_called_once_with("text")
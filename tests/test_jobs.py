@@ -0,0 +1,61 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import UrlHandler
+from analysis.metrics import StageMetrics
+from bot import JobQueue
+
+
+class TestJobQueue:
+
+    @pytest.fixture
+    def handler(self):
+        handler = MagicMock(UrlHandler)
+        handler.metrics = StageMetrics()
+        return handler
+
+    def test_runs_jobs_and_reports_done(self, handler):
+        done = []
+        jobs = JobQueue(handler, lambda job, error: done.append((job.url, job.context, error)), workers=2)
+        jobs.start()
+
+        jobs.submit("http://a.com", "msg-a")
+        jobs.submit("http://b.com", "msg-b")
+        jobs.join()
+        jobs.stop()
+
+        assert sorted(done) == [("http://a.com", "msg-a", None), ("http://b.com", "msg-b", None)]
+        assert jobs.completed == 2
+        stats = jobs.stats()
+        assert stats["stages"]["wait"]["count"] == 2
+        assert stats["stages"]["handle"]["count"] == 2
+
+    def test_reports_error(self, handler):
+        error = Exception("Error")
+        handler.handle.side_effect = error
+        done = []
+        jobs = JobQueue(handler, lambda job, e: done.append(e), workers=1)
+        jobs.start()
+
+        jobs.submit("http://a.com")
+        jobs.join()
+        jobs.stop()
+
+        assert done == [error]
+        assert jobs.failed == 1
+
+    def test_submit_does_not_wait_for_handler(self, handler):
+        release = threading.Event()
+        handler.handle.side_effect = lambda url: release.wait(5)
+        jobs = JobQueue(handler, lambda job, e: None, workers=1)
+        jobs.start()
+
+        jobs.submit("http://a.com")
+        jobs.submit("http://b.com")
+
+        assert jobs.depth + jobs.in_flight >= 1
+        release.set()
+        jobs.join()
+        jobs.stop()
@@ -0,0 +1,181 @@
+import json
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import Journal, Stage, UrlHandler, UrlInfo, UrlInfoFetcherContext, UrlInfoStore
+
+
+def info(url="https://a.com"):
+    return UrlInfo(title="title", url=url, tags=["tag"], summary="summary", keywords=["k"])
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "journal.jsonl")
+
+
+class TestJournal:
+
+    def test_replays_unfinished_entries(self, path):
+        journal = Journal(path)
+        accepted = journal.accept("https://a.com")
+        analyzed = journal.accept("https://b.com")
+        journal.analyzed(analyzed, info("https://b.com"))
+        stored = journal.accept("https://c.com")
+        journal.stored(stored)
+        journal.close()
+
+        entries = Journal(path).unfinished()
+
+        assert [(e.id, e.url, e.stage, e.info) for e in entries] == [
+            (accepted.id, "https://a.com", Stage.ACCEPTED, None),
+            (analyzed.id, "https://b.com", Stage.ANALYZED, info("https://b.com")),
+        ]
+
+    def test_accept_reuses_open_entry(self, path):
+        journal = Journal(path)
+        entry = journal.accept("https://a.com")
+
+        assert journal.accept("https://a.com") is entry
+        journal.stored(entry)
+        assert journal.accept("https://a.com").id == entry.id + 1
+
+    def test_gives_up_after_max_attempts(self, path):
+        journal = Journal(path, max_attempts=2)
+        entry = journal.accept("https://a.com")
+        journal.failed(entry, RuntimeError("boom"))
+        journal.close()
+
+        journal = Journal(path, max_attempts=2)
+        [entry] = journal.unfinished()
+        assert entry.attempts == 1
+        journal.failed(entry, RuntimeError("boom"))
+
+        assert journal.unfinished() == []
+        journal.close()
+        assert len(Journal(path)) == 0
+
+    def test_ignores_torn_line_and_compacts(self, path):
+        journal = Journal(path)
+        for i in range(5):
+            journal.stored(journal.accept(f"https://a.com/{i}"))
+        entry = journal.accept("https://b.com")
+        journal.close()
+        with open(path, "a") as f:
+            f.write('{"id": 99, "url": "https://c.')
+
+        journal = Journal(path)
+
+        assert [e.url for e in journal.unfinished()] == ["https://b.com"]
+        with open(path) as f:
+            assert [json.loads(line)["id"] for line in f] == [entry.id]
+        assert journal.accept("https://c.com").id == entry.id + 1
+
+    def test_concurrent_appends_share_fsyncs(self, path):
+        journal = Journal(path, flush_delay=0.01)
+        barrier = threading.Barrier(20)
+
+        def accept(i):
+            barrier.wait()
+            journal.accept(f"https://a.com/{i}")
+
+        threads = [threading.Thread(target=accept, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(journal) == 20
+        assert journal.syncs < 20
+        with open(path) as f:
+            assert len(f.readlines()) == 20
+
+    def test_closed_journal_rejects_appends(self, path):
+        journal = Journal(path)
+        journal.close()
+
+        with pytest.raises(RuntimeError):
+            journal.accept("https://a.com")
+
+
+class TestUrlHandlerJournal:
+
+    @pytest.fixture
+    def fetcher(self):
+        fetcher = MagicMock(UrlInfoFetcherContext)
+        fetcher.get_info.side_effect = lambda url: info(url)
+        return fetcher
+
+    @pytest.fixture
+    def store(self):
+        store = MagicMock(UrlInfoStore)
+        store.create_page.return_value = "page-1"
+        return store
+
+    def test_store_failure_is_replayed_without_refetching(self, path, fetcher, store):
+        store.create_page.side_effect = RuntimeError("notion is down")
+        handler = UrlHandler(fetcher, store, journal=Journal(path))
+        handler.accept("https://a.com")
+
+        with pytest.raises(RuntimeError):
+            handler.handle("https://a.com")
+        handler._journal.close()
+
+        store.create_page.side_effect = None
+        handler = UrlHandler(fetcher, store, journal=Journal(path))
+
+        assert handler.replay() == 1
+        assert fetcher.get_info.call_count == 1
+        store.create_page.assert_called_with(info("https://a.com"))
+        assert handler.replay() == 0
+
+    def test_accepted_url_is_replayed(self, path, fetcher, store):
+        journal = Journal(path)
+        UrlHandler(fetcher, store, journal=journal).accept("https://a.com")
+        journal.close()
+
+        assert UrlHandler(fetcher, store, journal=Journal(path)).replay() == 1
+        fetcher.get_info.assert_called_once_with("https://a.com")
+        store.create_page.assert_called_once()
+
+    def test_url_sent_during_replay_is_handled_once(self, path, fetcher, store):
+        journal = Journal(path)
+        UrlHandler(fetcher, store, journal=journal).accept("https://a.com")
+        journal.close()
+        handler = UrlHandler(fetcher, store, journal=Journal(path))
+        started, resume = threading.Event(), threading.Event()
+
+        def get_info(url):
+            started.set()
+            resume.wait(5)
+            return info(url)
+
+        fetcher.get_info.side_effect = get_info
+        replay = threading.Thread(target=handler.replay)
+        replay.start()
+        assert started.wait(5)
+        handler.handle("https://a.com")
+        resume.set()
+        replay.join()
+
+        fetcher.get_info.assert_called_once_with("https://a.com")
+        store.create_page.assert_called_once()
+        assert handler._journal.unfinished() == []
+
+    def test_claim(self, path):
+        journal = Journal(path)
+        entry = journal.accept("https://a.com")
+
+        assert journal.claim(entry)
+        assert not journal.claim(entry)
+        journal.release(entry)
+        journal.stored(entry)
+        assert not journal.claim(entry)
+
+    def test_handled_url_is_finished(self, path, fetcher, store):
+        journal = Journal(path)
+        UrlHandler(fetcher, store, journal=journal).handle("https://a.com")
+
+        assert journal.unfinished() == []
@@ -0,0 +1,109 @@
+import random
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+import trafilatura
+
+from analysis import DefaultUrlInfoFetcher, MinHasher, NearDuplicateIndex, TextInfo, shingle_hashes, similarity
+
+WORDS = [f"word{i}" for i in range(2000)]
+
+
+def article(seed: int, length: int = 400) -> str:
+    return " ".join(random.Random(seed).choices(WORDS, k=length))
+
+
+def repost(text: str) -> str:
+    """The same article with a different header and footer and one word changed."""
+    words = text.split()
+    words[len(words) // 2] = "edited"
+    return "Reposted from elsewhere. " + " ".join(words) + " Subscribe to our newsletter!"
+
+
+class TestMinHasher:
+
+    def test_shingles(self):
+        assert len(shingle_hashes("a b c d e f", size=5)) == 2
+        assert len(shingle_hashes("a b c d e a b c d e", size=5)) == 5
+        assert len(shingle_hashes("a b c", size=5)) == 0
+
+    def test_similarity_estimates_jaccard(self):
+        hasher = MinHasher()
+        text = article(1)
+
+        assert similarity(hasher.signature(text), hasher.signature(text.upper())) == 1.0
+        assert similarity(hasher.signature(text), hasher.signature(repost(text))) > 0.85
+        assert similarity(hasher.signature(text), hasher.signature(article(2))) < 0.1
+
+    def test_signature_is_deterministic(self):
+        text = article(1)
+
+        assert np.array_equal(MinHasher(seed=7).signature(text), MinHasher(seed=7).signature(text))
+        assert MinHasher().signature("too short") is None
+
+    def test_long_text_is_hashed_in_blocks(self):
+        hasher = MinHasher(num_perm=16)
+        text = article(1, length=10000)
+        shingles = shingle_hashes(text)
+        expected = ((shingles[:, None] * hasher._a + hasher._b) % np.uint64(4294967291)).min(axis=0)
+
+        assert np.array_equal(hasher.signature(text), expected)
+
+
+class TestNearDuplicateIndex:
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        return NearDuplicateIndex(str(tmp_path / "neardup.db"))
+
+    def test_finds_near_duplicate(self, index):
+        info = TextInfo(title="title", tags=["tag"], summary="summary", keywords=["k"])
+        text = article(1)
+        index.add("https://a.com", index.signature(text), info)
+
+        assert index.find(index.signature(repost(text))) == ("https://a.com", info)
+        assert index.find(index.signature(article(2))) is None
+        assert index.stats() == {"hits": 1, "misses": 1}
+
+    def test_persists(self, tmp_path):
+        path = str(tmp_path / "neardup.db")
+        text = article(1)
+        index = NearDuplicateIndex(path)
+        index.add("https://a.com", index.signature(text), TextInfo.empty())
+
+        assert len(NearDuplicateIndex(path)) == 1
+        assert NearDuplicateIndex(path).find(index.signature(text))[0] == "https://a.com"
+
+    def test_ignores_short_texts(self, index):
+        assert index.signature("Access denied. Please enable cookies.") is None
+        assert index.signature(None) is None
+
+    def test_bands_must_divide_permutations(self, tmp_path):
+        with pytest.raises(ValueError):
+            NearDuplicateIndex(str(tmp_path / "neardup.db"), bands=7)
+
+
+class TestDefaultUrlInfoFetcherNearDuplicates:
+
+    def test_reuses_analysis_of_near_duplicate(self, tmp_path, monkeypatch):
+        text = article(1)
+        pages = {"https://a.com": text, "https://amp.a.com": repost(text), "https://b.com": article(2)}
+        monkeypatch.setattr(trafilatura, "fetch_url", lambda url: url)
+        monkeypatch.setattr(trafilatura, "extract_metadata", lambda page: MagicMock(title=page))
+        monkeypatch.setattr(trafilatura, "extract", lambda page: pages[page])
+        analyzer = MagicMock()
+        analyzer.get_info.side_effect = lambda text: TextInfo(title="", tags=[], summary=text[:10], keywords=[])
+        fetcher = DefaultUrlInfoFetcher(analyzer, near_duplicates=NearDuplicateIndex(str(tmp_path / "neardup.db")))
+
+        original = fetcher.get_info("https://a.com")
+        duplicate = fetcher.get_info("https://amp.a.com")
+        other = fetcher.get_info("https://b.com")
+
+        assert analyzer.get_info.call_count == 2
+        assert (duplicate.url, duplicate.title, duplicate.summary) == (
+            "https://amp.a.com",
+            "https://amp.a.com",
+            original.summary,
+        )
+        assert other.summary != original.summary
@@ -1,16 +1,28 @@
-from unittest.mock import MagicMock
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, call
 
 import pytest
 from pytest_mock import MockerFixture
 
-from analysis import NotionUrlInfoStore, UrlInfo
+from analysis import AsyncNotionUrlInfoStore, NotionUrlInfoStore, UrlInfo
+
+
+def paragraph(text, color="default"):
+    return {
+        "object": "block",
+        "paragraph": {"rich_text": [{"text": {"content": text}, "annotations": {"color": color}}]},
+    }
+
+
+def generated(text):
+    return paragraph(text, "gray")
 
 
 class TestNotionUrlInfoStore:
 
     @pytest.fixture
     def store(self, mocker: MockerFixture):
-        mocker.patch("analysis.notion.NotionClient")
+        mocker.patch("notion_client.Client")
         return NotionUrlInfoStore("key", "db_id")
 
     def test_create_page(self, store):
@@ -27,8 +39,102 @@ class TestNotionUrlInfoStore:
                 "Tags": {"multi_select": [{"name": tag} for tag in info.tags]},
                 "List": {"select": {"name": "Inbox"}},
             },
-            children=[
-                {"object": "block", "paragraph": {"rich_text": [{"text": {"content": info.summary}}]}},
-                {"object": "block", "paragraph": {"rich_text": [{"text": {"content": ", ".join(info.keywords)}}]}},
-            ],
+            children=[generated(info.summary), generated(", ".join(info.keywords))],
+        )
+
+    def test_create_page_returns_id(self, store):
+        store._client.pages.create.return_value = {"id": "page-1"}
+
+        assert store.create_page(UrlInfo("Example", "https://example.com", [], "summary", [])) == "page-1"
+
+    def test_update_page_keeps_user_blocks(self, store):
+        store._client.blocks.children.list.side_effect = [
+            {
+                "results": [{"id": "b1", **generated("old")}, {"id": "note", **paragraph("mine")}],
+                "has_more": True,
+                "next_cursor": "c",
+            },
+            {"results": [{"id": "b2", **generated("old, k")}, {"id": "b3", **generated("stale")}], "has_more": False},
+        ]
+        info = UrlInfo("Example", "https://example.com", ["tag1"], "summary", keywords=["k"])
+
+        store.update_page("page-1", info)
+
+        store._client.pages.update.assert_called_once_with(
+            page_id="page-1",
+            properties={
+                "Name": {"title": [{"text": {"content": "Example"}}]},
+                "Tags": {"multi_select": [{"name": "tag1"}]},
+            },
+        )
+        store._client.blocks.children.list.assert_called_with(block_id="page-1", page_size=100, start_cursor="c")
+        assert store._client.blocks.update.call_args_list == [
+            call(block_id="b1", paragraph=generated("summary")["paragraph"]),
+            call(block_id="b2", paragraph=generated("k")["paragraph"]),
+        ]
+        store._client.blocks.delete.assert_called_once_with(block_id="b3")
+        store._client.blocks.children.append.assert_not_called()
+
+    def test_update_page_without_generated_blocks_appends(self, store):
+        store._client.blocks.children.list.return_value = {"results": [{"id": "note", **paragraph("mine")}]}
+        info = UrlInfo("Example", "https://example.com", [], "summary", keywords=["k"])
+
+        store.update_page("page-1", info)
+
+        store._client.blocks.delete.assert_not_called()
+        store._client.blocks.children.append.assert_called_once_with(
+            block_id="page-1", children=[generated("summary"), generated("k")]
+        )
+
+    def test_iter_pages(self, store):
+        store._client.databases.query.side_effect = [
+            {
+                "results": [{"id": "p1", "properties": {"URL": {"url": "https://a.com"}}}],
+                "has_more": True,
+                "next_cursor": "c",
+            },
+            {"results": [{"id": "p2", "properties": {"URL": {"url": "https://b.com"}}}], "has_more": False},
+        ]
+
+        assert list(store.iter_pages()) == [("https://a.com", "p1"), ("https://b.com", "p2")]
+        store._client.databases.query.assert_called_with(database_id="db_id", page_size=100, start_cursor="c")
+
+    def test_tag_names(self, store):
+        store._client.databases.retrieve.return_value = {
+            "properties": {"Tags": {"multi_select": {"options": [{"name": "Python"}, {"name": "Databases"}]}}}
+        }
+
+        assert store.tag_names() == ["Python", "Databases"]
+        store._client.databases.retrieve.assert_called_once_with(database_id="db_id")
+
+    def test_iter_infos(self, store):
+        properties = {
+            "Name": {"title": [{"plain_text": "Some "}, {"plain_text": "title"}]},
+            "URL": {"url": "https://a.com"},
+            "Tags": {"multi_select": [{"name": "tag1"}, {"name": "tag2"}]},
+        }
+        store._client.databases.query.return_value = {"results": [{"id": "p1", "properties": properties}]}
+
+        assert list(store.iter_infos()) == [
+            (UrlInfo(title="Some title", url="https://a.com", tags=["tag1", "tag2"], summary="", keywords=[]), "p1")
+        ]
+
+
+class TestAsyncNotionUrlInfoStore:
+
+    def test_update_page_keeps_user_blocks(self, mocker: MockerFixture):
+        mocker.patch("notion_client.AsyncClient", return_value=AsyncMock())
+        store = AsyncNotionUrlInfoStore("key", "db_id")
+        store._client.blocks.children.list.return_value = {
+            "results": [{"id": "note", **paragraph("mine")}, {"id": "b1", **generated("old")}],
+            "has_more": False,
+        }
+        info = UrlInfo("Example", "https://example.com", [], "summary", keywords=["k"])
+
+        asyncio.run(store.update_page("page-1", info))
+
+        store._client.blocks.update.assert_called_once_with(block_id="b1", paragraph=generated("summary")["paragraph"])
+        store._client.blocks.delete.assert_not_called()
+        store._client.blocks.children.append.assert_called_once_with(
+            block_id="page-1", children=[generated("k")], after="b1"
         )
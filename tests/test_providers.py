@@ -0,0 +1,134 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import AnalyzerPool, NoProviderAvailableException, Provider, TextInfo
+from analysis.core import TextAnalyzer
+from analysis.tracing import Tracer, render_prometheus
+
+INFO = TextInfo("title", ["tag"], "summary", ["keyword"])
+OTHER = TextInfo("other", [], "", [])
+
+
+def analyzer(result=INFO, delay=0.0):
+    mock = MagicMock(spec=TextAnalyzer)
+
+    def get_info(text):
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    mock.get_info.side_effect = get_info
+    return mock
+
+
+class TestAnalyzerPool:
+
+    def test_prefers_faster_provider(self):
+        slow, fast = Provider("slow", analyzer(OTHER)), Provider("fast", analyzer(INFO))
+        slow.record(2.0, ok=True)
+        fast.record(0.1, ok=True)
+
+        assert AnalyzerPool([slow, fast]).get_info("text") == INFO
+        slow.analyzer.get_info.assert_not_called()
+
+    def test_error_rate_penalty(self):
+        flaky, steady = Provider("flaky", analyzer(OTHER)), Provider("steady", analyzer(INFO))
+        flaky.record(0.1, ok=False)
+        steady.record(0.25, ok=True)
+
+        assert AnalyzerPool([flaky, steady]).get_info("text") == INFO
+
+    def test_failover_on_error(self):
+        broken, backup = Provider("broken", analyzer(ValueError("boom"))), Provider("backup", analyzer(INFO))
+        pool = AnalyzerPool([broken, backup])
+
+        assert pool.get_info("text") == INFO
+        assert pool.failovers == 1
+        assert pool.stats()["providers"]["broken"]["errors"] == 1
+
+    def test_stats_in_prometheus(self):
+        broken, backup = Provider("broken", analyzer(ValueError("boom"))), Provider("backup", analyzer(INFO))
+        pool = AnalyzerPool([broken, backup])
+        pool.get_info("text")
+        tracer = Tracer()
+        tracer.add_gauges("analyzers", pool.stats)
+
+        body = render_prometheus(tracer)
+
+        assert 'component_stat{component="analyzers",stat="failovers"} 1' in body
+        assert 'component_stat{component="analyzers",stat="providers.broken.errors"} 1' in body
+        assert 'stat="providers.backup.avg_latency"' in body
+
+    def test_failover_on_timeout(self):
+        stuck, backup = Provider("stuck", analyzer(OTHER, delay=0.5)), Provider("backup", analyzer(INFO))
+        backup.record(1.0, ok=True)
+        pool = AnalyzerPool([stuck, backup], timeout=0.05)
+
+        assert pool.get_info("text") == INFO
+        assert stuck.timeouts == 1
+
+    def test_all_fail(self):
+        pool = AnalyzerPool([Provider("a", analyzer(ValueError("a"))), Provider("b", analyzer(ValueError("b")))])
+
+        with pytest.raises(ValueError):
+            pool.get_info("text")
+
+    def test_hedge(self):
+        slow, fast = Provider("slow", analyzer(OTHER, delay=0.5)), Provider("fast", analyzer(INFO))
+        fast.record(1.0, ok=True)
+        pool = AnalyzerPool([slow, fast], hedge=True, min_hedge_delay=0.05)
+
+        start = time.monotonic()
+        assert pool.get_info("text") == INFO
+        assert time.monotonic() - start < 0.4
+        assert pool.hedged == 1
+
+    def test_concurrency_limit(self):
+        release = threading.Event()
+        busy = Provider("busy", analyzer(INFO), max_concurrency=1)
+        busy.analyzer.get_info.side_effect = lambda text: release.wait() and INFO
+        other = Provider("other", analyzer(OTHER))
+        other.record(1.0, ok=True)
+        pool = AnalyzerPool([busy, other])
+
+        first = threading.Thread(target=pool.get_info, args=("one",))
+        first.start()
+        while busy.in_flight == 0:
+            time.sleep(0.001)
+
+        assert pool.get_info("two") == OTHER
+        release.set()
+        first.join()
+        assert busy.in_flight == 0
+
+    def test_waits_for_a_free_slot(self):
+        busy = Provider("busy", analyzer(INFO), max_concurrency=1)
+        pool = AnalyzerPool([busy], timeout=5)
+        assert busy.try_acquire()
+        threading.Timer(0.05, busy.release).start()
+
+        assert pool.get_info("text") == INFO
+
+    def test_gives_up_waiting_for_a_slot(self):
+        busy = Provider("busy", analyzer(INFO), max_concurrency=1)
+        pool = AnalyzerPool([busy], timeout=0.05)
+        assert busy.try_acquire()
+
+        with pytest.raises(NoProviderAvailableException):
+            pool.get_info("text")
+        busy.analyzer.get_info.assert_not_called()
+
+    def test_cache_identity(self):
+        a, b = analyzer(), analyzer()
+        a.model_id, a.prompt_version, a.max_chars = "m1", "p1", 2000
+        b.model_id, b.prompt_version, b.max_chars = "m2", "p2", None
+
+        pool = AnalyzerPool([Provider("a", a), Provider("b", b)])
+
+        assert pool.model_id == "m1+m2"
+        assert pool.prompt_version == "p1+p2"
+        assert pool.max_chars is None
@@ -0,0 +1,129 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import FanOutUrlInfoStore, SearchIndex, UrlHandler, UrlInfo, UrlInfoStore, match_query
+from analysis.metrics import StageMetrics
+from bot import Bot, create_url_extractor
+
+
+def info(url, title, tags=(), summary="", keywords=()):
+    return UrlInfo(url=url, title=title, tags=list(tags), summary=summary, keywords=list(keywords))
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SearchIndex(str(tmp_path / "search.db"))
+
+
+class TestMatchQuery:
+
+    def test_quotes_words(self):
+        assert match_query('consistency "OR" -patterns') == '"consistency" "OR" "patterns"'
+
+    def test_tags_and_prefixes(self):
+        assert match_query("#databases consist*") == 'tags:"databases" "consist"*'
+
+    def test_no_words(self):
+        assert match_query("?! -") == ""
+
+
+class TestSearchIndex:
+
+    def test_ranks_title_and_tags_first(self, index):
+        index.add(info("https://a.com", "Cooking pasta", summary="notes on eventual consistency in kitchens"))
+        index.add(info("https://b.com", "Consistency patterns", tags=["distributed systems"]))
+
+        assert [result.url for result in index.search("consistency")] == ["https://b.com", "https://a.com"]
+
+    def test_round_trips_fields(self, index):
+        saved = info("https://a.com/x", "Title", tags=["a b", "c"], summary="sum", keywords=["k1", "k2"])
+        index.add(saved)
+
+        assert index.search("title") == [saved]
+
+    def test_stemming_prefix_and_tags(self, index):
+        index.add(info("https://a.com", "Designing caches", tags=["databases"]))
+        index.add(info("https://b.com", "Databases explained"))
+
+        assert [r.url for r in index.search("cache")] == ["https://a.com"]
+        assert [r.url for r in index.search("explain*")] == ["https://b.com"]
+        assert [r.url for r in index.search("#databases")] == ["https://a.com"]
+
+    def test_saving_again_replaces_entry(self, index):
+        index.create_page(info("https://www.a.com/?utm_source=x", "Old title"))
+        index.update_page("page-1", info("https://a.com", "New title"))
+
+        assert len(index) == 1
+        assert index.search("old") == []
+        assert [r.title for r in index.search("new")] == ["New title"]
+
+    def test_bootstrap(self, index):
+        pages = [(info(f"https://a.com/{i}", f"Post {i}"), f"p{i}") for i in range(5)]
+        pages.append((info(None, "no url"), "p"))
+
+        assert index.bootstrap(pages, batch_size=2) == 5
+        assert len(index) == 5
+
+    def test_operators_in_input_are_safe(self, index):
+        index.add(info("https://a.com", "C++ NEAR AND OR"))
+
+        assert [r.url for r in index.search('c++ AND "near')] == ["https://a.com"]
+
+
+class TestFanOutUrlInfoStore:
+
+    def test_mirrors_writes_with_primary_page_id(self, index):
+        primary = MagicMock(UrlInfoStore)
+        primary.create_page.return_value = "page-1"
+        store = FanOutUrlInfoStore(primary, [index])
+
+        assert store.create_page(info("https://a.com", "Title")) == "page-1"
+        store.update_page("page-1", info("https://a.com", "Better title"))
+
+        assert [r.title for r in index.search("title")] == ["Better title"]
+
+    def test_failing_mirror_does_not_fail_write(self):
+        primary, mirror = MagicMock(UrlInfoStore), MagicMock(UrlInfoStore)
+        primary.create_page.return_value = None
+        mirror.create_page.side_effect = RuntimeError("disk full")
+
+        assert FanOutUrlInfoStore(primary, [mirror]).create_page(info("https://a.com", "Title")) is None
+        mirror.create_page.assert_called_once()
+
+
+class TestSearchCommand:
+
+    @pytest.fixture
+    def telebot_mock(self, mocker):
+        return mocker.patch("bot.bot.telebot.TeleBot").return_value
+
+    def bot(self, index):
+        handler = MagicMock(UrlHandler)
+        handler.metrics = StageMetrics()
+        return Bot("token", handler, create_url_extractor(), batch_window=0, search=index)
+
+    def test_replies_with_results(self, index, telebot_mock):
+        index.add(info("https://a.com", "Consistency patterns"))
+        message = MagicMock()
+        message.text = "/search consistency"
+
+        self.bot(index).send_search(message)
+
+        telebot_mock.reply_to.assert_called_once_with(
+            message, "1. Consistency patterns\nhttps://a.com", disable_web_page_preview=True
+        )
+
+    def test_nothing_found_and_usage(self, index, telebot_mock):
+        bot = self.bot(index)
+        message = MagicMock()
+
+        message.text = "/search consistency"
+        bot.send_search(message)
+        message.text = "/search"
+        bot.send_search(message)
+
+        assert [call.args[1] for call in telebot_mock.reply_to.call_args_list] == [
+            "nothing found",
+            "usage: /search <words>, #tag or prefix*",
+        ]
@@ -0,0 +1,187 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import (
+    GptTextAnalyzer,
+    IncrementalJsonParser,
+    MalformedResponseException,
+    TextInfo,
+    Transport,
+    YandexGptTextAnalyzer,
+)
+from analysis.streaming import parse_stream, with_retries
+
+RESPONSE = '{"title": "T, {x}", "tags": ["a", "b"], "keywords": ["k"], "summary": "s \\" q"}'
+INFO = TextInfo(title="T, {x}", tags=["a", "b"], summary='s " q', keywords=["k"])
+
+
+def pieces(text, size=3):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+class TestIncrementalJsonParser:
+
+    def test_parse_in_pieces(self):
+        parser = IncrementalJsonParser()
+
+        results = [parser.feed(piece) for piece in pieces(RESPONSE)]
+
+        assert results[-1] == INFO
+        assert all(result is None for result in results[:-1])
+
+    def test_code_fence_and_trailing_text(self):
+        close = MagicMock()
+
+        info = parse_stream(pieces("```json\n" + RESPONSE + "\n```\nSome explanation"), close=close)
+
+        assert info == INFO
+        close.assert_called_once()
+
+    def test_stops_on_complete_object(self):
+        consumed = []
+
+        def stream():
+            for piece in pieces(RESPONSE + " and more text that is never read", 10):
+                consumed.append(piece)
+                yield piece
+
+        assert parse_stream(stream()) == INFO
+        assert "".join(consumed).startswith(RESPONSE)
+        assert len("".join(consumed)) < len(RESPONSE) + 10
+
+    def test_rejects_prose_early(self):
+        parser = IncrementalJsonParser()
+
+        with pytest.raises(MalformedResponseException):
+            parser.feed("Конечно! Вот ")
+
+    @pytest.mark.parametrize(
+        "member",
+        ['"title": 1,', '"tags": "a",', '"tags": [1],', '"author": "x",'],
+    )
+    def test_rejects_bad_field_before_end(self, member):
+        parser = IncrementalJsonParser()
+
+        with pytest.raises(MalformedResponseException):
+            parser.feed("{" + member)
+
+    def test_missing_field(self):
+        with pytest.raises(MalformedResponseException):
+            parse_stream(['{"title": "t", "tags": []}'])
+
+    def test_incomplete(self):
+        with pytest.raises(MalformedResponseException):
+            parse_stream(['{"title": "t", "tags": ['])
+
+
+def test_with_retries():
+    attempt = MagicMock(side_effect=[MalformedResponseException("bad"), INFO])
+
+    assert with_retries(attempt, 2) == INFO
+    assert attempt.call_count == 2
+
+
+def test_with_retries_gives_up():
+    attempt = MagicMock(side_effect=MalformedResponseException("bad"))
+
+    with pytest.raises(MalformedResponseException):
+        with_retries(attempt, 3)
+    assert attempt.call_count == 3
+
+
+class TestYandexGptStreaming:
+
+    @staticmethod
+    def lines(text):
+        # Yandex sends the whole alternative so far on every line
+        return [
+            json.dumps({"result": {"alternatives": [{"message": {"text": text[:i]}}]}}).encode()
+            for i in range(5, len(text) + 5, 5)
+        ]
+
+    def test_streaming(self):
+        transport = MagicMock()
+        response = transport.post.return_value
+        response.iter_lines.return_value = self.lines(RESPONSE)
+        analyzer = YandexGptTextAnalyzer("key", "catalog", transport, stream=True)
+
+        assert analyzer.get_info("text") == INFO
+        assert transport.post.call_args.kwargs["stream"] is True
+        assert transport.post.call_args.kwargs["json"]["completionOptions"]["stream"] is True
+        response.close.assert_called_once()
+
+    def test_retries_malformed(self):
+        transport = MagicMock()
+        bad, good = MagicMock(), MagicMock()
+        bad.iter_lines.return_value = self.lines("Sorry, I can not do that.")
+        good.iter_lines.return_value = self.lines(RESPONSE)
+        transport.post.side_effect = [bad, good]
+        analyzer = YandexGptTextAnalyzer("key", "catalog", transport, stream=True)
+
+        assert analyzer.get_info("text") == INFO
+        assert transport.post.call_count == 2
+
+
+def test_gpt_streaming():
+    analyzer = GptTextAnalyzer("key", stream=True)
+    analyzer._client = MagicMock()
+    stream = analyzer._client.chat.completions.create.return_value
+    stream.__iter__.return_value = [
+        MagicMock(choices=[MagicMock(delta=MagicMock(content=p))]) for p in pieces(RESPONSE)
+    ]
+
+    assert analyzer.get_info("text") == INFO
+    assert analyzer._client.chat.completions.create.call_args.kwargs["stream"] is True
+    stream.close.assert_called_once()
+
+
+@pytest.fixture
+def sse_server():
+    """Streams ``RESPONSE`` as chat completion chunks, then holds the connection open until the test ends."""
+    done = threading.Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for piece in pieces(RESPONSE, 10):
+                chunk = {
+                    "id": "1",
+                    "object": "chat.completion.chunk",
+                    "created": 0,
+                    "model": "m",
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                event = f"data: {json.dumps(chunk)}\n\n".encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+                self.wfile.flush()
+            done.wait(10)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    done.set()
+    server.shutdown()
+    server.server_close()
+
+
+def test_gpt_streaming_through_transport(sse_server):
+    analyzer = GptTextAnalyzer("key", transport=Transport(), stream=True, base_url=sse_server)
+
+    start = time.perf_counter()
+    assert analyzer.get_info("text") == INFO
+    # the body never ends, so a transport that buffered it would wait for the server's 10 s timeout
+    assert time.perf_counter() - start < 5
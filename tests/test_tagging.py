@@ -0,0 +1,95 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import TagSuggester, TaggingMode, TaggingTextAnalyzer, TextInfo, tag_key
+
+TAGS = ["System Design", "Databases", "Python", "Machine Learning", "Базы данных"]
+EXAMPLES = [
+    ("Designing data intensive applications: replication and partitioning", ["system-design", "Databases"]),
+    ("PostgreSQL index internals", ["databases"]),
+    ("asyncio in Python 3.12", ["python"]),
+    ("Gradient descent explained", ["machine learning"]),
+    ("Ignored example", ["unknown tag"]),
+]
+
+
+@pytest.fixture
+def suggester():
+    suggester = TagSuggester(TAGS)
+    suggester.fit(EXAMPLES)
+    return suggester
+
+
+class TestTagSuggester:
+
+    def test_tag_key(self):
+        assert tag_key("System Design") == tag_key("system-design") == tag_key("system_designs")
+        assert tag_key("System Design") != tag_key("Design Systems")
+
+    def test_fit_ignores_unknown_tags(self):
+        assert TagSuggester(TAGS).fit(EXAMPLES) == 4
+
+    def test_suggests_from_examples_and_names(self, suggester):
+        suggestions = suggester.suggest_many(
+            [
+                "How to design a scalable system with replication",
+                "PostgreSQL vacuum and index bloat",
+                "Индексы в базах данных",
+                "Cooking pasta at home",
+            ]
+        )
+
+        assert [[tag for tag, _ in tags] for tags in suggestions] == [
+            ["System Design"],
+            ["Databases"],
+            ["Базы данных"],
+            [],
+        ]
+
+    def test_canonicalize(self, suggester):
+        assert suggester.canonicalize(["system design", "System-Designs", "PYTHON", "New Tag", " ", "new-tag"]) == [
+            "System Design",
+            "Python",
+            "New Tag",
+        ]
+        assert suggester.canonical("new_tag") == "New Tag"
+        assert suggester.canonical("other") is None
+
+    def test_keywords(self, suggester):
+        text = "PostgreSQL vacuum: vacuum removes dead tuples, and PostgreSQL autovacuum runs vacuum in 2024"
+
+        assert suggester.keywords(text, 2) == ["vacuum", "PostgreSQL"]
+        assert suggester.keywords("a an 42") == []
+
+    def test_empty_vocabulary(self):
+        assert TagSuggester([]).suggest("anything") == []
+
+
+class TestTaggingTextAnalyzer:
+
+    def test_canonicalizes_llm_tags(self, suggester):
+        analyzer = MagicMock()
+        analyzer.get_info.return_value = TextInfo(
+            title="t", tags=["system-design", "databases", "System Design"], summary="s", keywords=["k"]
+        )
+
+        info = TaggingTextAnalyzer(analyzer, suggester).get_info("text")
+
+        assert info == TextInfo(title="t", tags=["System Design", "Databases"], summary="s", keywords=["k"])
+
+    def test_cheap_mode_makes_no_remote_call(self, suggester):
+        analyzer = MagicMock()
+        tagging = TaggingTextAnalyzer(analyzer, suggester, TaggingMode.CHEAP, max_keywords=3, summary_chars=60)
+
+        info = tagging.get_info(
+            "PostgreSQL vacuum explained. Vacuum removes dead tuples from the index. Autovacuum runs it for you."
+        )
+
+        analyzer.get_info.assert_not_called()
+        assert info.title == "PostgreSQL vacuum explained."
+        assert info.tags == ["Databases"]
+        assert info.summary == "PostgreSQL vacuum explained."
+        assert len(info.keywords) == 3 and info.keywords[0] == "vacuum"
+        assert tagging.model_id == "tfidf"
+        assert tagging.get_info("") == TextInfo.empty()
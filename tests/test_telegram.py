@@ -0,0 +1,133 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import TextInfo, TgChannelFeed, TgChannelUrlInfoFetcher, parse_channel_feed, parse_post_url
+from analysis.core import TextAnalyzer
+
+
+def feed_html(posts):
+    messages = "".join(
+        f'<div class="tgme_widget_message_wrap"><div class="tgme_widget_message text_not_supported_wrap js-widget_message" '
+        f'data-post="somechannel/{post_id}"><div class="tgme_widget_message_bubble">'
+        + (f'<div class="tgme_widget_message_text js-message_text" dir="auto">{text}</div>' if text else "")
+        + "</div></div></div>"
+        for post_id, text in posts.items()
+    )
+    return f"<html><body><section class='tgme_channel_history'>{messages}</section></body></html>"
+
+
+def transport_for(posts):
+    transport = MagicMock()
+    transport.get.return_value.text = feed_html(posts)
+    transport.get.return_value.content = b"x"
+    return transport
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("https://t.me/emacsway_log/1349", ("emacsway_log", 1349)),
+        ("https://t.me/SomeChannel/12?embed=1&mode=tme", ("somechannel", 12)),
+        ("https://t.me/s/somechannel/12", ("somechannel", 12)),
+        ("https://t.me/c/123456/12", None),
+        ("https://t.me/abcd/12", None),
+        ("https://t.me/somechannel", None),
+        ("https://example.com/somechannel/12", None),
+    ],
+)
+def test_parse_post_url(url, expected):
+    assert parse_post_url(url) == expected
+
+
+def test_parse_channel_feed():
+    html = feed_html({10: "First line<br/>second <b>bold</b>", 11: "", 12: "Other"})
+
+    assert parse_channel_feed(html) == {10: "First line\nsecond bold", 11: "", 12: "Other"}
+
+
+class TestTgChannelFeed:
+
+    def test_one_fetch_for_many_posts(self):
+        transport = transport_for({n: f"post {n}" for n in range(90, 110)})
+        feed = TgChannelFeed(transport)
+
+        assert [feed.get_post("somechannel", n) for n in (100, 101, 95, 109)] == [
+            "post 100",
+            "post 101",
+            "post 95",
+            "post 109",
+        ]
+        transport.get.assert_called_once_with("https://t.me/s/somechannel?before=110")
+        assert feed.fetches == 1 and feed.hits == 3
+
+    def test_deleted_post_is_not_refetched(self):
+        transport = transport_for({90: "a", 92: "b"})
+        feed = TgChannelFeed(transport)
+
+        assert feed.get_post("somechannel", 91) is None
+        assert feed.get_post("somechannel", 91) is None
+        assert transport.get.call_count == 1
+
+    def test_ttl(self):
+        now = [0.0]
+        transport = transport_for({100: "post"})
+        feed = TgChannelFeed(transport, ttl=60, clock=lambda: now[0])
+
+        feed.get_post("somechannel", 100)
+        now[0] = 60
+        feed.get_post("somechannel", 100)
+
+        assert transport.get.call_count == 2
+
+    def test_concurrent_lookups_share_fetch(self):
+        transport = transport_for({n: f"post {n}" for n in range(90, 110)})
+        feed = TgChannelFeed(transport)
+
+        threads = [threading.Thread(target=feed.get_post, args=("somechannel", n)) for n in range(95, 105)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert transport.get.call_count == 1
+
+
+class TestTgChannelUrlInfoFetcher:
+
+    def test_get_info(self):
+        analyzer = MagicMock(spec=TextAnalyzer)
+        analyzer.get_info.return_value = TextInfo("Title", ["tag"], "summary", ["k"])
+        fetcher = TgChannelUrlInfoFetcher(analyzer, TgChannelFeed(transport_for({100: "post text"})))
+
+        info = fetcher.get_info("https://t.me/somechannel/100")
+
+        assert info.title == "Title"
+        assert info.url == "https://t.me/somechannel/100"
+        analyzer.get_info.assert_called_once_with("post text")
+
+    def test_analyzer_error(self):
+        analyzer = MagicMock(spec=TextAnalyzer)
+        analyzer.get_info.side_effect = Exception("boom")
+        fetcher = TgChannelUrlInfoFetcher(analyzer, TgChannelFeed(transport_for({100: "post text"})))
+
+        info = fetcher.get_info("https://t.me/somechannel/100")
+
+        assert info.url == "https://t.me/somechannel/100"
+        assert info.title == ""
+
+    @pytest.mark.parametrize("url", ["https://t.me/somechannel/101", "https://t.me/c/1/1", "https://t.me/somechannel"])
+    def test_falls_through(self, url):
+        analyzer = MagicMock(spec=TextAnalyzer)
+        fetcher = TgChannelUrlInfoFetcher(analyzer, TgChannelFeed(transport_for({100: "post text", 101: ""})))
+
+        assert fetcher.get_info(url) is None
+        analyzer.get_info.assert_not_called()
+
+    def test_feed_error_falls_through(self):
+        transport = MagicMock()
+        transport.get.side_effect = ConnectionError()
+        fetcher = TgChannelUrlInfoFetcher(MagicMock(spec=TextAnalyzer), TgChannelFeed(transport))
+
+        assert fetcher.get_info("https://t.me/somechannel/100") is None
@@ -0,0 +1,147 @@
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from notion_client.errors import HTTPResponseError
+
+from analysis import Outbox, OutboxFullException, ThrottledUrlInfoStore, TokenBucket, UrlInfo, UrlInfoStore
+
+
+def info(url: str, title: str = "Title") -> UrlInfo:
+    return UrlInfo(title, url, [], "", [])
+
+
+class TestOutbox:
+
+    def test_coalesces_writes_for_same_url(self, tmp_path):
+        outbox = Outbox(str(tmp_path / "outbox.db"))
+
+        outbox.put(info("https://a.com", "old"))
+        outbox.put(info("https://b.com"))
+        outbox.put(info("https://a.com", "new"))
+
+        assert len(outbox) == 2
+        assert outbox.peek().info == info("https://a.com", "new")
+
+    def test_bounded(self, tmp_path):
+        outbox = Outbox(str(tmp_path / "outbox.db"), max_size=1)
+        outbox.put(info("https://a.com"))
+
+        with pytest.raises(OutboxFullException):
+            outbox.put(info("https://b.com"))
+
+    def test_survives_restart(self, tmp_path):
+        path = str(tmp_path / "outbox.db")
+        Outbox(path).put(info("https://a.com"))
+
+        assert Outbox(path).peek().info == info("https://a.com")
+
+
+class TestTokenBucket:
+
+    def test_waits_for_refill(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=2, burst=1, clock=lambda: now[0], sleep=sleep)
+        bucket.acquire()
+        bucket.acquire()
+
+        assert sleeps == [0.5]
+
+
+class TestThrottledUrlInfoStore:
+
+    @pytest.fixture
+    def store(self):
+        return MagicMock(UrlInfoStore)
+
+    @pytest.fixture
+    def outbox(self, tmp_path):
+        return Outbox(str(tmp_path / "outbox.db"))
+
+    def test_writes_queued_pages(self, store, outbox):
+        store.create_page.return_value = "page-1"
+        on_created = MagicMock()
+        throttled = ThrottledUrlInfoStore(store, outbox, rate=1000, on_created=on_created)
+
+        assert throttled.create_page(info("https://a.com")) is None
+        assert throttled.drain_one()
+        assert not throttled.drain_one()
+
+        store.create_page.assert_called_once_with(info("https://a.com"))
+        on_created.assert_called_once_with(info("https://a.com"), "page-1")
+        assert throttled.stats()["written"] == 1
+
+    def test_failing_on_created_does_not_recreate_page(self, store, outbox):
+        store.create_page.return_value = "page-1"
+        throttled = ThrottledUrlInfoStore(store, outbox, rate=1000, on_created=MagicMock(side_effect=Exception()))
+
+        throttled.create_page(info("https://a.com"))
+        assert throttled.drain_one()
+        assert not throttled.drain_one()
+
+        store.create_page.assert_called_once()
+        assert throttled.stats()["written"] == 1
+
+    def test_honours_retry_after(self, store, outbox):
+        sleep = MagicMock()
+        error = HTTPResponseError(httpx.Response(429, headers={"Retry-After": "7"}))
+        store.create_page.side_effect = [error, "page-1"]
+        throttled = ThrottledUrlInfoStore(store, outbox, rate=1000, sleep=sleep)
+
+        throttled.create_page(info("https://a.com"))
+        throttled.drain_one()
+        throttled.drain_one()
+
+        sleep.assert_any_call(7.0)
+        assert throttled.rate_limited == 1
+        assert len(outbox) == 0
+
+    def test_drops_after_max_attempts(self, store, outbox):
+        store.create_page.side_effect = Exception("Error")
+        throttled = ThrottledUrlInfoStore(store, outbox, rate=1000, max_attempts=2)
+
+        throttled.create_page(info("https://a.com"))
+        throttled.drain_one()
+        assert len(outbox) == 1
+        throttled.drain_one()
+
+        assert len(outbox) == 0
+        assert throttled.dropped == 1
+
+    def test_write_coalesced_during_create_updates_the_new_page(self, store, outbox):
+        throttled = ThrottledUrlInfoStore(store, outbox, rate=1000)
+
+        def create_page(page):
+            throttled.create_page(info("https://a.com", "new"))
+            return "page-1"
+
+        store.create_page.side_effect = create_page
+        throttled.create_page(info("https://a.com", "old"))
+
+        assert throttled.drain_one()
+        assert len(outbox) == 1
+        assert throttled.drain_one()
+
+        store.create_page.assert_called_once_with(info("https://a.com", "old"))
+        store.update_page.assert_called_once_with("page-1", info("https://a.com", "new"))
+        assert len(outbox) == 0
+
+    def test_retry_keeps_write_coalesced_during_failure(self, store, outbox):
+        throttled = ThrottledUrlInfoStore(store, outbox, rate=1000)
+
+        def create_page(page):
+            throttled.create_page(info("https://a.com", "new"))
+            raise Exception("Error")
+
+        store.create_page.side_effect = create_page
+        throttled.create_page(info("https://a.com", "old"))
+        throttled.drain_one()
+
+        assert outbox.peek().info == info("https://a.com", "new")
+        assert outbox.peek().attempts == 1
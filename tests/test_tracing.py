@@ -0,0 +1,97 @@
+import json
+import urllib.request
+from unittest.mock import MagicMock
+
+import pytest
+
+from analysis import UrlHandler, UrlInfoFetcherContext, UrlInfoStore
+from analysis import tracing
+from analysis.tracing import JsonlSpanSink, MetricsServer, Tracer, render_prometheus
+
+
+@pytest.fixture
+def tracer():
+    previous = tracing.get_tracer()
+    tracer = Tracer()
+    tracing.set_tracer(tracer)
+    yield tracer
+    tracing.set_tracer(previous)
+
+
+def test_span_records_duration_outcome_and_attrs(tracer):
+    with tracing.span("download", url="x") as span:
+        span.set(chars=100)
+    with pytest.raises(ValueError):
+        with tracing.span("download"):
+            raise ValueError()
+
+    assert tracer.metrics.histogram("download").count == 2
+    assert tracer.outcomes() == {("download", "ok"): 1, ("download", "ValueError"): 1}
+    assert tracer.totals() == {("download", "chars"): 100}
+
+
+def test_nested_spans_share_trace(tracer):
+    spans = []
+    tracer.sink = MagicMock(write=spans.append)
+
+    with tracing.span("outer"):
+        with tracing.span("inner"):
+            pass
+
+    inner, outer = spans
+    assert inner.trace_id == outer.trace_id
+    assert inner.parent_id == outer.span_id
+    assert outer.parent_id is None
+
+
+def test_jsonl_sink(tmp_path, tracer):
+    path = tmp_path / "trace.jsonl"
+    tracer.sink = JsonlSpanSink(str(path))
+
+    with tracing.span("analyze", tokens_in=10):
+        pass
+    tracer.sink.close()
+
+    (record,) = [json.loads(line) for line in path.read_text().splitlines()]
+    assert record["name"] == "analyze"
+    assert record["attrs"] == {"tokens_in": 10}
+    assert record["outcome"] == "ok"
+
+
+def test_handler_spans(tracer):
+    fetcher = MagicMock(spec=UrlInfoFetcherContext)
+    fetcher.get_info.side_effect = Exception("boom")
+    store = MagicMock(spec=UrlInfoStore)
+
+    UrlHandler(fetcher, store).handle("https://example.com")
+
+    assert tracer.outcomes() == {("pipeline", "fetch_failed"): 1}
+
+
+def test_prometheus_endpoint(tracer):
+    with tracing.span("notion create_page", bytes=512):
+        pass
+    server = MetricsServer(tracer, 0)
+    server.start()
+    try:
+        body = urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics").read().decode()
+    finally:
+        server.stop()
+
+    assert body == render_prometheus(tracer)
+    assert 'pipeline_stage_seconds_count{stage="notion create_page"} 1' in body
+    assert 'pipeline_stage_seconds_bucket{stage="notion create_page",le="+Inf"} 1' in body
+    assert 'pipeline_stage_outcomes_total{stage="notion create_page",outcome="ok"} 1' in body
+    assert 'pipeline_stage_attr_total{stage="notion create_page",attr="bytes"} 512' in body
+
+
+def test_prometheus_gauges(tracer):
+    tracer.add_gauges("pool", lambda: {"hedged": 2, "providers": {"gpt": {"errors": 1, "name": "gpt"}}})
+    tracer.add_gauges("broken", MagicMock(side_effect=Exception("boom")))
+
+    body = render_prometheus(tracer)
+
+    assert 'component_stat{component="pool",stat="hedged"} 2' in body
+    assert 'component_stat{component="pool",stat="providers.gpt.errors"} 1' in body
+    assert "providers.gpt.name" not in body
+    assert 'component="broken"' not in body
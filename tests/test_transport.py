@@ -0,0 +1,102 @@
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+import requests
+
+from analysis import RetryBudget, RetryPolicy, Transport
+
+
+def response(status: int, headers=None, content=b"") -> requests.Response:
+    r = requests.Response()
+    r.status_code = status
+    r.headers.update(headers or {})
+    r._content = content
+    r._content_consumed = True
+    r.raw = MagicMock()
+    return r
+
+
+class TestTransport:
+
+    @pytest.fixture
+    def sleep(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def transport(self, sleep, mocker):
+        transport = Transport(retry=RetryPolicy(attempts=3, backoff_base=0.1), sleep=sleep)
+        mocker.patch.object(transport._session, "request")
+        return transport
+
+    def test_retries_on_5xx(self, transport, sleep):
+        transport._session.request.side_effect = [response(503), response(200)]
+
+        assert transport.get("https://example.com/a").status_code == 200
+        assert transport._session.request.call_count == 2
+        assert sleep.call_count == 1
+
+    def test_honours_retry_after(self, transport, sleep):
+        transport._session.request.side_effect = [response(429, {"Retry-After": "3"}), response(200)]
+
+        transport.get("https://example.com/a")
+
+        sleep.assert_called_once_with(3.0)
+
+    def test_gives_up_after_attempts(self, transport):
+        transport._session.request.return_value = response(500)
+
+        assert transport.get("https://example.com/a").status_code == 500
+        assert transport._session.request.call_count == 3
+
+    def test_retry_budget(self, sleep, mocker):
+        transport = Transport(budget=RetryBudget(ratio=0, capacity=1), sleep=sleep)
+        mocker.patch.object(transport._session, "request", return_value=response(500))
+
+        transport.get("https://example.com/a")
+
+        assert transport._session.request.call_count == 2
+        assert transport.budget.exhausted == 1
+
+    def test_does_not_retry_post_on_read_timeout(self, transport):
+        transport._session.request.side_effect = requests.ReadTimeout()
+
+        with pytest.raises(requests.ReadTimeout):
+            transport.post("https://example.com/a")
+        assert transport._session.request.call_count == 1
+
+    @pytest.mark.parametrize("status", [500, 502, 503, 504])
+    def test_does_not_retry_post_on_5xx(self, transport, status):
+        transport._session.request.return_value = response(status)
+
+        assert transport.post("https://example.com/a").status_code == status
+        assert transport._session.request.call_count == 1
+
+    @pytest.mark.parametrize("first", [response(429), response(503, {"Retry-After": "1"})])
+    def test_retries_post_when_rejected(self, transport, first):
+        transport._session.request.side_effect = [first, response(200)]
+
+        assert transport.post("https://example.com/a").status_code == 200
+        assert transport._session.request.call_count == 2
+
+    def test_records_per_host_latency(self, transport):
+        transport._session.request.return_value = response(200)
+
+        transport.get("https://example.com/a")
+
+        assert transport.metrics.snapshot()["http example.com"]["count"] == 1
+
+    def test_httpx_client(self, transport):
+        transport._session.request.return_value = response(200, {"Content-Type": "application/json"}, b'{"id": 1}')
+
+        with transport.httpx_client() as client:
+            assert client.post("https://api.example.com/v1/pages", json={}).json() == {"id": 1}
+
+    def test_httplib2_adapter(self, transport):
+        transport._session.request.return_value = response(200, {"ETag": "x"}, b"{}")
+
+        resp, content = transport.httplib2().request("https://www.googleapis.com/youtube/v3/videos")
+
+        assert resp.status == 200
+        assert resp["etag"] == "x"
+        assert content == b"{}"
@@ -40,3 +40,42 @@ def test_no_url(extractor):
 
     with pytest.raises(NoUrlException):
         extractor.extract_url(mock_message)
+
+
+def test_extract_all_urls_from_text(extractor):
+    mock_message = MagicMock(spec=telebot.types.Message)
+    mock_message.text = "Links: https://a.com/1, https://b.com/2.\nAgain https://a.com/1 and (https://c.com/x?y=1)"
+    mock_message.forward_from_message_id = None
+    mock_message.entities = None
+
+    urls = extractor.extract_urls(mock_message)
+
+    assert urls == ["https://a.com/1", "https://b.com/2", "https://c.com/x?y=1"]
+
+
+def test_extract_urls_from_caption_and_text_links(extractor):
+    mock_message = MagicMock(spec=telebot.types.Message)
+    mock_message.text = None
+    mock_message.caption = "Album https://a.com"
+    mock_message.forward_from_message_id = None
+    mock_message.entities = None
+    mock_message.caption_entities = [MagicMock(type="text_link", url="https://hidden.com"), MagicMock(type="bold")]
+
+    assert extractor.extract_urls(mock_message) == ["https://a.com", "https://hidden.com"]
+
+
+def test_extract_urls_forward_wins(extractor):
+    mock_message = MagicMock(spec=telebot.types.Message)
+    mock_message.text = "Post with https://asdf.ru"
+    mock_message.forward_from_chat.username = "testchat"
+    mock_message.forward_from_message_id = 123
+
+    assert extractor.extract_urls(mock_message) == ["https://t.me/testchat/123?embed=1&mode=tme"]
+
+
+def test_extract_urls_none(extractor):
+    mock_message = MagicMock(spec=telebot.types.Message)
+    mock_message.text = "Hello world"
+    mock_message.forward_from_message_id = None
+
+    assert extractor.extract_urls(mock_message) == []
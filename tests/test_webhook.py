@@ -0,0 +1,137 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+import telebot
+
+from benchmarks.fakes import FakeTelegramClient
+from bot import MemoryUpdateDedup, SqliteUpdateDedup, WebhookServer
+
+
+def serve(on_update, test, secret_token="secret", **kwargs):
+    """Runs ``test(server, client)`` against a server on a free local port."""
+
+    async def run():
+        server = WebhookServer(on_update, secret_token, host="127.0.0.1", port=0, **kwargs)
+        await server.start()
+        client = FakeTelegramClient(f"http://127.0.0.1:{server.port}/webhook", secret_token)
+        try:
+            return await test(server, client)
+        finally:
+            await server.stop()
+
+    return asyncio.run(run())
+
+
+def collector():
+    updates = []
+    done = threading.Event()
+
+    def on_update(update):
+        updates.append(update)
+        done.set()
+
+    return updates, done, on_update
+
+
+class TestWebhookServer:
+
+    def test_dispatches_update(self):
+        updates, done, on_update = collector()
+
+        async def test(server, client):
+            update = client.message_update("https://example.com")
+            assert await client.post(update) == 200
+            assert done.wait(1)
+            return update
+
+        update = serve(on_update, test)
+
+        assert updates == [update]
+        assert telebot.types.Update.de_json(updates[0]).message.text == "https://example.com"
+
+    def test_requires_secret(self):
+        with pytest.raises(ValueError):
+            WebhookServer(lambda update: None, None)
+
+    def test_rejects_wrong_secret(self):
+        updates, _, on_update = collector()
+
+        async def test(server, client):
+            url = f"http://127.0.0.1:{server.port}/webhook"
+            assert await FakeTelegramClient(url, "wrong").post(client.message_update("hi")) == 401
+            assert await FakeTelegramClient(url).post(client.message_update("hi")) == 401
+            return server.stats()
+
+        stats = serve(on_update, test)
+
+        assert updates == []
+        assert stats["rejected"] == 2
+
+    def test_dispatches_redelivered_update_once(self):
+        updates, _, on_update = collector()
+
+        async def test(server, client):
+            update = client.message_update("hi")
+            async with httpx.AsyncClient() as http:
+                statuses = [await client.post(update, http) for _ in range(3)]
+            return statuses, server.stats()
+
+        statuses, stats = serve(on_update, test)
+
+        assert statuses == [200, 200, 200]
+        assert len(updates) == 1
+        assert stats == {"received": 3, "duplicates": 2, "rejected": 0}
+
+    def test_bad_requests(self):
+        async def test(server, client):
+            async with httpx.AsyncClient() as http:
+                headers = {"X-Telegram-Bot-Api-Secret-Token": "secret"}
+                url = f"http://127.0.0.1:{server.port}"
+                return [
+                    (await http.post(f"{url}/webhook", content=b"{", headers=headers)).status_code,
+                    (await http.post(f"{url}/webhook", json={"message": {}}, headers=headers)).status_code,
+                    (await http.post(f"{url}/other", json={"update_id": 1}, headers=headers)).status_code,
+                    (await http.get(f"{url}/healthz")).status_code,
+                ]
+
+        assert serve(lambda update: None, test) == [400, 400, 404, 200]
+
+    def test_malformed_content_length(self):
+        async def test(server, client):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"POST /webhook HTTP/1.1\r\nContent-Length: abc\r\n\r\n")
+            await writer.drain()
+            status = await reader.readline()
+            writer.close()
+            return status
+
+        assert serve(lambda update: None, test).startswith(b"HTTP/1.1 400")
+
+    def test_failing_handler_still_acks(self):
+        def on_update(update):
+            raise RuntimeError("boom")
+
+        async def test(server, client):
+            return await client.post(client.message_update("hi"))
+
+        assert serve(on_update, test) == 200
+
+
+class TestUpdateDedup:
+
+    def test_memory_forgets_oldest(self):
+        dedup = MemoryUpdateDedup(max_size=2)
+
+        assert [dedup.first_seen(i) for i in (1, 2, 1, 3)] == [True, True, False, True]
+        assert dedup.first_seen(1)
+
+    def test_sqlite_is_shared_by_replicas(self, tmp_path):
+        path = str(tmp_path / "updates.db")
+        replica1, replica2 = SqliteUpdateDedup(path), SqliteUpdateDedup(path)
+
+        assert replica1.first_seen(1)
+        assert not replica2.first_seen(1)
+        assert replica2.first_seen(2)
+        assert not SqliteUpdateDedup(path).first_seen(2)
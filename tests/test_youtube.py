@@ -0,0 +1,109 @@
+import threading
+from unittest.mock import MagicMock
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from analysis import YTVideoBatcher
+
+
+def item(video_id: str) -> dict:
+    return {"id": video_id, "etag": f"item-{video_id}", "snippet": {"title": video_id, "description": ""}}
+
+
+class TestYTVideoBatcher:
+
+    @pytest.fixture
+    def client(self):
+        client = MagicMock()
+
+        def list_(part, id):
+            request = MagicMock()
+            request.headers = {}
+            request.execute.return_value = {
+                "etag": f"list-{id}",
+                "items": [item(i) for i in id.split(",") if i != "missing"],
+            }
+            return request
+
+        client.videos.return_value.list.side_effect = list_
+        return client
+
+    def get_all(self, batcher, ids):
+        results = {}
+
+        def get(video_id):
+            try:
+                results[video_id] = batcher.get(video_id)
+            except Exception as e:
+                results[video_id] = e
+
+        threads = [threading.Thread(target=get, args=(i,)) for i in ids]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_coalesces_ids_within_window(self, client):
+        batcher = YTVideoBatcher(client, window=0.2)
+
+        results = self.get_all(batcher, ["a", "b", "c"])
+
+        assert {k: v["id"] for k, v in results.items()} == {"a": "a", "b": "b", "c": "c"}
+        assert batcher.calls == 1
+        ids = client.videos.return_value.list.call_args.kwargs["id"]
+        assert sorted(ids.split(",")) == ["a", "b", "c"]
+
+    def test_flushes_when_batch_is_full(self, client):
+        batcher = YTVideoBatcher(client, window=10, max_batch=2)
+
+        results = self.get_all(batcher, ["a", "b"])
+
+        assert len(results) == 2
+        assert batcher.calls == 1
+
+    def test_missing_video(self, client):
+        batcher = YTVideoBatcher(client, window=0.01)
+
+        with pytest.raises(ValueError):
+            batcher.get("missing")
+
+    def test_serves_fresh_items_from_cache(self, client):
+        batcher = YTVideoBatcher(client, window=0.01)
+
+        batcher.get("a")
+        batcher.get("a")
+
+        assert batcher.calls == 1
+        assert batcher.cache_hits == 1
+
+    def test_conditional_refresh(self, client):
+        now = [0.0]
+        batcher = YTVideoBatcher(client, window=0.01, fresh_ttl=10, clock=lambda: now[0])
+        first = batcher.get("a")
+
+        request = MagicMock()
+        request.headers = {}
+        request.execute.side_effect = HttpError(httplib2.Response({"status": "304"}), b"")
+        client.videos.return_value.list.side_effect = None
+        client.videos.return_value.list.return_value = request
+        now[0] = 20
+
+        assert batcher.get("a") == first
+        assert request.headers["If-None-Match"] == "list-a"
+        assert batcher.not_modified == 1
+
+    def test_batched_items_are_refetched_unconditionally(self, client):
+        now = [0.0]
+        batcher = YTVideoBatcher(client, window=0.2, fresh_ttl=10, clock=lambda: now[0])
+        self.get_all(batcher, ["a", "b"])
+        list_ = client.videos.return_value.list.side_effect
+        requests = []
+        client.videos.return_value.list.side_effect = lambda **kwargs: requests.append(list_(**kwargs)) or requests[-1]
+        now[0] = 20
+
+        assert batcher.get("a")["id"] == "a"
+        assert "If-None-Match" not in requests[0].headers
+        assert batcher.calls == 2